@@ -1,6 +1,12 @@
 import os
 
-from .igver import load_screenshots, run_igv, create_batch_script
+from .igver import load_screenshots, iter_screenshots, run_igv, create_batch_script
+from .aio import load_screenshots_async, run_igv_async
+from .engine import IGVEngine
+from .display import XvfbDisplayManager, get_display_manager
+from .singularity import SingularityInstance, get_singularity_instance
+from .cache import SnapshotCache
+from .results import Screenshot
 
 try:
     from importlib.metadata import version
@@ -9,4 +15,7 @@ except ImportError:  # For Python <3.8
 
 __version__ = version("igver")
 __file__ = os.path.abspath(__file__)  # Store absolute path of this file
-__all__ = ["load_screenshots", "run_igv", "create_batch_script"]
+__all__ = ["load_screenshots", "iter_screenshots", "run_igv", "create_batch_script",
+           "load_screenshots_async", "run_igv_async", "IGVEngine",
+           "XvfbDisplayManager", "get_display_manager",
+           "SingularityInstance", "get_singularity_instance", "SnapshotCache", "Screenshot"]
@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import os
+import signal
+import time
+
+from .igver import (is_running_in_container, _acquire_display, _check_return_type, _decode_pngs, _igv_command,
+                    _igv_profile, _igv_profile_prefs, _igv_version_id, _load_outputs, _plan_pending_batches,
+                    _remove_previous_output, _resolve_output_dir, _resolve_singularity_image,
+                    _resolve_singularity_instance, _resolve_snapshot_cache, _script_order, _singularity_bind_args,
+                    _store_snapshots, _wrap_figures, _write_subset_batch_script)
+from .journal import ProgressJournal
+from .preflight import default_genome_dirs
+
+# `load_screenshots` parameters that the asyncio path does not implement
+UNSUPPORTED_ASYNC_PARAMS = ('engine', 'isolate_failures', 'stall_timeout', 'java_heap_mb', 'max_java_heap_mb',
+                            'max_rss_mb', 'pdf_workers', 'report', 'sink')
+
+
+async def load_screenshots_async(paths, regions, output_dir='/tmp', genome="hg19", igv_dir="/opt/IGV_2.19.5",
+                                 overwrite=True, remove_png=True, dpi=300,
+                                 singularity_image='docker://sahuno/igver:latest', singularity_args='-B /home',
+                                 debug=False, output_format='png', use_singularity=None, workers=1,
+                                 max_retries=1, display_manager=None, singularity_instance=False, sif_cache=None,
+                                 snapshot_cache=None, resume=False, max_snapshots_per_batch=None, timeout=None,
+                                 validate_regions='error', igv_profile=True, return_type='figure',
+                                 memmap_path=None, **kwargs):
+    """
+    Asyncio counterpart of `igver.load_screenshots`.
+
+    IGV runs as asyncio subprocesses, so many renders can be scheduled on one event loop
+    without a thread or CLI subprocess per call. Cancelling the task kills its IGV processes.
+
+    Parameters:
+        timeout (float, optional): Seconds allowed per IGV run before it is killed and
+            asyncio.TimeoutError is raised (default: None, no limit).
+        Other parameters are the same as for `igver.load_screenshots`, except that `engine`,
+        `isolate_failures`, `stall_timeout`, `java_heap_mb`, `max_java_heap_mb`, `max_rss_mb`,
+        `pdf_workers`, `report` and `sink` are not supported and raise a ValueError.
+
+    Returns:
+        list of matplotlib.figure.Figure (PNG) or list of str (SVG/PDF paths), or as selected
+        by `return_type`.
+    """
+    unsupported = [name for name in UNSUPPORTED_ASYNC_PARAMS if name in kwargs]
+    if unsupported:
+        raise ValueError(f"[ERROR:{time.ctime()}] load_screenshots_async does not support {', '.join(unsupported)}; "
+                         f"use igver.load_screenshots in a thread instead.")
+    _check_return_type(return_type, output_format)
+    loop = asyncio.get_running_loop()
+    output_dir, tmpdir = _resolve_output_dir(output_dir, debug)
+    singularity_args = _singularity_bind_args(paths, output_dir, tmpdir, singularity_args)
+    singularity_image = await loop.run_in_executor(None, _resolve_singularity_image, singularity_image,
+                                                   use_singularity, sif_cache, debug)
+    snapshot_cache = _resolve_snapshot_cache(snapshot_cache, debug)
+    journal = ProgressJournal(output_dir, debug)
+    journal.start(resume)
+    kwargs.setdefault('genome_dirs', default_genome_dirs(igv_dir))
+    batches, output_paths, loci, to_store = await loop.run_in_executor(None, functools.partial(
+        _plan_pending_batches, paths, regions, output_dir, genome, n_scripts=workers,
+        snapshot_cache=snapshot_cache, igv_version=_igv_version_id(igv_dir, use_singularity, singularity_image),
+        igv_prefs=_igv_profile_prefs(igv_profile), journal=journal, resume=resume, output_format=output_format,
+        validate_regions=validate_regions, **kwargs))
+    singularity_instance = await loop.run_in_executor(None, _resolve_singularity_instance, singularity_instance,
+                                                      use_singularity, singularity_image, singularity_args, debug)
+
+    tasks = [asyncio.ensure_future(run_igv_async(
+        batch_script, png_paths, igv_dir, overwrite, singularity_image=singularity_image,
+        singularity_args=singularity_args, debug=debug, use_singularity=use_singularity,
+        max_retries=max_retries, display_manager=display_manager, singularity_instance=singularity_instance,
+        max_snapshots_per_batch=max_snapshots_per_batch, timeout=timeout, igv_profile=igv_profile))
+        for batch_script, png_paths in batches]
+    try:
+        for task in asyncio.as_completed(tasks):
+            for png in await task:
+                journal.record(png)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    await loop.run_in_executor(None, _store_snapshots, snapshot_cache, to_store)
+
+    if output_format == 'png' and return_type == 'figure':
+        # PNGs are decoded in the executor; only the figures are created on the event loop thread,
+        # as pyplot is not thread-safe
+        images = await loop.run_in_executor(None, _decode_pngs, output_paths, remove_png, debug)
+        return _wrap_figures(images, dpi)
+    return await loop.run_in_executor(None, _load_outputs, output_paths, output_format, remove_png, dpi, debug,
+                                      return_type, loci, None, memmap_path)
+
+
+async def run_igv_async(batch_script, png_paths, igv_dir="/opt/IGV_2.19.5", overwrite=False,
+                        singularity_image='docker://sahuno/igver:latest', singularity_args='-B /data1 -B /home',
+                        debug=False, use_singularity=None, max_retries=1, display_manager=None,
+                        singularity_instance=None, max_snapshots_per_batch=None, timeout=None, igv_profile=True):
+    """
+    Asyncio counterpart of `igver.run_igv`.
+
+    Parameters:
+        timeout (float, optional): Seconds allowed per IGV run before it is killed and
+            asyncio.TimeoutError is raised (default: None, no limit).
+        Other parameters are the same as for `igver.run_igv`.
+
+    Returns:
+        list of str: Paths to the generated PNG files.
+    """
+    # Auto-detect if we should use singularity
+    if use_singularity is None:
+        use_singularity = not is_running_in_container()
+
+    # If overwrite is enabled, remove existing PNG files
+    if overwrite:
+        _remove_previous_output(png_paths, debug)
+
+    profile = _igv_profile(igv_profile, os.path.dirname(batch_script), igv_dir, debug)
+    igv_directory = profile.create() if profile is not None else None
+    try:
+        # Run IGV
+        max_iter = max_retries + 1
+        script_paths = _script_order(batch_script, png_paths)
+        for n_iter in range(max_iter):
+            missing = [png for png in script_paths if not os.path.exists(png)]
+            if not missing:
+                break
+            if debug:
+                print(f"[LOG:{time.ctime()}] Iteration #{n_iter + 1}: Rendering {len(missing)} of {len(png_paths)} files")
+            chunk_size = max_snapshots_per_batch or len(missing)
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start:start + chunk_size]
+                if len(chunk) < len(png_paths):
+                    run_script = _write_subset_batch_script(batch_script, chunk)
+                else:
+                    run_script = batch_script
+
+                try:
+                    with _acquire_display(display_manager) as display:
+                        cmd = _igv_command(f'-b {run_script}', igv_dir, singularity_image, singularity_args,
+                                           use_singularity, display=display, singularity_instance=singularity_instance,
+                                           debug=debug, igv_directory=igv_directory)
+                        if debug:
+                            print(f"[LOG:{time.ctime()}] Running IGV command:\n{cmd}")
+                        stdout, stderr = await _communicate(cmd, timeout)
+                finally:
+                    if run_script != batch_script:
+                        os.remove(run_script)
+                if debug:
+                    print(f"[STDOUT:{time.ctime()}]\n{stdout.decode()}")
+                    print(f"[STDERR:{time.ctime()}]\n{stderr.decode()}")
+    finally:
+        if profile is not None:
+            profile.remove()
+
+    missing = [png for png in png_paths if not os.path.exists(png)]
+    if missing:
+        raise RuntimeError(f"[ERROR:{time.ctime()}] Failed to generate all PNG files after {max_iter} iterations "
+                           f"({len(missing)} of {len(png_paths)} missing).")
+
+    # Cleanup batch script
+    os.remove(batch_script)
+    if debug:
+        print(f"[LOG:{time.ctime()}] Removed batch script {batch_script}")
+
+    return png_paths
+
+
+async def _communicate(cmd, timeout):
+    """
+    Run `cmd` in its own process group; kill the group on timeout or cancellation
+    """
+    process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE,
+                                                    start_new_session=True)
+    try:
+        return await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        raise
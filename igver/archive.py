@@ -0,0 +1,206 @@
+import glob
+import hashlib
+import os
+import re
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+
+ARCHIVE_FORMATS = ('zip', 'tar')
+
+
+class ShardArchive:
+    """
+    Append-only shard archives of screenshots with an index for random access.
+
+    Screenshots are added to `<prefix>-<n>.zip` (or `.tar`) in `archive_dir` as they are rendered,
+    `shard_size` per shard, uncompressed (PNGs are already compressed), so a run leaves a
+    handful of large files instead of one small file per region. Every added screenshot gets
+    a line `<name>\\t<shard>\\t<offset>\\t<size>` in `<prefix>_index.tsv`, written at once, so
+    `read` (or any tool that can seek) gets a screenshot's bytes without listing or unpacking
+    a shard, even for a shard left unfinished by a killed run. A new ShardArchive on the same
+    directory starts a new shard instead of rewriting existing ones.
+
+    Instances are callable, so they can be passed as `on_snapshot` or as the `sink` of
+    `load_screenshots`.
+    """
+
+    def __init__(self, archive_dir, archive_format='zip', shard_size=10000, prefix='igver', debug=False):
+        """
+        Parameters:
+            archive_dir (str): Directory of the shards and index.
+            archive_format (str, optional): 'zip' or 'tar' (default: 'zip').
+            shard_size (int, optional): Screenshots per shard (default: 10000).
+            prefix (str, optional): File name prefix of the shards and index (default: 'igver').
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        assert archive_format in ARCHIVE_FORMATS, f"Invalid archive_format: {archive_format}"
+        self.archive_dir = archive_dir
+        self.archive_format = archive_format
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.debug = debug
+        self.index_path = os.path.join(archive_dir, f'{prefix}_index.tsv')
+        self._archive = None
+        self._shard = None
+        self._count = 0
+        self._next_shard = self._last_shard() + 1
+        self._index = None
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def add(self, path):
+        """
+        Append the screenshot `path` to the current shard and index it.
+        """
+        name = os.path.basename(path)
+        with self._lock:
+            if self._archive is None or self._count >= self.shard_size:
+                self._open_shard()
+            if self.archive_format == 'zip':
+                self._archive.write(path, arcname=name, compress_type=zipfile.ZIP_STORED)
+                info = self._archive.infolist()[-1]
+                # The archive file is positioned at the end of the entry just written
+                size = info.file_size
+                offset = self._archive.fp.tell() - size
+            else:
+                info = self._archive.gettarinfo(path, arcname=name)
+                # The data follows the member's header (with PAX records for long names)
+                offset = self._archive.fileobj.tell() + len(info.tobuf(self._archive.format, self._archive.encoding,
+                                                                         self._archive.errors))
+                with open(path, 'rb') as f:
+                    self._archive.addfile(info, f)
+                size = info.size
+            self._count += 1
+            with open(self.index_path, 'a') as f:
+                f.write(f'{name}\t{os.path.basename(self._shard)}\t{offset}\t{size}\n')
+            if self._index is not None:
+                self._index[name] = (os.path.basename(self._shard), offset, size)
+
+    __call__ = add
+
+    def read(self, name):
+        """
+        Return the bytes of the screenshot named `name` (its file name when rendered).
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                if os.path.exists(self.index_path):
+                    with open(self.index_path) as f:
+                        for line in f:
+                            fields = line.rstrip('\n').split('\t')
+                            if len(fields) == 4:
+                                self._index[fields[0]] = (fields[1], int(fields[2]), int(fields[3]))
+            shard, offset, size = self._index[name]
+            if self._archive is not None and shard == os.path.basename(self._shard):
+                self._flush()
+        with open(os.path.join(self.archive_dir, shard), 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def finish(self):
+        """
+        Close the current shard, writing its zip central directory or tar end blocks.
+        """
+        with self._lock:
+            self._close_shard()
+
+    close = finish
+
+    def _open_shard(self):
+        self._close_shard()
+        self._shard = os.path.join(self.archive_dir, f'{self.prefix}-{self._next_shard:05d}.{self.archive_format}')
+        self._next_shard += 1
+        self._count = 0
+        if self.archive_format == 'zip':
+            self._archive = zipfile.ZipFile(self._shard, 'w', allowZip64=True)
+        else:
+            self._archive = tarfile.open(self._shard, 'w', format=tarfile.PAX_FORMAT)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Writing screenshots to {self._shard}")
+
+    def _close_shard(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+            if self.debug:
+                print(f"[LOG:{time.ctime()}] Closed {self._shard} with {self._count} screenshots")
+
+    def _flush(self):
+        fileobj = self._archive.fp if self.archive_format == 'zip' else self._archive.fileobj
+        fileobj.flush()
+
+    def _last_shard(self):
+        pattern = re.compile(rf'^{re.escape(self.prefix)}-(\d+)\.(zip|tar)$')
+        numbers = [int(match.group(1)) for match in
+                   (pattern.match(os.path.basename(path)) for path in glob.glob(os.path.join(self.archive_dir, '*')))
+                   if match]
+        return max(numbers, default=-1)
+
+
+class HashedDirectories:
+    """
+    Screenshots spread over hashed subdirectories instead of one flat directory.
+
+    A screenshot named `name` is placed at `<root>/<h[0:2]>/<h[2:4]>/<name>` (for the default
+    `levels=2, width=2`), where `h` is the SHA-1 of its name, so no directory holds more than
+    a few hundred entries and the location of any screenshot follows from its name alone.
+    Screenshots are hard-linked into place (copied across filesystems), so the flat copies
+    can be removed without touching the data.
+
+    Instances are callable, so they can be passed as `on_snapshot` or as the `sink` of
+    `load_screenshots`.
+    """
+
+    def __init__(self, root, levels=2, width=2, debug=False):
+        """
+        Parameters:
+            root (str): Top directory.
+            levels (int, optional): Number of directory levels (default: 2).
+            width (int, optional): Hex digits of the hash per level (default: 2).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.root = root
+        self.levels = levels
+        self.width = width
+        self.debug = debug
+
+    def path_for(self, name):
+        """
+        Return the hashed location of the screenshot named `name`.
+        """
+        digest = hashlib.sha1(name.encode()).hexdigest()
+        parts = [digest[i * self.width:(i + 1) * self.width] for i in range(self.levels)]
+        return os.path.join(self.root, *parts, name)
+
+    def add(self, path):
+        """
+        Link the screenshot `path` into its hashed directory, replacing an earlier version.
+        """
+        target = self.path_for(os.path.basename(path))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f'{target}.tmp{os.getpid()}.{threading.get_ident()}'
+        try:
+            os.link(path, tmp)
+        except OSError:
+            shutil.copy2(path, tmp)
+        os.replace(tmp, target)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Stored {path} as {target}")
+
+    __call__ = add
+
+    def read(self, name):
+        """
+        Return the bytes of the screenshot named `name`.
+        """
+        with open(self.path_for(name), 'rb') as f:
+            return f.read()
+
+    def finish(self):
+        pass
+
+    close = finish
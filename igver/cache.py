@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+INDEX_SUFFIXES = ('.bai', '.crai', '.csi', '.tbi', '.idx')
+
+
+class SnapshotCache:
+    """
+    Content-addressed cache of rendered snapshots with size-capped LRU eviction.
+
+    The key of a snapshot covers everything that changes its pixels: the identity of
+    every track and its index (path, size, mtime), the genome and other session commands,
+    the `goto` block (region, overlap display, panel height, igv_config contents), the
+    output format and the IGV version. Entries are stored as `<cache_dir>/<key[:2]>/<key>.<ext>`;
+    a hit refreshes the entry's mtime, and the oldest entries are evicted first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=10 * 1024 ** 3, debug=False):
+        """
+        Parameters:
+            cache_dir (str): Cache directory.
+            max_bytes (int, optional): Size cap of the cache in bytes (default: 10 GiB).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.debug = debug
+        self._lock = threading.Lock()
+
+    def snapshot_keys(self, header, blocks, igv_version='', prefs=None):
+        """
+        Compute one cache key per planned snapshot.
+
+        Parameters:
+            header (list of str): Batch header lines (`new`, `genome`, `load`, ...).
+            blocks (list of list of str): Batch lines of each snapshot, ending with `snapshot <file>`.
+            igv_version (str, optional): Identifier of the IGV build and container image.
+            prefs (dict, optional): IGV preferences the snapshots are rendered with, e.g. the
+                window bounds and alignment visibility range of an `igver.profile.IGVProfile`
+                (default: None, the preferences of the IGV installation).
+
+        Returns:
+            list of str: Hex digests, in the order of `blocks`.
+        """
+        session = [igv_version]
+        if prefs is not None:
+            session.append(sorted([str(key), str(value)] for key, value in prefs.items()))
+        for line in header:
+            name, _, arg = line.partition(' ')
+            if name == 'snapshotDirectory':
+                continue
+            if name == 'load':
+                session.append(['load', _file_identity(arg)])
+            else:
+                session.append(line)
+        session_digest = hashlib.sha256(json.dumps(session).encode()).hexdigest()
+
+        keys = []
+        for block in blocks:
+            snapshot_file = block[-1].split(maxsplit=1)[1]
+            content = [session_digest] + block[:-1] + [os.path.splitext(snapshot_file)[1]]
+            keys.append(hashlib.sha256('\n'.join(content).encode()).hexdigest())
+        return keys
+
+    def _entry(self, key, path):
+        return os.path.join(self.cache_dir, key[:2], key + os.path.splitext(path)[1])
+
+    def fetch(self, key, path):
+        """
+        Copy the cached snapshot for `key` to `path`; return whether it was a hit.
+        """
+        entry = self._entry(key, path)
+        try:
+            shutil.copyfile(entry, path)
+        except OSError:
+            return False
+        os.utime(entry)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Snapshot cache hit {path}")
+        return True
+
+    def store(self, key, path):
+        """
+        Add a rendered snapshot to the cache.
+        """
+        entry = self._entry(key, path)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp_path = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, entry)
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in `max_bytes`.
+        """
+        with self._lock:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if self.debug:
+                    print(f"[LOG:{time.ctime()}] Evicted {path} from snapshot cache")
+
+
+def _file_identity(path):
+    """
+    (absolute path, size, mtime) of a track and of any index file next to it
+    """
+    identity = []
+    candidates = [path] + [path + suffix for suffix in INDEX_SUFFIXES] + \
+        [os.path.splitext(path)[0] + suffix for suffix in INDEX_SUFFIXES]
+    for candidate in candidates:
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            continue
+        identity.append([os.path.abspath(candidate), stat.st_size, stat.st_mtime_ns])
+    return identity or [path]  # e.g. a URL
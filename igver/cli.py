@@ -7,7 +7,11 @@ import yaml
 
 # Add package root to sys.path when running as a script
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from igver import load_screenshots
+from igver import load_screenshots, iter_screenshots, get_display_manager
+from igver.archive import HashedDirectories, ShardArchive
+from igver.cache import SnapshotCache
+from igver.image import resolve_image
+from igver.preflight import check_tracks
 
 try:
     from importlib import resources  # Python 3.9+
@@ -80,10 +84,180 @@ def parse_args():
         default="png",
         help="Output image format (default: png). Note: pdf requires svg conversion."
     )
+    parser.add_argument(
+        "--archive",
+        choices=["zip", "tar", "hashed"],
+        help="Pack screenshots as they are rendered into shard archives (zip or tar, indexed in igver_index.tsv) "
+             "or hashed subdirectories of the output directory, instead of leaving one file per region in it; "
+             "cannot be combined with --resume"
+    )
+    parser.add_argument(
+        "--archive-shard-size",
+        type=int,
+        default=10000,
+        help="Screenshots per zip/tar shard (default: 10000)"
+    )
+    parser.add_argument(
+        "--report",
+        help="Also write all screenshots into this multi-page PDF, one page per region in region order, "
+             "paged as they are rendered"
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        help="Processes converting SVG to PDF while IGV renders, for -f pdf (default: one per CPU)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of IGV processes to run in parallel; regions are split across them (default: 1)"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=1,
+        help="Extra IGV runs for screenshots that are still missing; only those regions are re-rendered (default: 1)"
+    )
+    parser.add_argument(
+        "--xvfb-displays",
+        type=int,
+        default=0,
+        help="Start this many shared Xvfb servers and reuse them across IGV runs instead of one xvfb-run per run (default: 0)"
+    )
+    parser.add_argument(
+        "--singularity-instance",
+        action="store_true",
+        help="Start IGV's container once as a `singularity instance` and exec into it instead of `singularity run` per IGV run"
+    )
+    parser.add_argument(
+        "--sif-cache",
+        help="Directory of the digest-addressed SIF cache for docker:// images (default: $IGVER_SIF_CACHE, off when unset)"
+    )
+    parser.add_argument(
+        "--max-snapshots-per-batch",
+        type=int,
+        help="Render at most this many screenshots per IGV process before starting a fresh one (default: no limit)"
+    )
+    parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        help="Restart IGV between screenshots once its resident memory exceeds this many MB (default: no limit)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Stream the regions (plain, .gz or bgzip BED) and render them this many at a time with constant memory; "
+             "cannot be combined with -j, --resume or --snapshot-cache"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only render the screenshots an earlier, interrupted run into the same output directory did not finish"
+    )
+    parser.add_argument(
+        "--snapshot-cache",
+        help="Directory of the content-addressed cache of rendered screenshots (default: $IGVER_SNAPSHOT_CACHE, off when unset)"
+    )
+    parser.add_argument(
+        "--snapshot-cache-size",
+        type=float,
+        default=10,
+        help="Size cap of the snapshot cache in GB; least recently used screenshots are evicted first (default: 10)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Kill an IGV process (with Xvfb and the JVM) still running after this many seconds (default: no limit)"
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=float,
+        help="Kill an IGV process that has not written a new screenshot for this many seconds; "
+             "must cover IGV startup (default: no limit)"
+    )
+    parser.add_argument(
+        "--java-heap-mb",
+        type=int,
+        help="Java heap (-Xmx) of IGV in MB (default: igv.sh's 8 GB)"
+    )
+    parser.add_argument(
+        "--max-java-heap-mb",
+        type=int,
+        help="Rerun IGV with twice the heap, up to this many MB, when it runs out of memory (default: no escalation)"
+    )
+    parser.add_argument(
+        "--isolate-failures",
+        action="store_true",
+        help="Bisect batches IGV keeps failing on, quarantine the regions that crash it in igver_quarantine.tsv "
+             "and render all others instead of failing the run"
+    )
+    parser.add_argument(
+        "--shared-igv-directory",
+        action="store_true",
+        help="Run every IGV process with the installation's own preferences directory instead of a private one "
+             "with headless preferences per process"
+    )
+    parser.add_argument(
+        "--skip-index-check",
+        action="store_true",
+        help="Only check that the input tracks exist, not that their indexes exist and are newer than the data"
+    )
+    parser.add_argument(
+        "--validate-regions",
+        choices=["error", "drop", "off"],
+        default="error",
+        help="Check regions against the genome's chromosome sizes before starting IGV, when a local .fai/alias table "
+             "is available: fail on bad regions, drop them, or skip the check (default: error)"
+    )
     args = parser.parse_args()
+    if args.chunk_size:
+        combined = [option for option, used in (("-j", args.jobs != 1), ("--resume", args.resume),
+                                                ("--snapshot-cache", args.snapshot_cache)) if used]
+        if combined:
+            parser.error(f"--chunk-size cannot be combined with {', '.join(combined)}: chunks are rendered one "
+                         f"at a time by a single IGV process, without the journal or the snapshot cache")
+    if args.archive and args.resume:
+        # The journal only trusts screenshots still on disk, and archived ones are removed from it
+        parser.error("--archive cannot be combined with --resume: archived screenshots are removed from the "
+                     "output directory, so a resumed run would render them again and archive them twice")
     return args
 
 
+def parse_image_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="igver image",
+        description="Manage the local SIF cache of the igver container image"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prefetch = subparsers.add_parser(
+        "prefetch", help="Resolve the image to its digest and store it as a SIF in the cache"
+    )
+    prefetch.add_argument(
+        "--image",
+        default=os.environ.get("IGVER_IMAGE", "docker://sahuno/igver:latest"),
+        help="Image URI to cache (default: $IGVER_IMAGE or docker://sahuno/igver:latest)"
+    )
+    prefetch.add_argument(
+        "--cache-dir",
+        help="SIF cache directory, e.g. on shared storage (default: $IGVER_SIF_CACHE or ~/.cache/igver/sif)"
+    )
+    prefetch.add_argument(
+        "--debug", action="store_true", help="Enable debug logging"
+    )
+    return parser.parse_args(argv)
+
+
+def image_main(argv):
+    args = parse_image_args(argv)
+    try:
+        sif_path = resolve_image(args.image, cache_dir=args.cache_dir, debug=args.debug)
+    except Exception as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"[SUCCESS] {args.image} cached at: {sif_path}")
+
+
 def _parse_input_file(input_file):
     """
     Parse track paths from a text file (one path per line).
@@ -127,6 +301,10 @@ def _load_genome_mappings():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "image":
+        image_main(sys.argv[2:])
+        return
+
     os.environ["DISPLAY"] = ""
     args = parse_args()
 
@@ -144,12 +322,13 @@ def main():
         # Input is direct paths
         input_paths = args.input
 
-    # Ensure paths exist
+    # Ensure paths and their indexes exist, stat'ing all of them concurrently
     os.makedirs(args.output, exist_ok=True)
-    for path in input_paths:
-        if not os.path.exists(path):
-            print(f'[ERROR] {path} does not exist.', file=sys.stderr)
-            sys.exit(1)
+    problems = check_tracks(input_paths, check_indexes=not args.skip_index_check)
+    if problems:
+        for problem in problems:
+            print(f'[ERROR] {problem}', file=sys.stderr)
+        sys.exit(1)
 
     genome_map = _load_genome_mappings()
     genome = genome_map.get(args.genome, args.genome) # convert e.g. GRCh38 -> hg38
@@ -170,14 +349,64 @@ def main():
             "use_singularity": not args.no_singularity,
             "singularity_image": args.singularity_image,
             "singularity_args": args.singularity_args,
+            "workers": args.jobs,
+            "max_retries": args.max_retries,
+            "singularity_instance": args.singularity_instance,
+            "resume": args.resume,
+            "max_snapshots_per_batch": args.max_snapshots_per_batch,
+            "max_rss_mb": args.max_rss_mb,
+            "validate_regions": None if args.validate_regions == "off" else args.validate_regions,
+            "isolate_failures": args.isolate_failures,
+            "timeout": args.timeout,
+            "stall_timeout": args.stall_timeout,
+            "java_heap_mb": args.java_heap_mb,
+            "max_java_heap_mb": args.max_java_heap_mb,
+            "igv_profile": not args.shared_igv_directory,
+            "pdf_workers": args.pdf_workers,
+            "report": args.report,
+            "return_type": "path",  # screenshots stay on disk; nothing is loaded into figures
         }
 
+        sink = None
+        if args.archive == "hashed":
+            sink = HashedDirectories(args.output, debug=args.debug)
+        elif args.archive:
+            sink = ShardArchive(args.output, args.archive, shard_size=args.archive_shard_size, debug=args.debug)
+        kwargs["sink"] = sink
+
+        if args.xvfb_displays > 0:
+            kwargs["display_manager"] = get_display_manager(
+                args.xvfb_displays, use_singularity=kwargs["use_singularity"],
+                singularity_image=args.singularity_image, debug=args.debug)
+
+        if args.sif_cache:
+            kwargs["sif_cache"] = args.sif_cache
+
+        if args.snapshot_cache:
+            kwargs["snapshot_cache"] = SnapshotCache(args.snapshot_cache, max_bytes=int(args.snapshot_cache_size * 1024 ** 3),
+                                                     debug=args.debug)
+
         # Conditionally add `igv_config` if it's provided
         if args.igv_config:
             kwargs["igv_config"] = args.igv_config
 
         # Call the function with unpacked arguments
-        _ = load_screenshots(**kwargs)
+        try:
+            if args.chunk_size:
+                # Screenshots are written chunk by chunk and never held in memory
+                for key in ("remove_png", "workers", "resume", "return_type"):
+                    kwargs.pop(key, None)
+                for _, path in iter_screenshots(chunk_size=args.chunk_size, **kwargs):
+                    if sink is not None:
+                        os.remove(path)  # archived
+            else:
+                paths = load_screenshots(**kwargs)
+                if sink is not None:
+                    for path in paths:
+                        os.remove(path)  # archived
+        finally:
+            if sink is not None:
+                sink.finish()
 
         print(f"[SUCCESS] Screenshots saved in: {args.output}")
     except Exception as e:
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _svg_to_pdf(svg_path, pdf_path, dpi):
+    import cairosvg
+    cairosvg.svg2pdf(url=svg_path, write_to=pdf_path, dpi=dpi)
+    return pdf_path
+
+
+class PDFConverter:
+    """
+    Converts SVG screenshots to PDF in a pool of processes while IGV keeps rendering.
+
+    `submit` (also available by calling the converter, so it can be passed as `on_snapshot`)
+    starts converting an SVG as soon as IGV has written it; `convert` submits whatever has not
+    been submitted yet and waits for all conversions. cairosvg is CPU-bound and holds the GIL,
+    hence processes rather than threads. Workers are spawned, not forked, since the converter
+    is fed from threads that watch IGV.
+    """
+
+    def __init__(self, workers=None, dpi=300, debug=False):
+        """
+        Parameters:
+            workers (int, optional): Number of conversion processes (default: None, one per CPU).
+            dpi (int, optional): DPI passed to cairosvg (default: 300).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.debug = debug
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, svg_path):
+        """
+        Start converting `svg_path` to a PDF next to it, unless it is already being converted.
+        """
+        with self._lock:
+            if svg_path in self._futures:
+                return self._futures[svg_path]
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            pdf_path = os.path.splitext(svg_path)[0] + '.pdf'
+            future = self._executor.submit(_svg_to_pdf, svg_path, pdf_path, self.dpi)
+            self._futures[svg_path] = future
+            return future
+
+    __call__ = submit
+
+    def convert(self, svg_paths):
+        """
+        Convert `svg_paths` and wait for them.
+
+        Returns:
+            list of str: PDF paths, in the order of `svg_paths`.
+
+        Raises:
+            RuntimeError: If any file failed to convert, listing each failure once all are done.
+        """
+        futures = [self.submit(svg_path) for svg_path in svg_paths]
+        pdf_paths, failures = [], []
+        for svg_path, future in zip(svg_paths, futures):
+            try:
+                pdf_paths.append(future.result())
+            except Exception as e:
+                failures.append(f'  {svg_path}: {type(e).__name__}: {e}')
+                continue
+            if self.debug:
+                print(f"[LOG:{time.ctime()}] Converted {svg_path} to {pdf_paths[-1]}")
+        if failures:
+            raise RuntimeError(f"[ERROR:{time.ctime()}] Failed to convert {len(failures)} of {len(svg_paths)} "
+                               f"SVG files to PDF:\n" + '\n'.join(failures))
+        return pdf_paths
+
+    def close(self):
+        """
+        Shut the worker processes down, cancelling conversions that have not started.
+        """
+        with self._lock:
+            if self._executor is not None:
+                # Cancelled by hand: shutdown(cancel_futures=True) needs Python 3.9
+                for future in self._futures.values():
+                    future.cancel()
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
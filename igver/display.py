@@ -0,0 +1,154 @@
+import atexit
+import os
+import select
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from .igver import is_running_in_container
+
+
+class XvfbDisplayManager:
+    """
+    Pool of long-lived Xvfb servers shared by IGV runs.
+
+    Each server picks a free display number itself (`Xvfb -displayfd`), so concurrent
+    igver processes on one node never race for the same display. `acquire` hands out
+    the least busy display; several IGV processes may share one X server.
+
+    Example:
+        with igver.XvfbDisplayManager(n_displays=4) as displays:
+            igver.load_screenshots(paths, regions, workers=4, display_manager=displays)
+    """
+
+    def __init__(self, n_displays=1, screen='1920x1080x24', xvfb_cmd='Xvfb', startup_timeout=30, debug=False):
+        """
+        Parameters:
+            n_displays (int, optional): Number of Xvfb servers to run (default: 1).
+            screen (str, optional): Screen geometry and depth (default: "1920x1080x24").
+            xvfb_cmd (str, optional): Command that starts Xvfb, e.g. wrapped with
+                `singularity exec <image>` (default: "Xvfb").
+            startup_timeout (float, optional): Seconds to wait for a server to report its display (default: 30).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.n_displays = n_displays
+        self.screen = screen
+        self.xvfb_cmd = xvfb_cmd
+        self.startup_timeout = startup_timeout
+        self.debug = debug
+        self._servers = []  # [process, display, n_users]
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start Xvfb servers until `n_displays` are running.
+        """
+        with self._lock:
+            while len(self._servers) < self.n_displays:
+                self._servers.append(list(self._start_server()) + [0])
+        return self
+
+    def _start_server(self):
+        read_fd, write_fd = os.pipe()
+        cmd = shlex.split(self.xvfb_cmd) + ['-displayfd', str(write_fd), '-screen', '0', self.screen,
+                                            '-nolisten', 'tcp']
+        try:
+            process = subprocess.Popen(cmd, pass_fds=(write_fd,), stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, start_new_session=True)
+        finally:
+            os.close(write_fd)
+        try:
+            ready, _, _ = select.select([read_fd], [], [], self.startup_timeout)
+            number = os.read(read_fd, 64).decode().strip() if ready else ''
+        finally:
+            os.close(read_fd)
+        if not number:
+            _kill(process)
+            raise RuntimeError(f"[ERROR:{time.ctime()}] Xvfb did not report a display within {self.startup_timeout}s: {' '.join(cmd)}")
+        display = f':{number}'
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Started Xvfb on display {display} (pid {process.pid})")
+        return process, display
+
+    @contextmanager
+    def acquire(self):
+        """
+        Context manager yielding a display string (e.g. ":99") for one IGV run.
+        """
+        self.start()
+        with self._lock:
+            server = min(self._servers, key=lambda s: s[2])
+            if server[0].poll() is not None:  # restart a server that died
+                if self.debug:
+                    print(f"[LOG:{time.ctime()}] Xvfb on display {server[1]} exited; restarting")
+                server[0], server[1] = self._start_server()
+            server[2] += 1
+        try:
+            yield server[1]
+        finally:
+            with self._lock:
+                server[2] -= 1
+
+    @property
+    def displays(self):
+        return [server[1] for server in self._servers]
+
+    def stop(self):
+        """
+        Terminate all Xvfb servers.
+        """
+        with self._lock:
+            for process, display, _ in self._servers:
+                _kill(process)
+                if self.debug:
+                    print(f"[LOG:{time.ctime()}] Stopped Xvfb on display {display}")
+            self._servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def _kill(process):
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=5)
+    except ProcessLookupError:
+        process.wait()
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+_shared_manager = None
+_shared_lock = threading.Lock()
+
+
+def get_display_manager(n_displays=1, use_singularity=None,
+                        singularity_image='docker://sahuno/igver:latest', debug=False):
+    """
+    Return the process-wide display manager, starting or growing it to `n_displays` servers.
+
+    The servers are stopped when the interpreter exits. When `use_singularity` is on
+    (auto-detected by default), Xvfb is started from the igver image.
+    """
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            if use_singularity is None:
+                use_singularity = not is_running_in_container()
+            xvfb_cmd = 'Xvfb'
+            if use_singularity:
+                singularity_image = os.environ.get('IGVER_IMAGE', singularity_image)
+                xvfb_cmd = f'singularity exec {singularity_image} Xvfb'
+            _shared_manager = XvfbDisplayManager(n_displays, xvfb_cmd=xvfb_cmd, debug=debug)
+            atexit.register(_shared_manager.stop)
+        _shared_manager.n_displays = max(_shared_manager.n_displays, n_displays)
+        return _shared_manager.start()
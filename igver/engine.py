@@ -0,0 +1,208 @@
+import os
+import signal
+import socket
+import subprocess
+import time
+
+from .igver import is_running_in_container, _igv_command, _remove_previous_output
+
+
+class IGVEngine:
+    """
+    Long-lived IGV process driven over its batch command port.
+
+    IGV is started once (JVM start, genome load) and batch commands such as `goto` and
+    `snapshot` are streamed to it over a socket. When consecutive batches use the same
+    genome and tracks, the `new`/`genome`/`load` commands are skipped so that tracks
+    and indexes stay loaded between calls.
+
+    Example:
+        with igver.IGVEngine(igv_dir="/opt/IGV_2.19.5") as engine:
+            figures = igver.load_screenshots(paths, regions, engine=engine)
+    """
+
+    def __init__(self, igv_dir="/opt/IGV_2.19.5", port=60151, host="127.0.0.1",
+                 singularity_image='docker://sahuno/igver:latest', singularity_args='-B /home',
+                 use_singularity=None, startup_timeout=180, command_timeout=600, debug=False):
+        """
+        Parameters:
+            igv_dir (str, optional): Directory containing IGV installation (default: "/opt/IGV_2.19.5").
+            port (int, optional): IGV batch command port (default: 60151).
+            host (str, optional): Host IGV listens on (default: "127.0.0.1").
+            singularity_image (str, optional): singularity image path (default: "docker://sahuno/igver:latest").
+            singularity_args (str, optional): singularity arguments string; must bind every
+                directory the engine will read tracks from or write snapshots to (default: "-B /home").
+            use_singularity (bool, optional): Whether to wrap IGV with singularity (default: auto-detect).
+            startup_timeout (float, optional): Seconds to wait for the port to accept connections (default: 180).
+            command_timeout (float, optional): Seconds to wait for the reply to a single command (default: 600).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.igv_dir = igv_dir
+        self.port = port
+        self.host = host
+        self.singularity_image = os.environ.get('IGVER_IMAGE', singularity_image)
+        self.singularity_args = singularity_args
+        self.use_singularity = use_singularity
+        self.startup_timeout = startup_timeout
+        self.command_timeout = command_timeout
+        self.debug = debug
+        self.process = None
+        self._socket = None
+        self._reader = None
+        self._session = None  # (genome, tracks) currently loaded in IGV
+
+    @classmethod
+    def attach(cls, port=60151, host="127.0.0.1", **kwargs):
+        """
+        Connect to an IGV that is already listening on its batch port (not started by igver).
+        """
+        engine = cls(port=port, host=host, **kwargs)
+        engine.connect()
+        return engine
+
+    def start(self):
+        """
+        Start IGV listening on the batch port and wait until it accepts connections.
+        """
+        if self._socket is not None or (self.process is not None and self.process.poll() is None):
+            return self
+        use_singularity = self.use_singularity
+        if use_singularity is None:
+            use_singularity = not is_running_in_container()
+        cmd = _igv_command(f'--port {self.port}', self.igv_dir, self.singularity_image,
+                           self.singularity_args, use_singularity, debug=self.debug)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Starting IGV engine:\n{cmd}")
+        self.process = subprocess.Popen(cmd, shell=True, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL, start_new_session=True)
+        self.connect()
+        return self
+
+    def connect(self):
+        """
+        Open the command socket, retrying until `startup_timeout` expires.
+        """
+        if self._socket is not None:
+            return
+        deadline = time.time() + self.startup_timeout
+        while True:
+            if self.process is not None and self.process.poll() is not None:
+                raise RuntimeError(f"[ERROR:{time.ctime()}] IGV engine exited with code {self.process.returncode} during startup.")
+            try:
+                self._socket = socket.create_connection((self.host, self.port), timeout=1)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError(f"[ERROR:{time.ctime()}] IGV batch port {self.host}:{self.port} did not open within {self.startup_timeout}s.")
+                time.sleep(0.5)
+        self._socket.settimeout(self.command_timeout)
+        self._reader = self._socket.makefile('r', encoding='utf-8')
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Connected to IGV engine at {self.host}:{self.port}")
+
+    def execute(self, command):
+        """
+        Send one batch command and return IGV's reply.
+
+        Raises:
+            RuntimeError: If IGV replies with an error or closes the connection.
+        """
+        if self._socket is None:
+            self.start()
+        self._socket.sendall(f'{command}\n'.encode('utf-8'))
+        response = self._reader.readline()
+        if not response:
+            self.close()
+            raise RuntimeError(f"[ERROR:{time.ctime()}] IGV engine closed the connection on command: {command}")
+        response = response.strip()
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] {command} -> {response}")
+        if response.lower().startswith('error'):
+            raise RuntimeError(f"[ERROR:{time.ctime()}] IGV command failed: {command} ({response})")
+        return response
+
+    def run_batch(self, batch_script, png_paths, overwrite=False, debug=False):
+        """
+        Stream an IGV batch script to the engine and ensure all screenshots are created.
+
+        The trailing `exit` is never sent, and the `new`/`genome`/`load` header is skipped
+        when the genome and tracks match what the engine already has loaded.
+
+        Parameters:
+            batch_script (str): Path to the IGV batch script.
+            png_paths (list of str): Expected paths of the output screenshots.
+            overwrite (bool, optional): Whether to overwrite existing files (default: False).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+
+        Returns:
+            list of str: Paths to the generated files.
+        """
+        with open(batch_script, 'r') as f:
+            commands = [line.strip() for line in f if line.strip()]
+
+        header = []
+        for command in commands:
+            if command.split()[0] == 'goto':
+                break
+            header.append(command)
+        genome = next((c.split(maxsplit=1)[1] for c in header if c.startswith('genome ')), None)
+        tracks = tuple(c.split(maxsplit=1)[1] for c in header if c.startswith('load '))
+        session = (genome, tracks)
+        reuse_session = session == self._session
+
+        if overwrite:
+            _remove_previous_output(png_paths, debug)
+
+        for command in commands:
+            name = command.split()[0]
+            if name == 'exit':
+                continue
+            if reuse_session and name in ('new', 'genome', 'load'):
+                continue
+            self.execute(command)
+        self._session = session
+
+        missing = [png for png in png_paths if not os.path.exists(png)]
+        if missing:
+            raise RuntimeError(f"[ERROR:{time.ctime()}] IGV engine failed to generate {len(missing)} of {len(png_paths)} files.")
+
+        os.remove(batch_script)
+        if debug:
+            print(f"[LOG:{time.ctime()}] Removed batch script {batch_script}")
+        return png_paths
+
+    def close(self):
+        """
+        Close the command socket without stopping IGV.
+        """
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._session = None
+
+    def stop(self):
+        """
+        Ask IGV to exit and terminate the process group if it does not.
+        """
+        if self._socket is not None and self.process is not None:
+            try:
+                self._socket.sendall(b'exit\n')
+            except OSError:
+                pass
+        self.close()
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -1,8 +1,15 @@
+import collections
+import gzip
+import itertools
 import os
-import subprocess
+import shutil
+import tempfile
 import uuid
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
 try:
@@ -11,6 +18,28 @@ try:
 except ImportError:
     HAS_CAIROSVG = False
 
+from .convert import PDFConverter
+from .journal import ProgressJournal, Quarantine
+from .process import IGVProcess
+from .profile import IGVProfile
+from .preflight import default_genome_dirs, load_chrom_sizes, validate_table
+from .regions import RegionTable, is_columnar
+from .report import ReportWriter
+from .results import Screenshot, stack_screenshots
+
+# Batch commands that act on the current locus and therefore have to follow each `goto`
+PER_LOCUS_COMMANDS = ('sort', 'region', 'scrolltotop')
+# Number of region file lines parsed into one RegionTable at a time
+REGION_CHUNK_SIZE = 65536
+# Values of `load_screenshots(return_type=...)`
+RETURN_TYPES = ('figure', 'lazy', 'path', 'pil', 'array', 'memmap')
+# Return types that decode the screenshots, which only works for PNG output
+DECODED_RETURN_TYPES = ('pil', 'array', 'memmap')
+# Name prefix of the file the screenshots are stacked into with `return_type='memmap'`, next to the screenshots
+MEMMAP_PREFIX = 'igver_screenshots-'
+# Java heap igv.sh starts IGV with (-Xmx8g); the starting point of heap escalation after OOM failures
+DEFAULT_JAVA_HEAP_MB = 8192
+
 
 def is_running_in_container():
     """Detect if running inside a container (Docker or Singularity)"""
@@ -41,10 +70,30 @@ def is_running_in_container():
 
 
 def _get_figures(png_paths, remove_png, dpi, debug):
-    figures = []
+    return _wrap_figures(_decode_pngs(png_paths, remove_png, debug), dpi)
+
+
+def _decode_pngs(png_paths, remove_png, debug):
+    """Decode PNG screenshots into arrays, removing the files if requested"""
+    images = []
     for png_path in png_paths:
-        image = Image.open(png_path)
-        width, height = image.size  # Get original image dimensions
+        with Image.open(png_path) as image:
+            images.append(np.asarray(image))
+
+        # Remove the temp PNG if requested
+        if remove_png:
+            os.remove(png_path)
+            if debug:
+                print(f"[LOG:{time.ctime()}] Removed image {png_path}")
+
+    return images
+
+
+def _wrap_figures(images, dpi):
+    """Wrap decoded screenshots into Matplotlib figures at their original size"""
+    figures = []
+    for image in images:
+        height, width = image.shape[:2]  # Get original image dimensions
 
         # Convert to inches for Matplotlib
         figsize = (width / dpi, height / dpi)
@@ -55,50 +104,47 @@ def _get_figures(png_paths, remove_png, dpi, debug):
 
         figures.append(fig)
 
-        # Remove the temp PNG if requested
-        if remove_png:
-            os.remove(png_path)
-            if debug:
-                print(f"[LOG:{time.ctime()}] Removed image {png_path}")
-    
     return figures
 
 
-def _convert_svg_to_pdf(svg_paths, remove_svg, dpi, debug):
-    """Convert SVG files to PDF format"""
+def _convert_svg_to_pdf(svg_paths, remove_svg, dpi, debug, converter=None, workers=None):
+    """Convert SVG files to PDF format, in parallel processes; `converter` may already be converting some"""
     if not HAS_CAIROSVG:
         raise ImportError("cairosvg is required for PDF output. Install with: pip install cairosvg")
-    
-    pdf_paths = []
-    for svg_path in svg_paths:
-        pdf_path = svg_path.replace('.svg', '.pdf')
-        
-        # Convert SVG to PDF
-        cairosvg.svg2pdf(url=svg_path, write_to=pdf_path, dpi=dpi)
-        pdf_paths.append(pdf_path)
-        
-        if debug:
-            print(f"[LOG:{time.ctime()}] Converted {svg_path} to {pdf_path}")
-        
-        # Remove SVG if requested
-        if remove_svg:
+
+    if converter is None:
+        with PDFConverter(workers=workers, dpi=dpi, debug=debug) as converter:
+            pdf_paths = converter.convert(svg_paths)
+    else:
+        pdf_paths = converter.convert(svg_paths)
+
+    # Remove SVG if requested
+    if remove_svg:
+        for svg_path in svg_paths:
             os.remove(svg_path)
             if debug:
                 print(f"[LOG:{time.ctime()}] Removed SVG file {svg_path}")
-    
+
     return pdf_paths
 
 
 def load_screenshots(paths, regions, output_dir='/tmp', genome="hg19", igv_dir="/opt/IGV_2.19.5", 
                      overwrite=True, remove_png=True, dpi=300,
                      singularity_image='docker://sahuno/igver:latest', singularity_args='-B /home',
-                     debug=False, output_format='png', use_singularity=None, **kwargs):
+                     debug=False, output_format='png', use_singularity=None, engine=None, workers=1,
+                     max_retries=1, display_manager=None, singularity_instance=False, sif_cache=None,
+                     snapshot_cache=None, resume=False, max_snapshots_per_batch=None, max_rss_mb=None,
+                     validate_regions='error', isolate_failures=False, timeout=None, stall_timeout=None,
+                     java_heap_mb=None, max_java_heap_mb=None, igv_profile=True, return_type='figure',
+                     pdf_workers=None, report=None, sink=None, memmap_path=None, **kwargs):
     """
     Generates IGV screenshots and loads them into a Matplotlib figure.
 
     Parameters:
         paths (list of str): Paths to input files (BAM, BEDPE, VCF, bigWig, etc).
-        regions (list of str): List of genomic regions in 'chr:start-end' format.
+        regions (list of str, pandas.DataFrame or numpy structured array): Genomic regions in
+            'chr:start-end' format or region files, (chrom, start, end[, name]) tuples, or a
+            table with chrom/start/end(/name) columns that is formatted without a temporary BED.
         output_dir (str, optional): Directory for output screenshots (default: "/tmp").
         genome (str, optional): Genome version (default: "hg19").
         igv_dir (str, optional): Directory containing IGV installation (default: "/opt/IGV_2.19.5").
@@ -109,47 +155,222 @@ def load_screenshots(paths, regions, output_dir='/tmp', genome="hg19", igv_dir="
         singularity_args (str, optional): singularity arguments string (default: "-B /home").
         debug (bool, optional): Whether to show logs for debugging (default: False).
         output_format (str, optional): Output image format - 'png', 'svg', or 'pdf' (default: 'png').
+        engine (igver.IGVEngine, optional): Running IGV engine to stream the batch to instead of
+            starting a new IGV process (default: None).
+        workers (int, optional): Number of IGV processes to run concurrently; regions are split
+            into one batch script per worker (default: 1).
+        max_retries (int, optional): Number of extra IGV runs for missing screenshots (default: 1).
+        display_manager (igver.XvfbDisplayManager, optional): Shared Xvfb servers reused across
+            calls and workers instead of one `xvfb-run` per IGV run (default: None).
+        singularity_instance (bool or igver.SingularityInstance, optional): Run IGV inside a
+            persistent `singularity instance` that is reused for the rest of the session;
+            True starts (or reuses) one with the computed bind paths (default: False).
+        sif_cache (str or bool, optional): Directory of the digest-addressed SIF cache that
+            docker:// images are resolved into before running; False disables it
+            (default: $IGVER_SIF_CACHE, off when unset).
+        snapshot_cache (str or igver.SnapshotCache, optional): Directory of the content-addressed
+            snapshot cache; screenshots found there are copied instead of rendered, and IGV is
+            not started at all when every screenshot is a hit; False disables it
+            (default: $IGVER_SNAPSHOT_CACHE, off when unset).
+        resume (bool, optional): Only render the screenshots not recorded as finished in the
+            progress journal of `output_dir` by an earlier, possibly interrupted, run (default: False).
+        max_snapshots_per_batch (int, optional): Render at most this many screenshots per IGV
+            process, so memory stays bounded on very large region sets (default: None).
+        max_rss_mb (float, optional): Restart IGV between screenshots once its resident memory
+            exceeds this many MB (default: None). Both are ignored when `engine` is given.
+        validate_regions (str, optional): Check every region against the chromosome sizes of
+            `genome` before IGV starts, when a local `.fai`/chrom sizes table is found next to the
+            genome definition: 'error' raises a ValueError listing unknown contigs and
+            out-of-range coordinates, 'drop' renders only the valid regions, None skips the
+            check (default: 'error').
+        isolate_failures (bool, optional): Bisect batches IGV keeps failing on to find the
+            regions that crash it, quarantine those (see `run_igv`) and return the screenshots
+            of all other regions (default: False). Ignored when `engine` is given.
+        timeout, stall_timeout, java_heap_mb, max_java_heap_mb (optional): Wall-clock and
+            no-progress limits per IGV process and the Java heap and its out-of-memory escalation
+            limit, as for `run_igv` (default: None). Ignored when `engine` is given.
+        igv_profile (bool or dict, optional): Run each IGV process with its own headless
+            preferences directory, as for `run_igv` (default: True). Ignored when `engine` is given.
+        return_type (str, optional): What each screenshot is returned as (default: 'figure'):
+            - 'figure': every PNG loaded into a Matplotlib figure up front (SVG and PDF
+              screenshots are returned as paths).
+            - 'lazy': `igver.Screenshot` objects holding the path and region of each screenshot,
+              decoded only when their `image()`, `array()` or `figure()` is called, so memory
+              does not grow with the number of regions.
+            - 'path': screenshot paths.
+            - 'pil': decoded PIL images.
+            - 'array': one RGB uint8 array of shape (n, height, width, 3); smaller screenshots
+              are padded with white.
+            - 'memmap': the same array as a memory-mapped `.npy` file (`memmap_path`),
+              filled one screenshot at a time; its path is the memmap's `filename`.
+            'pil', 'array' and 'memmap' need PNG output. 'lazy' and 'path' keep the screenshot
+            files; `remove_png` is ignored for them.
+        pdf_workers (int, optional): Number of processes converting SVG to PDF for
+            `output_format='pdf'`; each SVG is converted as soon as IGV has written it, while IGV
+            keeps rendering (default: None, one per CPU).
+        report (str or callable, optional): Also write the screenshots into a multi-page PDF at
+            this path, one page per region in region order, each page written as soon as its
+            screenshot (and those before it) are rendered; a function of an `igver.Screenshot`
+            returning a report path splits the pages into several reports, e.g. one per sample
+            (default: None). See `igver.report.ReportWriter`.
+        sink (callable, optional): Called with each finished screenshot path as soon as it is
+            written (for PDF output, once converted), e.g. an `igver.archive.ShardArchive` or
+            `igver.archive.HashedDirectories` that packs the screenshots into shard archives or
+            hashed subdirectories. The sink is not closed, so it can be shared across calls;
+            call its `finish()` when done (default: None).
+        memmap_path (str, optional): `.npy` file of `return_type='memmap'` (default: None, a new
+            `igver_screenshots-*.npy` in `output_dir`, so calls do not overwrite each other's arrays).
         **kwargs (optional): *kwargs* such as tag, max_panel_height, overlap_display, igv_config for create_batch_script
 
     Returns:
-        list of matplotlib.figure.Figure: list of figures containing the IGV screenshots.
+        list of matplotlib.figure.Figure: list of figures containing the IGV screenshots
+            (see `return_type` for the others).
     """
     from .igver import create_batch_script, run_igv  # Import helper functions
+    _check_return_type(return_type, output_format)
 
     # Create batch script and expected PNG paths
+    output_dir, tmpdir = _resolve_output_dir(output_dir, debug)
+    singularity_args = _singularity_bind_args(paths, output_dir, tmpdir, singularity_args)
+    if engine is not None:
+        igv_version = _igv_version_id(engine.igv_dir, engine.use_singularity, engine.singularity_image)
+    else:
+        singularity_image = _resolve_singularity_image(singularity_image, use_singularity, sif_cache, debug)
+        igv_version = _igv_version_id(igv_dir, use_singularity, singularity_image)
+    kwargs.setdefault('genome_dirs', default_genome_dirs(engine.igv_dir if engine is not None else igv_dir))
+    snapshot_cache = _resolve_snapshot_cache(snapshot_cache, debug)
+    journal = ProgressJournal(output_dir, debug)
+    journal.start(resume)
+    # Pass output_format to create_batch_script
+    n_scripts = 1 if engine is not None else workers
+    igv_prefs = None if engine is not None else _igv_profile_prefs(igv_profile)
+    batches, output_paths, loci, to_store = _plan_pending_batches(
+        paths, regions, output_dir, genome, n_scripts=n_scripts, snapshot_cache=snapshot_cache,
+        igv_version=igv_version, igv_prefs=igv_prefs, journal=journal, resume=resume,
+        output_format=output_format, validate_regions=validate_regions, **kwargs)
+
+    # Convert SVGs to PDF in parallel and page the report as IGV writes the screenshots
+    converter = PDFConverter(pdf_workers, dpi=dpi, debug=debug) if output_format == 'pdf' else None
+    report_writer = ReportWriter(report, output_paths, loci, dpi, debug) if report is not None else None
+    sinks = [callback for callback in (converter, report_writer) if callback is not None]
+    if sink is not None and output_format != 'pdf':
+        sinks.append(sink)
+    rendered = {png for _, png_paths in batches for png in png_paths}
+    for path in output_paths:
+        if path not in rendered and os.path.exists(path):  # cached or resumed
+            for callback in sinks:
+                callback(path)
+
+    def on_snapshot(path):
+        journal.record(path)
+        for callback in sinks:
+            callback(path)
+
+    # Run IGV to generate the screenshots
+    try:
+        if not batches:
+            pass  # every screenshot was served from the snapshot cache
+        elif engine is not None:
+            batch_script, png_paths = batches[0]
+            engine.run_batch(batch_script, png_paths, overwrite=overwrite, debug=debug)
+            for png in png_paths:
+                on_snapshot(png)
+        else:
+            singularity_instance = _resolve_singularity_instance(singularity_instance, use_singularity,
+                                                                 singularity_image, singularity_args, debug)
+            _run_batches(batches, workers, igv_dir=igv_dir, overwrite=overwrite,
+                singularity_image=singularity_image, singularity_args=singularity_args,
+                debug=debug, use_singularity=use_singularity, max_retries=max_retries,
+                display_manager=display_manager, singularity_instance=singularity_instance,
+                max_snapshots_per_batch=max_snapshots_per_batch, max_rss_mb=max_rss_mb,
+                isolate_failures=isolate_failures, timeout=timeout, stall_timeout=stall_timeout,
+                java_heap_mb=java_heap_mb, max_java_heap_mb=max_java_heap_mb, igv_profile=igv_profile,
+                on_snapshot=on_snapshot)
+        _store_snapshots(snapshot_cache, to_store)
+        if isolate_failures:
+            loci = [locus for path, locus in zip(output_paths, loci) if os.path.exists(path)]
+            output_paths = [path for path in output_paths if os.path.exists(path)]
+        if report_writer is not None:
+            report_writer.finish()
+
+        outputs = _load_outputs(output_paths, output_format, remove_png, dpi, debug, return_type, loci, converter,
+                                memmap_path)
+        if sink is not None and output_format == 'pdf':
+            for pdf_path in outputs:
+                sink(os.fspath(pdf_path))
+        return outputs
+    finally:
+        for callback in (converter, report_writer):
+            if callback is not None:
+                callback.close()
+
+
+def _check_return_type(return_type, output_format):
+    """
+    Reject unknown return types, decoded return types for SVG/PDF output and PDF output
+    without cairosvg before anything is rendered
+    """
+    assert return_type in RETURN_TYPES, f"Invalid return_type: {return_type}"
+    _check_pdf_support(output_format)
+    if return_type in DECODED_RETURN_TYPES and output_format != 'png':
+        raise ValueError(f"[ERROR] return_type '{return_type}' requires PNG output, not {output_format}")
+
+
+def _check_pdf_support(output_format):
+    if output_format == 'pdf' and not HAS_CAIROSVG:
+        raise ImportError("cairosvg is required for PDF output. Install with: pip install cairosvg")
+
+
+def _resolve_output_dir(output_dir, debug=False):
+    """
+    Return the output directory (TMPDIR when left at "/tmp") and the TMPDIR to bind
+    """
     tmpdir = os.getenv("TMPDIR", output_dir)  # Default to /tmp if TMPDIR is not set
     if output_dir == '/tmp':
         output_dir = os.environ['TMPDIR']
     if debug:
         print(f"[LOG:{time.ctime()}] TMPDIR is set to: {tmpdir}")
-    # Pass output_format to create_batch_script
-    batch_script, output_paths = create_batch_script(paths, regions, output_dir, genome, 
-                                                     output_format=output_format, **kwargs)
-    for path in paths:
-        abspath = os.path.abspath(path)
-        realpath = os.path.realpath(path)
-        bam_dir_abs = os.path.split(abspath)[0]
-        bam_dir_real = os.path.split(realpath)[0]
-        singularity_args += f' -B {bam_dir_abs}'
-        if bam_dir_abs != bam_dir_real:
-            singularity_args += f' -B {bam_dir_real}'
-    singularity_args += f' -B {os.path.realpath(output_dir)}'
-    singularity_args += f' -B {tmpdir}'
+    return output_dir, tmpdir
 
-    # Run IGV to generate the screenshots
-    singularity_image = os.environ.get('IGVER_IMAGE', singularity_image)
-    run_igv(batch_script, output_paths, igv_dir, overwrite, 
-        singularity_image=singularity_image, singularity_args=singularity_args, 
-        debug=debug, use_singularity=use_singularity)
 
+def _load_outputs(output_paths, output_format, remove_png, dpi, debug, return_type='figure', loci=None,
+                  converter=None, memmap_path=None):
+    """
+    Turn rendered screenshot paths into the value returned by `load_screenshots`
+    """
     # Check if screenshots were generated
     if not output_paths:
         raise RuntimeError("[ERROR] No screenshots generated.")
 
     # Handle different output formats
-    if output_format == 'pdf':
+    if return_type in ('lazy', 'path'):
+        if output_format == 'pdf':
+            output_paths = _convert_svg_to_pdf(output_paths, remove_png, dpi, debug, converter)
+        loci = loci if loci is not None else [None] * len(output_paths)
+        figures = [Screenshot(path, locus, dpi) for path, locus in zip(output_paths, loci)] \
+            if return_type == 'lazy' else output_paths
+    elif return_type in DECODED_RETURN_TYPES:
+        if return_type == 'pil':
+            figures = [Screenshot(path).image() for path in output_paths]
+        else:
+            if return_type != 'memmap':
+                memmap_path = None
+            elif memmap_path is None:
+                fd, memmap_path = tempfile.mkstemp(prefix=MEMMAP_PREFIX, suffix='.npy',
+                                                   dir=os.path.dirname(output_paths[0]))
+                os.close(fd)
+            figures = stack_screenshots(output_paths, memmap_path)
+            if debug and memmap_path:
+                print(f"[LOG:{time.ctime()}] Stacked {len(output_paths)} screenshots into {memmap_path}")
+        # Remove the temp PNGs if requested; the decoded screenshots do not need them
+        if remove_png:
+            for png_path in output_paths:
+                os.remove(png_path)
+                if debug:
+                    print(f"[LOG:{time.ctime()}] Removed image {png_path}")
+    elif output_format == 'pdf':
         # For PDF, we need to convert from SVG
-        figures = _convert_svg_to_pdf(output_paths, remove_png, dpi, debug)
+        figures = _convert_svg_to_pdf(output_paths, remove_png, dpi, debug, converter)
     elif output_format == 'svg':
         # For SVG, return the paths as figures are not needed
         figures = output_paths  # Return paths instead of matplotlib figures
@@ -166,147 +387,159 @@ def _parse_bed_file(bed_file, output_dir, overlap_display='squish', max_panel_he
     BED3: chrom, chromStart, chromEnd
     BED6: chrom, chromStart, chromEnd, name, score, strand
     """
-    png_paths = []
-    region_content = []
-    
-    with open(bed_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#') or line.startswith('track') or line.startswith('browser'):
-                continue
-                
-            fields = line.split('\t')
-            if len(fields) < 3:
-                continue
-                
-            chrom = fields[0]
-            start = fields[1]
-            end = fields[2]
-            
-            # Handle optional name field from BED6
-            region_name = ''
-            if len(fields) >= 4 and fields[3]:
-                region_name = fields[3]
-            
-            # Format region string
-            region = f"{chrom}:{start}-{end}"
-            region_tag = region.replace(':', '-')
-            
-            # Create filename with appropriate extension
-            ext = 'svg' if output_format in ['svg', 'pdf'] else output_format
-            if region_name:
-                png_fname = f"{region_tag}.{region_name}.{ext}"
-            elif tag:
-                png_fname = f"{region_tag}.{tag}.{ext}"
-            else:
-                png_fname = f"{region_tag}.{ext}"
-                
-            png_path = os.path.join(output_dir, png_fname)
-            png_paths.append(png_path)
-            
-            # Create batch content
-            region_content.append(f'goto {region}')
-            if overlap_display != 'expand':
-                region_content.append(overlap_display)
-            region_content.append(f'maxPanelHeight {max_panel_height}')
-            if additional_pref:
-                region_content.append(additional_pref)
-            region_content.append(f'snapshot {png_fname}')
-    
-    return png_paths, region_content
+    return _get_paths_and_regions([bed_file], output_dir=output_dir, overlap_display=overlap_display,
+                                  max_panel_height=max_panel_height, additional_pref=additional_pref, tag=tag,
+                                  output_format=output_format)
 
 
 def _parse_region_file(region_file, output_dir, overlap_display='squish', max_panel_height=200, additional_pref=None, tag=None, output_format='png'):
     """
     Parse region and tag from line (legacy text format)
     """
-    png_paths = []
-    region_content = []
-    for line in open(region_file):
-        out_tag = ''
-        sv_tag = ''
-        field = line.strip().split() # split by either ' ' or '\t'
-        region = []
-        region_tags = []
-        for item in field:
-            is_region = (item.count(':')==1 and item.count('-')==1)
-            if is_region:
-                region_tag = item.replace(':', '-')
-                region_tags.append(region_tag)
-                region.append(item)
-            else:
-                sv_tag = item
-        out_tag = '.'.join(region_tags)
-        region = ' '.join(region)
-        if sv_tag:
-            out_tag += f'.{sv_tag}' # e.g. ins, del, translocation, ...
-        ext = 'svg' if output_format in ['svg', 'pdf'] else output_format
-        png_fname = out_tag + f'.{ext}'
-        png_path = os.path.join(output_dir, png_fname)
-        png_paths.append(png_path)
-        
-        region_content.append(f'goto {region}')
-        if overlap_display != 'expand':
-            region_content.append(overlap_display)
-        region_content.append(f'maxPanelHeight {max_panel_height}')
-        if additional_pref:
-            region_content.append(additional_pref)
-        region_content.append(f'snapshot {png_fname}')
-
-    return png_paths, region_content
+    return _get_paths_and_regions([region_file], output_dir=output_dir, overlap_display=overlap_display,
+                                  max_panel_height=max_panel_height, additional_pref=additional_pref, tag=tag,
+                                  output_format=output_format)
 
 
 def _parse_region_string(region, output_dir, overlap_display='squish', max_panel_height=200, additional_pref=None, tag=None, output_format='png'):
     """
     Parse region and tag from cli argument
     """
-    region_content = []
-    region_tag = region.replace(':', '-').replace(' ', '.')
-    ext = 'svg' if output_format in ['svg', 'pdf'] else output_format
-    png_fname = f"{region_tag}.{ext}"
-    if tag:
-        png_fname = f"{region_tag}.{tag}.{ext}"
-    png_path = os.path.join(output_dir, png_fname)
-    
-    region_content.append(f'goto {region}')
+    return _get_paths_and_regions([region], output_dir=output_dir, overlap_display=overlap_display,
+                                  max_panel_height=max_panel_height, additional_pref=additional_pref, tag=tag,
+                                  output_format=output_format)
+
+
+def _display_commands(overlap_display='squish', max_panel_height=200, additional_pref=None):
+    """
+    Batch lines that follow each `goto`: display mode, panel height and igv_config preferences
+    """
+    commands = []
     if overlap_display != 'expand':
-        region_content.append(overlap_display)
-    region_content.append(f'maxPanelHeight {max_panel_height}')
+        commands.append(overlap_display)
+    commands.append(f'maxPanelHeight {max_panel_height}')
     if additional_pref:
-        region_content.append(additional_pref)
-    region_content.append(f'snapshot {png_fname}')
+        commands.append(additional_pref)
+    return commands
 
-    png_paths = [png_path]
 
-    return png_paths, region_content
+def _snapshot_ext(output_format='png'):
+    """
+    Extension of the files IGV writes: SVG for PDF output, which is converted afterwards
+    """
+    return 'svg' if output_format in ['svg', 'pdf'] else output_format
+
+
+def _iter_line_chunks(f, chunk_size=REGION_CHUNK_SIZE):
+    """
+    Read an open file in lists of at most `chunk_size` lines
+    """
+    chunk = list(itertools.islice(f, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(f, chunk_size))
+
+
+def _is_bed_file(path):
+    return path.endswith(('.bed', '.bed.gz', '.bed.bgz'))
+
+
+def _open_region_file(path):
+    """
+    Open a region file for line-by-line reading; gzip and bgzip (multi-member gzip) are decompressed on the fly
+    """
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rt')
+    return open(path, 'r')
 
 
 def create_batch_script(paths, regions, output_dir, genome='hg19', tag=None, max_panel_height=200,
-                        overlap_display='squish', igv_config=None, output_format='png'):
+                        overlap_display='squish', igv_config=None, output_format='png', optimize=True,
+                        validate_regions=None, genome_dirs=None):
     """
     Creates an IGV batch script to generate screenshots for the given BAM files and regions.
     
     Parameters:
         paths (list of str): Paths to BAM files.
-        regions (list of str): List of regions in 'chr:start-end' format.
+        regions (list of str, pandas.DataFrame or numpy structured array): Regions in 'chr:start-end'
+            format or region files, (chrom, start, end[, name]) tuples, or a chrom/start/end(/name) table.
         output_dir (str): Directory where screenshots will be saved.
         genome (str, optional): Genome version (default: 'hg19').
         tag (str, optional): Tag to suffix the PNG file name (default: None).
         max_panel_height (int, optional): Maximum panel height for IGV (default: 200).
         overlap_display (str, optional): Display mode for overlapping reads ('expand', 'collapse', 'squish', default: 'squish').
         igv_config (str, optional): Path to additional IGV preferences file (default: None).
+        optimize (bool, optional): Send the display mode, panel height and igv_config preferences
+            once instead of after every `goto`, and render the regions sorted by chromosome and
+            position; screenshot paths are still returned in region order (default: True).
+        validate_regions (str, optional): Check the regions against the chromosome sizes of
+            `genome` when a local size table is found: 'error' raises a ValueError listing the
+            invalid regions, 'drop' leaves them out (default: None, no check).
+        genome_dirs (list of str, optional): Directories with genome definitions and their cached
+            `.fai`/alias tables (default: `igver.preflight.default_genome_dirs()`).
 
     Returns:
         str: The path to the generated IGV batch script.
     """
+    batches = create_batch_scripts(paths, regions, output_dir, genome=genome, n_scripts=1, tag=tag,
+                                   max_panel_height=max_panel_height, overlap_display=overlap_display,
+                                   igv_config=igv_config, output_format=output_format, optimize=optimize,
+                                   validate_regions=validate_regions, genome_dirs=genome_dirs)
+    return batches[0]
+
+
+def create_batch_scripts(paths, regions, output_dir, genome='hg19', n_scripts=1, tag=None, max_panel_height=200,
+                         overlap_display='squish', igv_config=None, output_format='png', optimize=True,
+                         validate_regions=None, genome_dirs=None):
+    """
+    Creates up to `n_scripts` IGV batch scripts that split the regions into contiguous shards.
+
+    Every script loads the same genome and tracks. Shards are contiguous in rendering order
+    (genomic order when `optimize` is set); each returned path list is in region order.
+
+    Parameters:
+        n_scripts (int, optional): Maximum number of batch scripts to write (default: 1).
+        Other parameters are the same as for `create_batch_script`.
+
+    Returns:
+        list of (str, list of str): Batch script path and expected screenshot paths per shard.
+    """
+    header, blocks, order = _plan_batch(paths, regions, output_dir, genome=genome, tag=tag,
+                                        max_panel_height=max_panel_height, overlap_display=overlap_display,
+                                        igv_config=igv_config, output_format=output_format, optimize=optimize,
+                                        validate_regions=validate_regions, genome_dirs=genome_dirs)
+    return _write_batch_shards(output_dir, header, blocks, n_scripts, order)
+
+
+def _plan_batch(paths, regions, output_dir, genome='hg19', tag=None, max_panel_height=200,
+                overlap_display='squish', igv_config=None, output_format='png', optimize=True,
+                validate_regions=None, genome_dirs=None):
+    """
+    Plan the batch without writing it: header lines, the BatchBlocks of the screenshots (in
+    region order) and the order in which to render the blocks
+    """
+    header, region_tables, block_format = _stream_batch(paths, regions, output_dir, genome=genome, tag=tag,
+                                                        max_panel_height=max_panel_height,
+                                                        overlap_display=overlap_display, igv_config=igv_config,
+                                                        output_format=output_format, validate_regions=validate_regions,
+                                                        genome_dirs=genome_dirs)
+    return _plan_table(header, RegionTable.concat(list(region_tables)), optimize=optimize, **block_format)
+
+
+def _stream_batch(paths, regions, output_dir, genome='hg19', tag=None, max_panel_height=200,
+                  overlap_display='squish', igv_config=None, output_format='png', chunk_size=None,
+                  validate_regions=None, genome_dirs=None):
+    """
+    Batch header lines, a lazy iterator of RegionTables and the formatting arguments of their blocks
+    (including the chromosome sizes the tables are validated against)
+    """
     assert overlap_display in ['expand', 'collapse', 'squish'], f"Invalid overlap_display: {overlap_display}"
     
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    # Generate a unique batch file name
-    batch_filename = os.path.join(output_dir, f'{uuid.uuid4()}.batch')
-    
     # Read additional IGV preferences if provided
     additional_pref = ""
     if igv_config and os.path.exists(igv_config):
@@ -314,47 +547,280 @@ def create_batch_script(paths, regions, output_dir, genome='hg19', tag=None, max
             additional_pref = f.read().strip()
 
     # Create batch file content
-    batch_content = [
+    header = [
         'new',
         f'snapshotDirectory {output_dir}',
         f'genome {genome}'
     ]
     for bam in paths:
-        batch_content.append(f'load {bam}')
+        header.append(f'load {bam}')
     
-    png_paths, region_content = _get_paths_and_regions(regions, 
-        output_dir=output_dir, overlap_display=overlap_display, 
-        max_panel_height=max_panel_height, additional_pref=additional_pref, tag=tag,
-        output_format=output_format)
-    batch_content += region_content
-    batch_content.append('exit')
-    batch_text = '\n'.join(batch_content)
+    region_tables = _iter_region_tables(regions, tag=tag, chunk_size=chunk_size or REGION_CHUNK_SIZE)
+    chrom_sizes = load_chrom_sizes(genome, genome_dirs) if validate_regions else None
+    block_format = dict(output_dir=output_dir, overlap_display=overlap_display,
+                        max_panel_height=max_panel_height, additional_pref=additional_pref,
+                        output_format=output_format, validate_regions=validate_regions,
+                        chrom_sizes=chrom_sizes, genome=genome)
+    return header, region_tables, block_format
+
+
+def _plan_table(header, table, output_dir, overlap_display='squish', max_panel_height=200, additional_pref=None,
+                output_format='png', optimize=True, validate_regions=None, chrom_sizes=None, genome='hg19'):
+    """
+    Plan the regions of a RegionTable. With `optimize`, the display commands shared by every
+    snapshot (display mode, panel height, igv_config preferences) are sent once in the header,
+    only per-locus commands such as `sort` follow each `goto`, and blocks are rendered in genomic order.
+    With `validate_regions`, regions are first checked against `chrom_sizes`
+    """
+    if validate_regions:
+        table = validate_table(table, chrom_sizes, validate_regions, genome)
+    commands = _display_commands(overlap_display, max_panel_height, additional_pref)
+    if optimize:
+        lines = [line.strip() for command in commands for line in command.split('\n') if line.strip()]
+        commands = [line for line in lines if line.split()[0].lower() in PER_LOCUS_COMMANDS]
+        header = header + [line for line in lines if line.split()[0].lower() not in PER_LOCUS_COMMANDS]
+        order = table.locality_order()
+    else:
+        order = np.arange(len(table))
+    return header, table.batch_blocks(output_dir, _snapshot_ext(output_format), commands), order
+
+
+def _iter_batch_chunks(paths, regions, output_dir, genome='hg19', chunk_size=1000, optimize=True, **kwargs):
+    """
+    Lazily write one batch script per `chunk_size` regions, reading the regions only as chunks are requested.
+
+    Memory use is bounded by the chunk size however many regions the (compressed) region files hold;
+    regions are ordered for locality within each chunk.
+
+    Yields:
+        (str, list of str): Batch script path and expected screenshot paths of each chunk.
+    """
+    header, region_tables, block_format = _stream_batch(paths, regions, output_dir, genome=genome,
+                                                        chunk_size=chunk_size, **kwargs)
+    # Regions are validated as they are read, so chunks stay full and only a stream without
+    # any valid region is an error
+    validate_regions = block_format.pop('validate_regions')
+    read = kept = 0
+    pending = RegionTable.concat([])
+    for table in itertools.chain(region_tables, [None]):
+        if table is not None:
+            read += len(table)
+            if validate_regions:
+                table = validate_table(table, block_format['chrom_sizes'], validate_regions, genome, allow_empty=True)
+            kept += len(table)
+            pending = RegionTable.concat([pending, table])
+        elif read and not kept:
+            raise ValueError(f"[ERROR:{time.ctime()}] No valid regions left after validation: all {read} "
+                             f"regions are not valid on genome {genome}.")
+        while len(pending) >= chunk_size or (table is None and len(pending)):
+            chunk, pending = pending[:chunk_size], pending[chunk_size:]
+            chunk_header, blocks, order = _plan_table(header, chunk, optimize=optimize, **block_format)
+            yield _write_batch_shards(output_dir, chunk_header, blocks, 1, order)[0]
+
+
+def _write_batch_shards(output_dir, header, blocks, n_scripts=1, order=None):
+    """
+    Write the BatchBlocks listed in `order` (default: all, in region order) into up to `n_scripts`
+    contiguous batch scripts (always at least one); each shard's paths are returned in region order
+    """
+    order = np.arange(len(blocks)) if order is None else np.asarray(order, dtype=np.intp)
+    batches = []
+    for shard in _shard_indices(len(order), n_scripts):
+        # Generate a unique batch file name
+        batch_filename = os.path.join(output_dir, f'{uuid.uuid4()}.batch')
+        with open(batch_filename, 'w') as batch_file:
+            batch_file.write(''.join(line + '\n' for line in header))
+            shard_paths = blocks.write(batch_file, order[shard.start:shard.stop])
+            batch_file.write('exit')
+        batches.append((batch_filename, shard_paths))
+    return batches
+
+
+def _plan_pending_batches(paths, regions, output_dir, genome='hg19', n_scripts=1, snapshot_cache=None,
+                          igv_version='', igv_prefs=None, journal=None, resume=False, **kwargs):
+    """
+    Plan the batch and write batch scripts for the screenshots that still have to be rendered.
+
+    With `resume`, screenshots the journal records as finished are skipped; screenshots found
+    in `snapshot_cache` (keyed by the IGV build and the profile preferences `igv_prefs`) are
+    copied into place (and journaled) instead of rendered.
+
+    Returns:
+        tuple: (batches, all screenshot paths in region order, their `goto` loci,
+            (key, path) pairs to store after rendering)
+    """
+    header, blocks, pending = _plan_batch(paths, regions, output_dir, genome=genome, **kwargs)
+    png_paths = blocks.paths()
+    loci = blocks.loci()
+    if resume and journal is not None:
+        finished = journal.finished(png_paths)
+        pending = [i for i in pending.tolist() if png_paths[i] not in finished]
+    to_store = []
+    if snapshot_cache is not None:
+        keys = snapshot_cache.snapshot_keys(header, blocks, igv_version, igv_prefs)
+        misses = []
+        for i in np.asarray(pending).tolist():
+            if not snapshot_cache.fetch(keys[i], png_paths[i]):
+                misses.append(i)
+            elif journal is not None:
+                journal.record(png_paths[i])
+        pending = misses
+        to_store = [(keys[i], png_paths[i]) for i in pending]
+    if not len(pending):
+        return [], png_paths, loci, to_store
+    batches = _write_batch_shards(output_dir, header, blocks, n_scripts, pending)
+    return batches, png_paths, loci, to_store
+
+
+def _resolve_snapshot_cache(snapshot_cache, debug=False):
+    """
+    Return the SnapshotCache to use: the one given, one for a directory or $IGVER_SNAPSHOT_CACHE, or None
+    """
+    if snapshot_cache is None:
+        snapshot_cache = os.environ.get('IGVER_SNAPSHOT_CACHE')
+    if not snapshot_cache:
+        return None
+    if isinstance(snapshot_cache, str):
+        from .cache import SnapshotCache
+        return SnapshotCache(snapshot_cache, debug=debug)
+    return snapshot_cache
+
+
+def _igv_version_id(igv_dir, use_singularity, singularity_image):
+    """
+    Identify the IGV build a snapshot is rendered with: the IGV directory and, under singularity, the image
+    """
+    if use_singularity is None:
+        use_singularity = not is_running_in_container()
+    if use_singularity:
+        return f'{os.path.basename(os.path.normpath(igv_dir))}|{singularity_image}'
+    return os.path.realpath(igv_dir)
+
+
+def _store_snapshots(snapshot_cache, to_store):
+    """
+    Add freshly rendered snapshots to the cache and evict old entries
+    """
+    if snapshot_cache is None or not to_store:
+        return
+    for key, png in to_store:
+        if os.path.exists(png):
+            snapshot_cache.store(key, png)
+    snapshot_cache.evict()
+
+
+def _write_batch_script(output_dir, batch_content):
+    """
+    Write batch lines (plus a trailing `exit`) to a uniquely named batch file in `output_dir`
+    """
+    # Generate a unique batch file name
+    batch_filename = os.path.join(output_dir, f'{uuid.uuid4()}.batch')
+    batch_text = '\n'.join(batch_content + ['exit'])
     
     # Write to batch file
     with open(batch_filename, 'w') as batch_file:
         batch_file.write(batch_text)
     
-    return batch_filename, png_paths
+    return batch_filename
+
+
+def _split_snapshot_blocks(region_content):
+    """
+    Group batch lines into per-snapshot blocks, each ending with its `snapshot` command
+    """
+    blocks = []
+    block = []
+    for line in region_content:
+        block.append(line)
+        if line.startswith('snapshot '):
+            blocks.append(block)
+            block = []
+    return blocks
+
+
+def _shard_indices(n_items, n_shards):
+    """
+    Split range(n_items) into at most `n_shards` contiguous, near-equal shards (always at least one)
+    """
+    n_shards = max(1, min(n_shards, n_items))
+    size, extra = divmod(n_items, n_shards)
+    shards = []
+    start = 0
+    for i in range(n_shards):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(range(start, end))
+        start = end
+    return shards
 
 
-def _get_paths_and_regions(regions, **kwargs):
+def _get_paths_and_regions(regions, output_dir, overlap_display='squish', max_panel_height=200, additional_pref=None,
+                           tag=None, output_format='png'):
+    """
+    Screenshot paths and batch lines (`goto`, display commands, `snapshot` per region, unoptimized) of every region
+    """
+    commands = _display_commands(overlap_display, max_panel_height, additional_pref)
     png_paths = []
     region_content = []
+    for table in _iter_region_tables(regions, tag=tag):
+        blocks = table.batch_blocks(output_dir, _snapshot_ext(output_format), commands)
+        png_paths += blocks.paths()
+        region_content += [line for block in blocks for line in block]
+    return png_paths, region_content
+
+
+def _iter_region_tables(regions, tag=None, chunk_size=REGION_CHUNK_SIZE):
+    """
+    Lazily parse region inputs into RegionTables of at most `chunk_size` regions; consecutive
+    region strings or (chrom, start, end[, name]) tuples share a table, region files are read
+    `chunk_size` lines at a time, and a DataFrame, structured array or RegionTable is sliced as is.
+    A single region string or path is taken as a list of one.
+    """
+    if isinstance(regions, (str, os.PathLike)):
+        regions = [os.fspath(regions)]
+    if isinstance(regions, RegionTable) or is_columnar(regions):
+        table = regions if isinstance(regions, RegionTable) else RegionTable.from_records(regions, tag=tag)
+        for start in range(0, len(table), chunk_size):
+            yield table[start:start + chunk_size]
+        return
+
+    strings = []
+    records = []
     for region in regions:
+        if isinstance(region, (tuple, list)): # input is a (chrom, start, end[, name]) record
+            if strings:
+                yield RegionTable.from_region_strings(strings, tag=tag)
+                strings = []
+            records.append(region)
+            if len(records) >= chunk_size:
+                yield RegionTable.from_records(records, tag=tag)
+                records = []
+            continue
+        if records:
+            yield RegionTable.from_records(records, tag=tag)
+            records = []
+
         if os.path.exists(region): # input is region file
-            # Check if it's a BED file based on extension
-            if region.endswith('.bed'):
-                _png_paths, _region_content = _parse_bed_file(region, **kwargs)
-            else:
-                # Assume it's a text file with custom format
-                _png_paths, _region_content = _parse_region_file(region, **kwargs)
+            if strings:
+                yield RegionTable.from_region_strings(strings, tag=tag)
+                strings = []
+            with _open_region_file(region) as f:
+                for lines in _iter_line_chunks(f, chunk_size):
+                    # Check if it's a BED file based on extension
+                    if _is_bed_file(region):
+                        yield RegionTable.from_bed_lines(lines, tag=tag)
+                    else:
+                        # Assume it's a text file with custom format
+                        yield RegionTable.from_region_lines(lines)
 
         else: # input is region argument(s)
-            _png_paths, _region_content = _parse_region_string(region, **kwargs)
-        png_paths += _png_paths
-        region_content += _region_content
-    
-    return png_paths, region_content
+            strings.append(region)
+            if len(strings) >= chunk_size:
+                yield RegionTable.from_region_strings(strings, tag=tag)
+                strings = []
+    if strings:
+        yield RegionTable.from_region_strings(strings, tag=tag)
+    if records:
+        yield RegionTable.from_records(records, tag=tag)
 
 
 def _remove_previous_output(png_paths, debug=False):
@@ -365,68 +831,527 @@ def _remove_previous_output(png_paths, debug=False):
                 print(f"[LOG:{time.ctime()}] Removed existing {png_path}")
 
 
-def run_igv(batch_script, png_paths, igv_dir="/opt/IGV_2.19.5", overwrite=False, 
-            singularity_image='docker://sahuno/igver:latest', singularity_args='-B /data1 -B /home',
-            debug=False, use_singularity=None):
+def _singularity_bind_args(paths, output_dir, tmpdir, singularity_args):
     """
-    Runs IGV using the generated batch script and ensures all PNG screenshots are created.
+    Extend `singularity_args` with binds for the track directories, the output directory and TMPDIR
+    """
+    for path in paths:
+        abspath = os.path.abspath(path)
+        realpath = os.path.realpath(path)
+        bam_dir_abs = os.path.split(abspath)[0]
+        bam_dir_real = os.path.split(realpath)[0]
+        singularity_args += f' -B {bam_dir_abs}'
+        if bam_dir_abs != bam_dir_real:
+            singularity_args += f' -B {bam_dir_real}'
+    singularity_args += f' -B {os.path.realpath(output_dir)}'
+    singularity_args += f' -B {tmpdir}'
+    return singularity_args
+
+
+def _resolve_singularity_image(singularity_image, use_singularity, sif_cache=None, debug=False):
+    """
+    Apply the IGVER_IMAGE override and, when a SIF cache is configured, swap a docker:// image for its cached SIF
+    """
+    singularity_image = os.environ.get('IGVER_IMAGE', singularity_image)
+    if sif_cache is None:
+        sif_cache = os.environ.get('IGVER_SIF_CACHE')
+    if not sif_cache:
+        return singularity_image
+    if use_singularity is None:
+        use_singularity = not is_running_in_container()
+    if not use_singularity:
+        return singularity_image
+    from .image import resolve_image
+    cache_dir = sif_cache if isinstance(sif_cache, str) else None
+    return resolve_image(singularity_image, cache_dir=cache_dir, debug=debug)
+
+
+def _resolve_singularity_instance(singularity_instance, use_singularity, singularity_image, singularity_args, debug=False):
+    """
+    Return the SingularityInstance to run IGV in: the one given, a session instance if True, or None
+    """
+    if not singularity_instance:
+        return None
+    if use_singularity is None:
+        use_singularity = not is_running_in_container()
+    if not use_singularity:
+        return None
+    if singularity_instance is True:
+        from .singularity import get_singularity_instance
+        return get_singularity_instance(singularity_image, singularity_args, debug=debug)
+    return singularity_instance.start()
+
+
+def _igv_command(igv_args, igv_dir, singularity_image, singularity_args, use_singularity, display=None,
+                 singularity_instance=None, debug=False, java_home=None, igv_directory=None):
+    """
+    Build the shell command that runs IGV under Xvfb, wrapped with singularity if requested.
 
     Parameters:
-        batch_script (str): Path to the IGV batch script.
-        png_paths (list of str): Expected paths of the output PNG screenshot.
-        igv_dir (str, optional): Directory containing IGV installation (default: "/opt/IGV_2.19.5").
-        overwrite (bool, optional): Whether to overwrite existing PNG files (default: False).
+        igv_args (str): Arguments passed to igv.sh (e.g. "-b run.batch" or "--port 60151").
+        igv_dir (str): Directory containing IGV installation.
+        singularity_image (str): singularity image path.
+        singularity_args (str): singularity arguments string.
+        use_singularity (bool): Whether to wrap the command with `singularity run`.
+        display (str, optional): Existing X display (e.g. ":99") to use instead of starting
+            a new server with `xvfb-run` (default: None).
+        singularity_instance (igver.SingularityInstance, optional): Running instance to
+            `singularity exec` into instead of `singularity run` on the image (default: None).
         debug (bool, optional): Whether to show logs for debugging (default: False).
+        java_home (str, optional): HOME for igv.sh, holding the `.igv/java_arguments` (e.g. a larger
+            -Xmx) that igv.sh appends to its JVM options; see `_java_home` (default: None).
+        igv_directory (str, optional): IGV preferences directory passed as `--igvDirectory`,
+            e.g. an `igver.profile.IGVProfile` (default: None, `igv_dir`).
 
     Returns:
-        list of str: Paths to the generated PNG files.
+        str: Shell command line.
     """
-    # Auto-detect if we should use singularity
-    if use_singularity is None:
-        use_singularity = not is_running_in_container()
-    
     # assert os.path.exists(igv_dir), f"[ERROR:{time.ctime()}] {igv_dir} does not exist"
     igv_runfile = os.path.join(igv_dir, "igv.sh")
     # assert os.path.exists(igv_runfile), f"[ERROR:{time.ctime()}] {igv_runfile} does not exist"
+    if java_home:
+        igv_runfile = f'env HOME={java_home} {igv_runfile}'
+    igv_directory = igv_directory or igv_dir
 
-    # IGV command
-    cmd = f'xvfb-run --auto-display --server-args="-screen 0 1920x1080x24" {igv_runfile} -b {batch_script} --igvDirectory {igv_dir}'
+    if display:
+        cmd = f'env DISPLAY={display} {igv_runfile} {igv_args} --igvDirectory {igv_directory}'
+    else:
+        cmd = f'xvfb-run --auto-display --server-args="-screen 0 1920x1080x24" {igv_runfile} {igv_args} --igvDirectory {igv_directory}'
     
     # Only wrap with singularity if needed
-    if use_singularity:
+    if use_singularity and singularity_instance is not None:
+        cmd = f'singularity exec {singularity_instance.uri} {cmd}'
+        if debug:
+            print(f"[LOG:{time.ctime()}] Running IGV in Singularity instance {singularity_instance.name}")
+    elif use_singularity:
         cmd = f'singularity run {singularity_args} {singularity_image} {cmd}'
         if debug:
             print(f"[LOG:{time.ctime()}] Running IGV with Singularity")
     else:
         if debug:
             print(f"[LOG:{time.ctime()}] Running IGV directly (container mode)")
-    
-    if debug:
-        print(f"[LOG:{time.ctime()}] Running IGV command:\n{cmd}")
+    return cmd
+
+
+def _run_batches(batches, workers=1, **kwargs):
+    """
+    Run (batch_script, png_paths) pairs with `run_igv` on up to `workers` concurrent IGV processes
+    """
+    if workers <= 1 or len(batches) == 1:
+        for batch_script, png_paths in batches:
+            run_igv(batch_script, png_paths, **kwargs)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_igv, batch_script, png_paths, **kwargs)
+                   for batch_script, png_paths in batches]
+        for future in futures:
+            future.result()
+
+
+def run_igv(batch_script, png_paths, igv_dir="/opt/IGV_2.19.5", overwrite=False, 
+            singularity_image='docker://sahuno/igver:latest', singularity_args='-B /data1 -B /home',
+            debug=False, use_singularity=None, max_retries=1, display_manager=None, on_snapshot=None,
+            singularity_instance=None, max_snapshots_per_batch=None, max_rss_mb=None, isolate_failures=False,
+            timeout=None, stall_timeout=None, java_heap_mb=None, max_java_heap_mb=None, igv_profile=True):
+    """
+    Runs IGV using the generated batch script and ensures all PNG screenshots are created.
+
+    Retries only re-render the screenshots that are still missing: a smaller batch script
+    with the same header (`new`, `genome`, `load`, ...) and only the missing
+    `goto`/`snapshot` blocks is written for each retry. Long batches can be split into chunks
+    that each get a fresh IGV process, so the JVM's caches do not grow over the whole run.
+
+    Parameters:
+        batch_script (str): Path to the IGV batch script.
+        png_paths (list of str): Expected paths of the output PNG screenshot.
+        igv_dir (str, optional): Directory containing IGV installation (default: "/opt/IGV_2.19.5").
+        overwrite (bool, optional): Whether to overwrite existing PNG files (default: False).
+        debug (bool, optional): Whether to show logs for debugging (default: False).
+        max_retries (int, optional): Number of extra IGV runs for missing screenshots (default: 1).
+        display_manager (igver.XvfbDisplayManager, optional): Shared Xvfb servers to run IGV on
+            instead of starting one with `xvfb-run` per call (default: None).
+        on_snapshot (callable, optional): Called with each screenshot path as soon as IGV has
+            written it, while IGV keeps rendering (default: None).
+        singularity_instance (igver.SingularityInstance, optional): Running instance to execute
+            IGV in; its binds must cover the tracks and output directory (default: None).
+        max_snapshots_per_batch (int, optional): Render at most this many screenshots per IGV
+            process; the rest continue in a new one (default: None, the whole batch).
+        max_rss_mb (float, optional): Restart IGV after the current screenshot once its resident
+            memory exceeds this many MB; the restart does not count as a retry (default: None).
+        isolate_failures (bool, optional): When screenshots are still missing after the retries,
+            bisect them into smaller IGV runs to find the regions IGV fails on, record those
+            with IGV's stderr in `igver_quarantine.tsv` next to the screenshots, and render all
+            other regions instead of raising (default: False).
+        timeout (float, optional): Kill an IGV process (with Xvfb and the JVM) still running after
+            this many seconds; its missing screenshots are retried (default: None, no limit).
+        stall_timeout (float, optional): Kill an IGV process that has not written a new screenshot
+            for this many seconds, counted from its start for the first one, so it has to cover
+            IGV startup and genome loading (default: None, no limit).
+        java_heap_mb (int, optional): Java heap (-Xmx) of IGV in MB (default: None, igv.sh's 8 GB).
+        max_java_heap_mb (int, optional): When IGV fails with an out-of-memory error, rerun it with
+            twice the heap, up to this many MB, without using up a retry (default: None, no escalation).
+        igv_profile (bool or dict, optional): Run IGV with its own `--igvDirectory` next to the batch
+            script, holding preferences for headless runs (`igver.profile.HEADLESS_PREFS`; a dict
+            adds to or overrides them) and a link to the installation's genomes, removed once the
+            batch is done. False uses `igv_dir` itself, shared by all IGV processes (default: True).
+
+    Returns:
+        list of str: Paths to the generated PNG files (without quarantined regions).
+    """
+    outputs = _iter_igv_outputs(batch_script, png_paths, igv_dir=igv_dir, overwrite=overwrite,
+                                singularity_image=singularity_image, singularity_args=singularity_args,
+                                debug=debug, use_singularity=use_singularity, max_retries=max_retries,
+                                display_manager=display_manager, singularity_instance=singularity_instance,
+                                max_snapshots_per_batch=max_snapshots_per_batch, max_rss_mb=max_rss_mb,
+                                isolate_failures=isolate_failures, timeout=timeout, stall_timeout=stall_timeout,
+                                java_heap_mb=java_heap_mb, max_java_heap_mb=max_java_heap_mb,
+                                igv_profile=igv_profile)
+    for png in outputs:
+        if on_snapshot is not None:
+            on_snapshot(png)
+    if isolate_failures:
+        return [png for png in png_paths if os.path.exists(png)]
+    return png_paths
+
+
+def _iter_igv_outputs(batch_script, png_paths, igv_dir="/opt/IGV_2.19.5", overwrite=False,
+                      singularity_image='docker://sahuno/igver:latest', singularity_args='-B /data1 -B /home',
+                      debug=False, use_singularity=None, max_retries=1, display_manager=None,
+                      singularity_instance=None, max_snapshots_per_batch=None, max_rss_mb=None,
+                      poll_interval=0.5, isolate_failures=False, timeout=None, stall_timeout=None,
+                      java_heap_mb=None, max_java_heap_mb=None, igv_profile=True):
+    """
+    Run IGV as described in `run_igv`, yielding each screenshot path once it has been written
+    """
+    # Auto-detect if we should use singularity
+    if use_singularity is None:
+        use_singularity = not is_running_in_container()
 
     # If overwrite is enabled, remove existing PNG files
     if overwrite:
         _remove_previous_output(png_paths, debug)
+    else:
+        for png in png_paths:
+            if os.path.exists(png):
+                yield png
 
-    # Run IGV
-    n_iter = 0
-    max_iter = 2
-    while not all(os.path.exists(png) for png in png_paths) and n_iter < max_iter:
-        if debug:
-            print(f"[LOG:{time.ctime()}] Iteration #{n_iter + 1}: Ensuring PNG files exist")
-        result = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        # Print STDOUT and STDERR if debug=True
-        if debug:
-            print(f"[STDOUT:{time.ctime()}]\n{result.stdout.decode()}")
-            print(f"[STDERR:{time.ctime()}]\n{result.stderr.decode()}")
-        n_iter += 1
+    def render(paths, whole=False):
+        java_home = _java_home(jvm_dir, java_heap_mb) if java_heap_mb else None
+        return _render_snapshots(batch_script, paths, igv_dir=igv_dir, singularity_image=singularity_image,
+                                 singularity_args=singularity_args, use_singularity=use_singularity,
+                                 display_manager=display_manager, singularity_instance=singularity_instance,
+                                 max_rss_mb=max_rss_mb, poll_interval=poll_interval, debug=debug, whole=whole,
+                                 timeout=timeout, stall_timeout=stall_timeout, java_home=java_home,
+                                 igv_directory=igv_directory)
+
+    profile = _igv_profile(igv_profile, os.path.dirname(batch_script), igv_dir, debug)
+    igv_directory = profile.create() if profile is not None else None
+    # HOME directories holding the JVM heap options, next to the batch script so IGV's container sees them
+    jvm_dir = tempfile.mkdtemp(prefix='.igver_jvm-', dir=os.path.dirname(batch_script)) \
+        if java_heap_mb or max_java_heap_mb else None
+    try:
+        # Run IGV
+        max_iter = max_retries + 1
+        script_paths = _script_order(batch_script, png_paths)
+        failure = None
+        for n_iter in range(max_iter):
+            queue = [png for png in script_paths if not os.path.exists(png)]
+            if not queue:
+                break
+            if debug:
+                print(f"[LOG:{time.ctime()}] Iteration #{n_iter + 1}: Rendering {len(queue)} of {len(png_paths)} files")
+            while queue:
+                chunk = queue[:max_snapshots_per_batch] if max_snapshots_per_batch else queue
+                queue = queue[len(chunk):]
+                recycled, failure, _, _ = yield from render(chunk, whole=len(chunk) == len(script_paths))
+                if recycled:
+                    # Memory limit reached: continue the chunk in a fresh IGV without using up a retry
+                    if debug:
+                        print(f"[LOG:{time.ctime()}] Restarting IGV: resident memory exceeded {max_rss_mb} MB")
+                    queue = [png for png in chunk if not os.path.exists(png)] + queue
+                elif failure == 'oom' and max_java_heap_mb and (java_heap_mb or DEFAULT_JAVA_HEAP_MB) < max_java_heap_mb:
+                    # Out of memory: continue the chunk with a larger heap without using up a retry
+                    java_heap_mb = min(2 * (java_heap_mb or DEFAULT_JAVA_HEAP_MB), max_java_heap_mb)
+                    if debug:
+                        print(f"[LOG:{time.ctime()}] IGV ran out of memory; restarting it with -Xmx{java_heap_mb}m")
+                    queue = [png for png in chunk if not os.path.exists(png)] + queue
+                elif failure and debug:
+                    print(f"[LOG:{time.ctime()}] IGV failed ({failure})")
 
-    if not all(os.path.exists(png) for png in png_paths):
-        raise RuntimeError(f"[ERROR:{time.ctime()}] Failed to generate all PNG files after {max_iter} iterations.")
+        missing = [png for png in script_paths if not os.path.exists(png)]
+        if missing and isolate_failures:
+            quarantine = Quarantine(os.path.dirname(missing[0]), debug)
+            quarantined = yield from _isolate_failures(batch_script, missing, render, quarantine, max_snapshots_per_batch)
+            missing = [png for png in missing if not os.path.exists(png) and png not in quarantined]
+        if missing:
+            reason = f"; last IGV failure: {failure}" if failure else ""
+            raise RuntimeError(f"[ERROR:{time.ctime()}] Failed to generate all PNG files after {max_iter} iterations "
+                               f"({len(missing)} of {len(png_paths)} missing{reason}).")
+    finally:
+        if profile is not None:
+            profile.remove()
+        if jvm_dir is not None:
+            shutil.rmtree(jvm_dir, ignore_errors=True)
 
     # Cleanup batch script
     os.remove(batch_script)
     if debug:
         print(f"[LOG:{time.ctime()}] Removed batch script {batch_script}")
 
-    return png_paths
+
+def _render_snapshots(batch_script, png_paths, igv_dir, singularity_image, singularity_args, use_singularity,
+                      display_manager=None, singularity_instance=None, max_rss_mb=None, poll_interval=0.5,
+                      debug=False, whole=False, timeout=None, stall_timeout=None, java_home=None,
+                      igv_directory=None):
+    """
+    Render the snapshots `png_paths` of `batch_script` (all of it if `whole`) in one IGV process,
+    yielding each path once written.
+
+    Returns:
+        tuple: (whether IGV was restarted for memory, failure class from `classify_failure`,
+        IGV exit code, IGV stderr)
+    """
+    run_script = batch_script if whole else _write_subset_batch_script(batch_script, png_paths)
+    with _acquire_display(display_manager) as display:
+        # IGV command
+        cmd = _igv_command(f'-b {run_script}', igv_dir, singularity_image, singularity_args,
+                           use_singularity, display=display, singularity_instance=singularity_instance,
+                           debug=debug, java_home=java_home, igv_directory=igv_directory)
+        if debug:
+            print(f"[LOG:{time.ctime()}] Running IGV command:\n{cmd}")
+        igv_process = IGVProcess(cmd, png_paths, poll_interval=poll_interval, max_rss_mb=max_rss_mb,
+                                 timeout=timeout, stall_timeout=stall_timeout)
+        try:
+            yield from igv_process.snapshots()
+            stdout, stderr = igv_process.output()
+            failure = None if igv_process.recycled else igv_process.failure()
+            if igv_process.timed_out and debug:
+                print(f"[LOG:{time.ctime()}] Killed IGV: " + (
+                    f"no new snapshot for {stall_timeout}s" if igv_process.timed_out == 'stall'
+                    else f"still running after {timeout}s"))
+            # Print STDOUT and STDERR if debug=True
+            if debug:
+                print(f"[STDOUT:{time.ctime()}]\n{stdout}")
+                print(f"[STDERR:{time.ctime()}]\n{stderr}")
+        finally:
+            igv_process.close()
+            if run_script != batch_script:
+                os.remove(run_script)
+    return igv_process.recycled, failure, igv_process.returncode, stderr
+
+
+def _igv_profile(igv_profile, base_dir, igv_dir, debug=False):
+    """
+    IGVProfile for `igv_profile` (True or a dict of extra preferences), or None when it is off
+    """
+    if igv_profile is None or igv_profile is False:
+        return None
+    return IGVProfile(base_dir, igv_dir, prefs=igv_profile if isinstance(igv_profile, dict) else None, debug=debug)
+
+
+def _igv_profile_prefs(igv_profile):
+    """
+    Preferences IGV runs with for `igv_profile`, or None when it uses the installation's own
+    """
+    profile = _igv_profile(igv_profile, None, None)
+    return profile.prefs if profile is not None else None
+
+
+def _java_home(base_dir, java_heap_mb):
+    """
+    Directory under `base_dir` (a per-run directory removed after the run) to run igv.sh with as
+    HOME so that its JVM gets `-Xmx<java_heap_mb>m`: igv.sh appends the options in
+    `$HOME/.igv/java_arguments` after its own -Xmx
+    """
+    java_home = os.path.join(base_dir, f'{int(java_heap_mb)}m')
+    arguments = os.path.join(java_home, '.igv', 'java_arguments')
+    if not os.path.exists(arguments):
+        os.makedirs(os.path.dirname(arguments), exist_ok=True)
+        with open(arguments, 'w') as f:
+            f.write(f'-Xmx{int(java_heap_mb)}m\n')
+    return java_home
+
+
+def _isolate_failures(batch_script, missing, render, quarantine, max_snapshots_per_batch=None):
+    """
+    Find the regions IGV fails on by bisection: the missing snapshots (which just failed together)
+    are rendered in halves, halves that still miss snapshots are split again, and a region that
+    fails on its own is quarantined. Yields the snapshots rendered along the way.
+
+    Returns:
+        list of str: Paths of the quarantined snapshots.
+    """
+    locus_by_name = {block[-1].split(maxsplit=1)[1]: block[0].split(maxsplit=1)[1]
+                     for block in _read_batch_script(batch_script)[1]}
+    chunk_size = max_snapshots_per_batch or len(missing)
+    stack = []
+    quarantined = []
+    for start in reversed(range(0, len(missing), chunk_size)):
+        stack.extend(_halves(missing[start:start + chunk_size]))
+    while stack:
+        paths = stack.pop()
+        recycled, _, returncode, stderr = yield from render(paths)
+        remaining = [png for png in paths if not os.path.exists(png)]
+        if not remaining:
+            continue
+        if recycled:
+            stack.append(remaining)
+        elif len(paths) == 1:
+            quarantine.add(paths[0], locus_by_name[os.path.basename(paths[0])], returncode, stderr)
+            quarantined.append(paths[0])
+        else:
+            stack.extend(_halves(remaining))
+    return quarantined
+
+
+def _halves(paths):
+    """
+    Split `paths` into halves, as stack entries (second half first); a single path stays whole
+    """
+    half = (len(paths) + 1) // 2
+    return [part for part in (paths[half:], paths[:half]) if part]
+
+
+def iter_screenshots(paths, regions, output_dir='/tmp', genome="hg19", igv_dir="/opt/IGV_2.19.5",
+                     overwrite=True, dpi=300,
+                     singularity_image='docker://sahuno/igver:latest', singularity_args='-B /home',
+                     debug=False, output_format='png', use_singularity=None, max_retries=1,
+                     display_manager=None, singularity_instance=False, sif_cache=None, poll_interval=0.2,
+                     max_snapshots_per_batch=None, max_rss_mb=None, chunk_size=None, validate_regions='error',
+                     isolate_failures=False, timeout=None, stall_timeout=None, java_heap_mb=None,
+                     max_java_heap_mb=None, igv_profile=True, pdf_workers=None, report=None, sink=None,
+                     **kwargs):
+    """
+    Generates IGV screenshots and yields each one as soon as IGV has written it.
+
+    Downstream work (upload, QC, display) can overlap with rendering instead of waiting
+    for the last region. Screenshots are yielded in batch order; regions that are still
+    missing after the retries raise a RuntimeError once the others have been yielded.
+    Closing the generator early stops IGV.
+
+    With `chunk_size`, region files (plain, gzip or bgzip BED) are read as a stream and one
+    batch of `chunk_size` regions is written and rendered at a time, so memory use does not
+    grow with the number of regions; a chunk that still misses screenshots after the retries
+    stops the run.
+
+    PDF screenshots are converted in `pdf_workers` processes as their SVGs arrive and
+    yielded in batch order once converted. A `report` is paged and a `sink` is given each
+    screenshot in the order screenshots are yielded.
+
+    Parameters:
+        poll_interval (float, optional): Seconds between checks of the snapshot directory (default: 0.2).
+        chunk_size (int, optional): Number of regions read and rendered per batch (default: None, all at once).
+        Other parameters are the same as for `load_screenshots`.
+
+    Yields:
+        (str, str): Region (as passed to IGV's `goto`) and path of each screenshot.
+    """
+    _check_pdf_support(output_format)
+    output_dir, tmpdir = _resolve_output_dir(output_dir, debug)
+    singularity_args = _singularity_bind_args(paths, output_dir, tmpdir, singularity_args)
+    singularity_image = _resolve_singularity_image(singularity_image, use_singularity, sif_cache, debug)
+    kwargs.setdefault('genome_dirs', default_genome_dirs(igv_dir))
+    if chunk_size:
+        batches = _iter_batch_chunks(paths, regions, output_dir, genome, chunk_size=chunk_size,
+                                     output_format=output_format, validate_regions=validate_regions, **kwargs)
+    else:
+        batches = [create_batch_script(paths, regions, output_dir, genome, output_format=output_format,
+                                       validate_regions=validate_regions, **kwargs)]
+    singularity_instance = _resolve_singularity_instance(singularity_instance, use_singularity,
+                                                         singularity_image, singularity_args, debug)
+
+    converter = PDFConverter(pdf_workers, dpi=dpi, debug=debug) if output_format == 'pdf' else None
+    report_writer = ReportWriter(report, dpi=dpi, debug=debug) if report is not None else None
+    try:
+        for batch_script, output_paths in batches:
+            # goto locus for each snapshot file name
+            region_by_name = {block[-1].split(maxsplit=1)[1]: block[0].split(maxsplit=1)[1]
+                              for block in _read_batch_script(batch_script)[1]}
+            outputs = _iter_igv_outputs(batch_script, output_paths, igv_dir=igv_dir, overwrite=overwrite,
+                                        singularity_image=singularity_image, singularity_args=singularity_args,
+                                        debug=debug, use_singularity=use_singularity, max_retries=max_retries,
+                                        display_manager=display_manager, singularity_instance=singularity_instance,
+                                        max_snapshots_per_batch=max_snapshots_per_batch, max_rss_mb=max_rss_mb,
+                                        poll_interval=poll_interval, isolate_failures=isolate_failures,
+                                        timeout=timeout, stall_timeout=stall_timeout, java_heap_mb=java_heap_mb,
+                                        max_java_heap_mb=max_java_heap_mb, igv_profile=igv_profile)
+            if report_writer is not None:
+                outputs = _paged(outputs, report_writer)
+            if converter is None:
+                results = ((region_by_name[os.path.basename(path)], path) for path in outputs)
+            else:
+                results = _iter_converted(outputs, region_by_name, converter, dpi, debug)
+            for region, path in results:
+                if sink is not None:
+                    sink(path)
+                yield region, path
+        if report_writer is not None:
+            report_writer.finish()
+    finally:
+        for sink in (converter, report_writer):
+            if sink is not None:
+                sink.close()
+
+
+def _iter_converted(outputs, region_by_name, converter, dpi, debug):
+    """
+    Convert SVG screenshots to PDF in `converter` as they arrive, yielding (region, PDF path) in arrival order
+    """
+    # SVGs still being converted, in the order IGV wrote them
+    converting = collections.deque()
+    for path in outputs:
+        converting.append((region_by_name[os.path.basename(path)], path, converter.submit(path)))
+        while converting and converting[0][2].done():
+            region, svg_path, _ = converting.popleft()
+            yield region, _convert_svg_to_pdf([svg_path], True, dpi, debug, converter)[0]
+    for region, svg_path, _ in converting:
+        yield region, _convert_svg_to_pdf([svg_path], True, dpi, debug, converter)[0]
+
+
+def _paged(outputs, report_writer):
+    """
+    Pass screenshot paths through, adding each to the report first
+    """
+    for path in outputs:
+        report_writer.add(path)
+        yield path
+
+
+@contextmanager
+def _acquire_display(display_manager):
+    """
+    Acquire a display from `display_manager`, or yield None so that IGV runs under `xvfb-run`
+    """
+    if display_manager is None:
+        yield None
+    else:
+        with display_manager.acquire() as display:
+            yield display
+
+
+def _read_batch_script(batch_script):
+    """
+    Read a batch script into its header (lines before the first `goto`) and per-snapshot blocks
+    """
+    with open(batch_script, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() and line.strip() != 'exit']
+    n_header = next((i for i, line in enumerate(lines) if line.split()[0] == 'goto'), len(lines))
+    return lines[:n_header], _split_snapshot_blocks(lines[n_header:])
+
+
+def _script_order(batch_script, png_paths):
+    """
+    Return `png_paths` in the order their snapshots appear in the batch script
+    """
+    path_by_name = {os.path.basename(png): png for png in png_paths}
+    return [path_by_name[block[-1].split(maxsplit=1)[1]] for block in _read_batch_script(batch_script)[1]]
+
+
+def _write_subset_batch_script(batch_script, png_paths):
+    """
+    Write a new batch script with the header of `batch_script` and only the blocks producing `png_paths`
+    """
+    header, blocks = _read_batch_script(batch_script)
+    wanted = {os.path.basename(png) for png in png_paths}
+    subset = [line for block in blocks if block[-1].split(maxsplit=1)[1] in wanted for line in block]
+    return _write_batch_script(os.path.dirname(batch_script), header + subset)
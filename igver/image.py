@@ -0,0 +1,171 @@
+import json
+import os
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_SIF_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'igver', 'sif')
+
+_MANIFEST_TYPES = ', '.join([
+    'application/vnd.oci.image.index.v1+json',
+    'application/vnd.docker.distribution.manifest.list.v2+json',
+    'application/vnd.oci.image.manifest.v1+json',
+    'application/vnd.docker.distribution.manifest.v2+json',
+])
+
+
+def sif_cache_dir(cache_dir=None):
+    """
+    Return the SIF cache directory: `cache_dir`, $IGVER_SIF_CACHE, or ~/.cache/igver/sif
+    """
+    return cache_dir or os.environ.get('IGVER_SIF_CACHE') or DEFAULT_SIF_CACHE
+
+
+def resolve_image(image, cache_dir=None, offline=None, debug=False):
+    """
+    Return a local SIF file for a docker:// image, pulling it into a digest-addressed cache on first use.
+
+    The tag is resolved to its manifest digest with one registry request and the SIF is
+    stored as `<cache_dir>/sha256-<digest>.sif`, so an unchanged tag is never converted
+    twice. When the registry cannot be reached (or `offline` is set), the digest last
+    recorded for the image in `<cache_dir>/index.json` is used.
+
+    Parameters:
+        image (str): singularity image URI; anything other than docker:// is returned unchanged.
+        cache_dir (str, optional): SIF cache directory (default: see `sif_cache_dir`).
+        offline (bool, optional): Never contact the registry (default: $IGVER_OFFLINE == "1").
+        debug (bool, optional): Whether to show logs for debugging (default: False).
+
+    Returns:
+        str: Path to the cached SIF file.
+    """
+    if not image.startswith('docker://'):
+        return image
+    cache_dir = sif_cache_dir(cache_dir)
+    if offline is None:
+        offline = os.environ.get('IGVER_OFFLINE', '').strip() == '1'
+    index = _read_index(cache_dir)
+
+    registry, repository, reference = parse_docker_reference(image)
+    digest = reference if reference.startswith('sha256:') else None
+    if digest is None and not offline:
+        try:
+            digest = _registry_digest(registry, repository, reference)
+        except (OSError, ValueError) as e:
+            if debug:
+                print(f"[LOG:{time.ctime()}] Could not resolve {image} from the registry: {e}")
+    if digest is None:
+        digest = index.get(image)
+        if digest is None or not os.path.exists(_sif_path(cache_dir, digest)):
+            raise RuntimeError(f"[ERROR:{time.ctime()}] {image} is not in the SIF cache {cache_dir} "
+                               "and the registry could not be reached. Run `igver image prefetch` first.")
+
+    sif_path = _sif_path(cache_dir, digest)
+    if not os.path.exists(sif_path):
+        if offline:
+            raise RuntimeError(f"[ERROR:{time.ctime()}] {sif_path} is not cached and offline mode is on.")
+        _pull(f'docker://{_docker_name(registry, repository)}@{digest}', sif_path, debug)
+    elif debug:
+        print(f"[LOG:{time.ctime()}] Using cached SIF {sif_path} for {image}")
+
+    if index.get(image) != digest:
+        index = _read_index(cache_dir)
+        index[image] = digest
+        _write_index(cache_dir, index)
+    return sif_path
+
+
+def parse_docker_reference(image):
+    """
+    Split "docker://[registry/]repository[:tag|@digest]" into (registry, repository, tag or digest)
+    """
+    name = image[len('docker://'):] if image.startswith('docker://') else image
+    if '@' in name:
+        name, reference = name.split('@', 1)
+    else:
+        reference = 'latest'
+        last = name.rsplit('/', 1)[-1]
+        if ':' in last:
+            name, reference = name.rsplit(':', 1)
+    first, _, rest = name.partition('/')
+    if rest and ('.' in first or ':' in first or first == 'localhost'):
+        registry, repository = first, rest
+    else:
+        registry, repository = 'registry-1.docker.io', name
+    if registry == 'registry-1.docker.io' and '/' not in repository:
+        repository = f'library/{repository}'
+    return registry, repository, reference
+
+
+def _docker_name(registry, repository):
+    if registry == 'registry-1.docker.io':
+        return repository
+    return f'{registry}/{repository}'
+
+
+def _sif_path(cache_dir, digest):
+    return os.path.join(cache_dir, f"{digest.replace(':', '-')}.sif")
+
+
+def _registry_digest(registry, repository, tag, timeout=10):
+    """
+    Ask the registry for the manifest digest of `repository:tag`, with anonymous bearer-token auth
+    """
+    url = f'https://{registry}/v2/{repository}/manifests/{tag}'
+    headers = {'Accept': _MANIFEST_TYPES}
+    request = urllib.request.Request(url, headers=headers, method='HEAD')
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        challenge = e.headers.get('WWW-Authenticate', '')
+        if e.code != 401 or not challenge.lower().startswith('bearer'):
+            raise
+        params = dict(part.split('=', 1) for part in challenge[len('Bearer '):].split(','))
+        params = {key.strip(): value.strip().strip('"') for key, value in params.items()}
+        query = urllib.parse.urlencode({key: params[key] for key in ('service', 'scope') if key in params})
+        with urllib.request.urlopen(f"{params['realm']}?{query}", timeout=timeout) as token_response:
+            token = json.load(token_response)
+        headers['Authorization'] = f"Bearer {token.get('token') or token.get('access_token')}"
+        request = urllib.request.Request(url, headers=headers, method='HEAD')
+        response = urllib.request.urlopen(request, timeout=timeout)
+    with response:
+        digest = response.headers.get('Docker-Content-Digest')
+    if not digest:
+        raise ValueError(f"registry returned no digest for {repository}:{tag}")
+    return digest
+
+
+def _pull(uri, sif_path, debug=False):
+    """
+    Convert `uri` to a SIF at `sif_path`; the file only appears once the pull has completed
+    """
+    os.makedirs(os.path.dirname(sif_path), exist_ok=True)
+    tmp_path = f'{sif_path}.{os.getpid()}.tmp'
+    cmd = ['singularity', 'pull', '--force', tmp_path, uri]
+    if debug:
+        print(f"[LOG:{time.ctime()}] Pulling {uri} into {sif_path}")
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise RuntimeError(f"[ERROR:{time.ctime()}] singularity pull {uri} failed: {result.stderr.decode().strip()}")
+    os.replace(tmp_path, sif_path)
+
+
+def _read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'index.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(cache_dir, index):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, 'index.json')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+import time
+
+from .process import is_complete_snapshot
+
+JOURNAL_NAME = '.igver_journal.tsv'
+QUARANTINE_NAME = 'igver_quarantine.tsv'
+_UNESCAPE = {'n': '\n', 't': '\t'}
+
+
+class ProgressJournal:
+    """
+    Append-only record of the snapshots in an output directory that were rendered and checked.
+
+    Each line is `<file name>\\t<size>\\t<mtime_ns>`, written as soon as a snapshot is complete,
+    so the journal survives the job being killed. A snapshot counts as finished on resume only
+    if its file still has the recorded size and mtime and passes `is_complete_snapshot`.
+    `start` keeps the journal from growing across runs: it only describes the latest run.
+    """
+
+    def __init__(self, output_dir, debug=False):
+        """
+        Parameters:
+            output_dir (str): Output directory of the screenshots; the journal is stored in it.
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.debug = debug
+        self._lock = threading.Lock()
+
+    def start(self, resume=False):
+        """
+        Begin a run: a resumed run compacts the journal to the last entry of each file, any
+        other run removes it, since every screenshot is rendered again.
+        """
+        with self._lock:
+            if not resume:
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                return
+            entries = self._entries()
+            if entries:
+                tmp = f'{self.path}.tmp{os.getpid()}'
+                with open(tmp, 'w') as f:
+                    f.write(''.join(f'{name}\t{size}\t{mtime_ns}\n' for name, (size, mtime_ns) in entries.items()))
+                os.replace(tmp, self.path)
+
+    def record(self, path):
+        """
+        Record `path` as finished if it is a complete snapshot.
+        """
+        if not is_complete_snapshot(path):
+            return
+        stat = os.stat(path)
+        line = f'{os.path.basename(path)}\t{stat.st_size}\t{stat.st_mtime_ns}\n'
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+    def finished(self, paths):
+        """
+        Return the subset of `paths` recorded as finished whose files are unchanged and complete.
+        """
+        entries = self._entries()
+        finished = set()
+        for path in paths:
+            entry = entries.get(os.path.basename(path))
+            if entry is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_size, stat.st_mtime_ns) == entry and is_complete_snapshot(path):
+                finished.add(path)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] {len(finished)} of {len(paths)} screenshots already finished in {self.path}")
+        return finished
+
+    def _entries(self):
+        """
+        {file name: (size, mtime_ns)} of the last entry of each file in the journal
+        """
+        entries = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    fields = line.rstrip('\n').split('\t')
+                    if len(fields) == 3 and fields[1].isdigit() and fields[2].isdigit():
+                        entries[fields[0]] = (int(fields[1]), int(fields[2]))
+        except OSError:
+            pass
+        return entries
+
+
+class Quarantine:
+    """
+    Record of the regions that made IGV fail even when rendered on their own.
+
+    Each line is `<file name>\t<locus>\t<exit code>\t<stderr>`; the stderr of the failing IGV
+    run is kept to its last `max_stderr` characters, with tabs and newlines escaped.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, output_dir, debug=False, max_stderr=4000):
+        """
+        Parameters:
+            output_dir (str): Output directory of the screenshots; the quarantine file is stored in it.
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+            max_stderr (int, optional): Number of trailing stderr characters kept per region (default: 4000).
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, QUARANTINE_NAME)
+        self.debug = debug
+        self.max_stderr = max_stderr
+
+    def add(self, path, locus, returncode, stderr):
+        """
+        Quarantine the region of snapshot `path`.
+        """
+        stderr = stderr[-self.max_stderr:].replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+        line = f'{os.path.basename(path)}\t{locus}\t{returncode}\t{stderr}\n'
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Quarantined {locus}: IGV failed on it alone (exit code {returncode}); "
+                  f"see {self.path}")
+
+    def entries(self):
+        """
+        Return {file name: (locus, exit code, stderr)} of the quarantined regions.
+        """
+        entries = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    fields = line.rstrip('\n').split('\t')
+                    if len(fields) == 4:
+                        stderr = re.sub(r'\\(.)', lambda m: _UNESCAPE.get(m.group(1), m.group(1)), fields[3])
+                        entries[fields[0]] = (fields[1], fields[2], stderr)
+        except OSError:
+            pass
+        return entries
@@ -0,0 +1,247 @@
+import json
+import os
+import re
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+_SOURCE_GENOME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'docker', 'json')
+_LOCUS = re.compile(r'^([^:\s]+):([\d,]+)-([\d,]+)$')
+VALIDATE_MODES = ('error', 'drop')
+# Index files IGV looks for, in order; tracks of the required formats cannot be loaded without one
+_INDEX_SUFFIXES = (
+    (('.bam',), ('.bai', '.csi'), True),
+    (('.cram',), ('.crai',), True),
+    (('.vcf.gz', '.bed.gz', '.gff.gz', '.gff3.gz', '.gtf.gz', '.bedpe.gz', '.txt.gz'), ('.tbi', '.csi'), False),
+    (('.bcf',), ('.csi',), False),
+)
+_REMOTE_PREFIXES = ('http://', 'https://', 'ftp://', 's3://', 'gs://', 'htsget://')
+
+
+def default_genome_dirs(igv_dir=None):
+    """
+    Directories searched for genome definitions (`<genome>.json`) and their locally cached
+    `.fai`/alias tables: IGV's genomes directory, ~/igv/genomes and the repository's docker/json
+    """
+    dirs = []
+    if igv_dir:
+        dirs.append(os.path.join(igv_dir, 'genomes'))
+    dirs.append(os.path.join(os.path.expanduser('~'), 'igv', 'genomes'))
+    dirs.append(os.path.normpath(_SOURCE_GENOME_DIR))
+    return dirs
+
+
+def load_chrom_sizes(genome, search_dirs=None):
+    """
+    Chromosome lengths of `genome`, keyed by sequence name and every known alias.
+
+    `genome` is a genome id (e.g. "hg38"), a genome JSON, a FASTA with an `.fai` next to it, or an
+    `.fai`/`.chrom.sizes` file. For a genome id, `<genome>.json` is looked up in `search_dirs`
+    and its `indexURL`/`aliasURL` tables are read from the same directory or its `<genome>/`
+    subdirectory when cached there; nothing is downloaded.
+
+    Parameters:
+        genome (str): Genome id or path.
+        search_dirs (list of str, optional): Directories to look in (default: `default_genome_dirs()`).
+
+    Returns:
+        dict or None: Length per chromosome name, or None when no local size table was found.
+    """
+    if search_dirs is None:
+        search_dirs = default_genome_dirs()
+    return _load_chrom_sizes(genome, tuple(search_dirs))
+
+
+@lru_cache(maxsize=16)
+def _load_chrom_sizes(genome, search_dirs):
+    sizes_path, alias_path = _find_size_tables(genome, search_dirs)
+    if sizes_path is None:
+        return None
+    sizes = {}
+    with open(sizes_path) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 2 and fields[1].isdigit():
+                sizes[fields[0]] = int(fields[1])
+    if alias_path is not None:
+        with open(alias_path) as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                names = [name for name in line.rstrip('\n').split('\t') if name]
+                length = next((sizes[name] for name in names if name in sizes), None)
+                if length is not None:
+                    for name in names:
+                        sizes.setdefault(name, length)
+    # IGV matches names with and without the `chr` prefix, and chrM with MT
+    for name, length in list(sizes.items()):
+        alias = name[3:] if name.startswith('chr') else f'chr{name}'
+        sizes.setdefault(alias, length)
+        if name in ('chrM', 'MT'):
+            sizes.setdefault('MT' if name == 'chrM' else 'chrM', length)
+    return sizes
+
+
+def _find_size_tables(genome, search_dirs):
+    """
+    Local (sizes table, alias table) paths of `genome`; either may be None
+    """
+    if genome.endswith(('.fai', '.sizes')) and os.path.isfile(genome):
+        return genome, None
+    if os.path.isfile(genome + '.fai'):
+        return genome + '.fai', None
+    if genome.endswith('.json') and os.path.isfile(genome):
+        json_path = genome
+    else:
+        json_path = next((os.path.join(d, f'{genome}.json') for d in search_dirs
+                          if os.path.isfile(os.path.join(d, f'{genome}.json'))), None)
+    if json_path is None:
+        return None, None
+    try:
+        with open(json_path) as f:
+            definition = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+    json_dir = os.path.dirname(json_path)
+    local_dirs = [json_dir, os.path.join(json_dir, definition.get('id', genome))]
+
+    def local(key):
+        url = definition.get(key)
+        if not url:
+            return None
+        candidates = [url] + [os.path.join(d, os.path.basename(url)) for d in local_dirs]
+        return next((path for path in candidates if os.path.isfile(path)), None)
+
+    return local('chromSizesURL') or local('indexURL'), local('aliasURL')
+
+
+def check_regions(table, chrom_sizes):
+    """
+    Reason every region of a RegionTable fails validation against `chrom_sizes`, '' if it passes.
+
+    A region fails when its contig is unknown, its end is before its start, or it starts past
+    the end of the contig (IGV clips an end past the contig end). Coordinate rows are checked
+    with array operations; loci of several regions are checked one by one, gene names are not.
+
+    Returns:
+        numpy.ndarray: Reasons, one per region.
+    """
+    lengths = np.array([chrom_sizes.get(str(chrom), -1) for chrom in table.chroms] + [0], dtype=np.int64)
+    row_lengths = lengths[table.chrom_ids]
+    coordinate = table.chrom_ids >= 0
+    reasons = np.full(len(table), '', dtype=object)
+    reasons[coordinate & (table.ends < table.starts)] = 'end before start'
+    reasons[coordinate & (row_lengths >= 0) & (table.starts > row_lengths)] = 'start beyond contig end'
+    reasons[coordinate & (row_lengths < 0)] = 'unknown contig'
+    for i in np.flatnonzero(~coordinate):
+        reasons[i] = _check_literal(str(table.loci[i]), chrom_sizes)
+    return reasons
+
+
+def _check_literal(locus, chrom_sizes):
+    for item in locus.split():
+        match = _LOCUS.match(item)
+        if match is None:
+            continue  # gene or feature name: resolved by IGV
+        chrom, start, end = match.group(1), int(match.group(2).replace(',', '')), int(match.group(3).replace(',', ''))
+        if chrom not in chrom_sizes:
+            return 'unknown contig'
+        if end < start:
+            return 'end before start'
+        if start > chrom_sizes[chrom]:
+            return 'start beyond contig end'
+    return ''
+
+
+def validate_table(table, chrom_sizes, mode='error', genome='', allow_empty=False):
+    """
+    Apply `check_regions`: raise a ValueError listing the bad regions (mode 'error') or return
+    the table without them (mode 'drop', with a UserWarning listing them). Tables pass unchanged
+    when `chrom_sizes` is None. Mode 'drop' raises a ValueError too when no region is valid, unless `allow_empty` (for one
+    chunk of a longer region stream).
+    """
+    assert mode in VALIDATE_MODES, f"Invalid validate_regions: {mode}"
+    if chrom_sizes is None or not len(table):
+        return table
+    reasons = check_regions(table, chrom_sizes)
+    bad = np.flatnonzero(reasons != '')
+    if not len(bad):
+        return table
+    loci = table.goto_loci()
+    report = '\n'.join(f'  {loci[i]}: {reasons[i]}' for i in bad[:20])
+    if len(bad) > 20:
+        report += f'\n  ... and {len(bad) - 20} more'
+    if mode == 'error':
+        raise ValueError(f"[ERROR:{time.ctime()}] {len(bad)} of {len(table)} regions are not valid on genome "
+                         f"{genome}:\n{report}")
+    if len(bad) == len(table) and not allow_empty:
+        raise ValueError(f"[ERROR:{time.ctime()}] No valid regions left after validation: all {len(table)} "
+                         f"regions are not valid on genome {genome}:\n{report}")
+    # A warning rather than a [LOG] line: callers see it without debug output and can filter it
+    warnings.warn(f"Dropping {len(bad)} of {len(table)} regions not valid on genome {genome}:\n{report}",
+                  stacklevel=2)
+    return table[np.flatnonzero(reasons == '')]
+
+
+def check_tracks(paths, max_workers=32, check_indexes=True):
+    """
+    Problems that would keep IGV from loading the tracks: missing files, missing BAM/CRAM indexes
+    and indexes older than their data file (only missing files without `check_indexes`).
+
+    Every track and candidate index (`x.bam.bai`, `x.bai`, `x.bam.csi`, `x.cram.crai`, `x.vcf.gz.tbi`, ...)
+    is stat'ed concurrently, since each stat is a round trip on NFS or Lustre. Remote URLs are skipped.
+
+    Parameters:
+        paths (list of str): Track paths.
+        max_workers (int, optional): Number of concurrent stat calls (default: 32).
+        check_indexes (bool, optional): Whether to check the index files too (default: True).
+
+    Returns:
+        list of str: One line per problem, in track order; empty if all tracks are fine.
+    """
+    tracks = [path for path in paths if not path.startswith(_REMOTE_PREFIXES)]
+    candidates = {track: _index_candidates(track) if check_indexes else ([], False) for track in tracks}
+    to_stat = list(dict.fromkeys(tracks + [index for indexes, _ in candidates.values() for index in indexes]))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_stat)))) as executor:
+        mtimes = dict(zip(to_stat, executor.map(_mtime, to_stat)))
+
+    problems = []
+    for track in tracks:
+        indexes, required = candidates[track]
+        if mtimes[track] is None:
+            problems.append(f'{track} does not exist.')
+            continue
+        index = next((index for index in indexes if mtimes[index] is not None), None)
+        if index is None:
+            if required:
+                problems.append(f'{track}: index not found (expected {" or ".join(indexes)})')
+        elif mtimes[index] < mtimes[track]:
+            problems.append(f'{track}: index {index} is older than the data file')
+    return problems
+
+
+def _index_candidates(track):
+    """
+    Candidate index paths of `track`, and whether IGV requires one
+    """
+    lower = track.lower()
+    for extensions, index_suffixes, required in _INDEX_SUFFIXES:
+        extension = next((ext for ext in extensions if lower.endswith(ext)), None)
+        if extension is None:
+            continue
+        indexes = [track + suffix for suffix in index_suffixes]
+        if extension in ('.bam', '.cram'):
+            # samtools also writes x.bai next to x.bam
+            indexes.insert(1, track[:-len(extension)] + index_suffixes[0])
+        return indexes, required
+    return [], False
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
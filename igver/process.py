@@ -0,0 +1,254 @@
+import os
+import re
+import signal
+import subprocess
+import tempfile
+import time
+
+# stderr patterns of IGV failures, checked in order
+FAILURE_PATTERNS = (
+    ('oom', re.compile(r'OutOfMemoryError|GC overhead limit exceeded|Java heap space|Cannot allocate memory')),
+    ('missing_index', re.compile(r'[Ii]ndex (file )?(is )?(not found|required|missing)|'
+                                 r'[Cc]ould not (find|load) (an )?index|[Nn]o index')),
+    ('display', re.compile(r"[Cc]an't (open|connect to) (X11 window server|display)|cannot open display|"
+                           r'HeadlessException|xvfb-run: error|Xvfb failed|No protocol specified')),
+)
+
+
+def is_complete_snapshot(path):
+    """
+    Check that a snapshot file has been fully written (PNG IEND chunk, closing SVG tag, or non-empty)
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    if size == 0:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - 64))
+        tail = f.read()
+    if path.endswith('.png'):
+        return b'IEND' in tail[-12:]
+    if path.endswith('.svg'):
+        return tail.rstrip().endswith(b'</svg>')
+    return True
+
+
+class IGVProcess:
+    """
+    A running IGV batch whose snapshots are reported as soon as they are written.
+
+    IGV writes snapshots one at a time in batch order, so a snapshot is complete once
+    its file passes `is_complete_snapshot`, a later snapshot exists, or IGV has exited.
+    A snapshot that is still missing when a later one appears was skipped by IGV.
+    """
+
+    def __init__(self, cmd, ordered_paths, poll_interval=0.5, lookahead=8, max_rss_mb=None, timeout=None,
+                 stall_timeout=None):
+        """
+        Parameters:
+            cmd (str): Shell command that runs IGV.
+            ordered_paths (list of str): Expected snapshot paths in batch order.
+            poll_interval (float, optional): Seconds between output checks (default: 0.5).
+            lookahead (int, optional): Number of later snapshots checked to detect skipped ones (default: 8).
+            max_rss_mb (float, optional): Stop IGV after a snapshot once the resident memory of its
+                process group exceeds this many MB; `recycled` is then set (default: None, Linux only).
+            timeout (float, optional): Kill IGV after this many seconds in total (default: None).
+            stall_timeout (float, optional): Kill IGV when no new snapshot has been written for this
+                many seconds, counted from the start for the first one (default: None).
+                `timed_out` is set to 'timeout' or 'stall' when IGV is killed by either.
+        """
+        self.cmd = cmd
+        self.ordered_paths = ordered_paths
+        self.poll_interval = poll_interval
+        self.lookahead = lookahead
+        self.max_rss_mb = max_rss_mb
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.recycled = False
+        self.timed_out = None
+        self.started = time.monotonic()
+        self._stdout = tempfile.TemporaryFile()
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, shell=True, stdout=self._stdout, stderr=self._stderr,
+                                        start_new_session=True)
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    def snapshots(self):
+        """
+        Generator yielding each snapshot path once it is complete; IGV is killed if the generator is closed early.
+        """
+        paths = self.ordered_paths
+        i = 0
+        last_progress = self.started
+        try:
+            while True:
+                exited = self.process.poll() is not None
+                while i < len(paths):
+                    path = paths[i]
+                    later = paths[i + 1:i + 1 + self.lookahead]
+                    if os.path.exists(path):
+                        if not (exited or is_complete_snapshot(path) or any(os.path.exists(p) for p in later)):
+                            break
+                        yield path
+                        last_progress = time.monotonic()
+                        if not exited and self.max_rss_mb and self.rss_mb() > self.max_rss_mb:
+                            self.recycled = True
+                            self._stop(paths[i + 1:])
+                            return
+                    elif not (exited or any(os.path.exists(p) for p in later)):
+                        break
+                    i += 1
+                if exited:
+                    return
+                now = time.monotonic()
+                if self.timeout and now - self.started > self.timeout:
+                    self.timed_out = 'timeout'
+                elif self.stall_timeout and now - last_progress > self.stall_timeout:
+                    self.timed_out = 'stall'
+                if self.timed_out:
+                    self._stop(paths[i:])
+                    return
+                time.sleep(self.poll_interval)
+        finally:
+            self.kill()
+
+    def rss_mb(self):
+        """
+        Resident memory of the IGV process group in MB (0 where /proc is not available).
+        """
+        return _process_group_rss(self.process.pid) / 1024 ** 2
+
+    def failure(self):
+        """
+        Classify why IGV failed: 'timeout', 'stall', 'oom', 'missing_index', 'display', 'error'
+        (non-zero exit), or None if it exited cleanly.
+        """
+        return classify_failure(self.returncode, self.output()[1], self.timed_out)
+
+    def _stop(self, remaining_paths):
+        """
+        Kill IGV and drop the partially written snapshot, so the rest can be rendered by a fresh IGV.
+        """
+        self.kill()
+        for path in remaining_paths:
+            if os.path.exists(path) and not is_complete_snapshot(path):
+                os.remove(path)
+
+    def wait(self):
+        """
+        Wait for IGV to exit without reporting snapshots.
+        """
+        for _ in self.snapshots():
+            pass
+        return self.returncode
+
+    def kill(self):
+        """
+        Kill the whole IGV process tree (xvfb-run, Xvfb, singularity, JVM), including
+        descendants that moved to a process group of their own.
+        """
+        if self.process.poll() is None:
+            descendants = _descendant_pids(self.process.pid)
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            for pid in descendants:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+        self.process.wait()
+
+    def output(self):
+        """
+        Return (stdout, stderr) of the IGV run as text.
+        """
+        texts = []
+        for stream in (self._stdout, self._stderr):
+            stream.seek(0)
+            texts.append(stream.read().decode(errors='replace'))
+        return tuple(texts)
+
+    def close(self):
+        self._stdout.close()
+        self._stderr.close()
+
+
+def classify_failure(returncode, stderr='', timed_out=None):
+    """
+    Classify an IGV run from its exit code, stderr and watchdog result.
+
+    A run killed by the watchdog is classified by the watchdog. Otherwise 'oom' needs an
+    out-of-memory message in stderr: a bare SIGKILL may come from a user or a scheduler as
+    well as the kernel OOM killer, and is reported as 'error' rather than escalating the heap.
+
+    Returns:
+        str or None: 'timeout' or 'stall' (killed by the watchdog), 'oom', 'missing_index',
+        'display', 'error' for any other non-zero exit, or None for a clean exit.
+    """
+    if timed_out:
+        return timed_out
+    for failure, pattern in FAILURE_PATTERNS:
+        if pattern.search(stderr or ''):
+            return failure
+    if returncode:
+        return 'error'
+    return None
+
+
+def _read_stat_fields(pid):
+    """
+    Fields of /proc/<pid>/stat after the parenthesised command name: state, ppid, pgrp, ..., rss (21st)
+    """
+    with open(f'/proc/{pid}/stat') as f:
+        stat = f.read()
+    return stat[stat.rindex(')') + 2:].split()
+
+
+def _descendant_pids(pid):
+    """
+    PIDs of all descendants of `pid`, from /proc (empty where /proc is not available)
+    """
+    children = {}
+    try:
+        pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return []
+    for child in pids:
+        try:
+            children.setdefault(int(_read_stat_fields(child)[1]), []).append(child)
+        except (OSError, ValueError, IndexError):
+            continue
+    descendants = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return descendants
+
+
+def _process_group_rss(pgid):
+    """
+    Sum the resident set size in bytes of the processes in process group `pgid`, from /proc
+    """
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    try:
+        pids = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return 0
+    for pid in pids:
+        try:
+            fields = _read_stat_fields(pid)
+            if int(fields[2]) == pgid:
+                total += int(fields[21]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import time
+
+# IGV preferences for unattended batch runs, written to the prefs.properties of each profile
+HEADLESS_PREFS = {
+    # No batch port: parallel IGV processes on one host do not compete for port 60151
+    'PORT_ENABLED': 'false',
+    # Empty hosted genome list instead of fetching it at startup; genomes resolve from genomes/
+    'GENOMES_SERVER_URL': '{profile_dir}/genomes_server.json',
+    # Fixed window bounds, so screenshots do not depend on a previous session
+    'IGV.Bounds': '0,0,1920,1080',
+    # Alignment visibility window in kb (IGV's default, pinned against user preferences)
+    'SAM.MAX_VISIBLE_RANGE': '30',
+}
+
+
+class IGVProfile:
+    """
+    Isolated IGV preferences directory (`--igvDirectory`) for one IGV worker.
+
+    The directory holds a `prefs.properties` tuned for headless runs (see `HEADLESS_PREFS`) and
+    a `genomes` link to the installation's genomes directory, so genome definitions and
+    downloaded genome data stay shared while preferences, logs and the batch port do not.
+    """
+
+    def __init__(self, base_dir, igv_dir, prefs=None, debug=False):
+        """
+        Parameters:
+            base_dir (str): Directory to create the profile in; it has to be visible to IGV
+                (e.g. bound into its container).
+            igv_dir (str): IGV installation directory (as seen by IGV) whose `genomes` is linked.
+            prefs (dict, optional): Preferences added to or overriding `HEADLESS_PREFS` (default: None).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.base_dir = base_dir
+        self.igv_dir = igv_dir
+        self.prefs = dict(HEADLESS_PREFS, **(prefs or {}))
+        self.debug = debug
+        self.path = None
+
+    def create(self):
+        """
+        Create the profile directory and return its path.
+        """
+        self.path = tempfile.mkdtemp(prefix='.igver_profile-', dir=self.base_dir)
+        os.symlink(os.path.join(self.igv_dir, 'genomes'), os.path.join(self.path, 'genomes'))
+        with open(os.path.join(self.path, 'genomes_server.json'), 'w') as f:
+            f.write('[]\n')
+        with open(os.path.join(self.path, 'prefs.properties'), 'w') as f:
+            for key, value in self.prefs.items():
+                f.write(f'{key}={str(value).format(profile_dir=self.path)}\n')
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Created IGV profile {self.path}")
+        return self.path
+
+    def remove(self):
+        """
+        Remove the profile directory (the linked genomes directory is left alone).
+        """
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            if self.debug:
+                print(f"[LOG:{time.ctime()}] Removed IGV profile {self.path}")
+            self.path = None
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, *exc):
+        self.remove()
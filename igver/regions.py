@@ -0,0 +1,418 @@
+import operator
+import os
+import re
+import time
+
+import numpy as np
+
+_LOCUS = re.compile(r'^([^:\s]+):(\d+)-(\d+)$')
+_STARTS_WITH_ZERO = operator.methodcaller('startswith', '0')
+_COLUMN_ALIASES = (
+    ('chrom', 'chr', 'chromosome', '#chrom', 'seqname', 'contig'),
+    ('start', 'chromstart', 'pos_start'),
+    ('end', 'chromend', 'pos_end', 'stop'),
+    ('name', 'id'),
+)
+
+
+class RegionTable:
+    """
+    Columnar table of snapshot regions shared by the BED, region file and region string parsers.
+
+    Coordinates are held in NumPy arrays: `chrom_ids` indexes `chroms`, with `starts`/`ends`.
+    Loci that are not a single `chrom:start-end` (several loci of an SV, gene names) have
+    chrom id -1 and keep their `goto` text in `loci`. `names` holds BED names or SV tags and
+    `tags` the tag given by the caller; a name takes precedence in file names.
+    """
+
+    __slots__ = ('chroms', 'chrom_ids', 'starts', 'ends', 'names', 'tags', 'loci')
+
+    def __init__(self, chroms, chrom_ids, starts, ends, names, tags, loci):
+        self.chroms = np.asarray(chroms, dtype=str)
+        self.chrom_ids = np.asarray(chrom_ids, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.names = np.asarray(names, dtype=str)
+        self.tags = np.asarray(tags, dtype=str)
+        self.loci = np.asarray(loci, dtype=str)
+
+    def __len__(self):
+        return len(self.chrom_ids)
+
+    @classmethod
+    def from_columns(cls, chroms, starts, ends, names=None, tags=None, loci=None):
+        """
+        Build a table from per-region chromosome, start and end strings.
+
+        `loci` optionally gives a literal `goto` locus per row (None for coordinate rows). Rows
+        whose start or end is not a plain integer keep their `chrom:start-end` text as locus,
+        so file names and batch lines are reproduced exactly.
+        """
+        n = len(chroms)
+        starts = _str_list(starts, n)
+        ends = _str_list(ends, n)
+        names = np.full(n, '') if names is None else np.asarray(names, dtype=str).reshape(n)
+        tags = np.full(n, '') if tags is None else np.asarray(tags, dtype=str).reshape(n)
+        literal = np.zeros(n, dtype=bool) if loci is None else \
+            np.fromiter((locus is not None for locus in loci), dtype=bool, count=n)
+
+        chrom_index = {chrom: i for i, chrom in enumerate(dict.fromkeys(chroms))}
+        chrom_ids = np.fromiter(map(chrom_index.__getitem__, chroms), dtype=np.int32, count=n)
+        valid = _is_plain_int(starts) & _is_plain_int(ends) & ~literal
+        start_values = np.zeros(n, dtype=np.int64)
+        end_values = np.zeros(n, dtype=np.int64)
+        if valid.all():
+            # int() parses digit strings faster than NumPy's string to integer cast
+            start_values[:] = np.fromiter(map(int, starts), dtype=np.int64, count=n)
+            end_values[:] = np.fromiter(map(int, ends), dtype=np.int64, count=n)
+            return cls(list(chrom_index), chrom_ids, start_values, end_values, names, tags, np.full(n, ''))
+        texts = [''] * n
+        for i in np.flatnonzero(literal).tolist():
+            texts[i] = loci[i]
+        for i in np.flatnonzero(~valid & ~literal).tolist():
+            texts[i] = f'{chroms[i]}:{starts[i]}-{ends[i]}'
+        for i in np.flatnonzero(valid).tolist():
+            start_values[i] = int(starts[i])
+            end_values[i] = int(ends[i])
+        return cls(list(chrom_index), np.where(valid, chrom_ids, -1), start_values, end_values, names, tags, texts)
+
+    @classmethod
+    def from_bed_lines(cls, lines, tag=None):
+        """
+        Build a table from BED3/BED6 lines; headers, comments and short lines are skipped.
+        """
+        # Columns are collected line by line rather than from a list of split rows, which would
+        # keep a list per region alive for the garbage collector to scan
+        chroms, starts, ends, names = [], [], [], []
+        for line in lines:
+            fields = line.strip().split('\t', 4)
+            if len(fields) >= 3 and not fields[0].startswith(('#', 'track', 'browser')):
+                chroms.append(fields[0])
+                starts.append(fields[1])
+                ends.append(fields[2])
+                names.append(fields[3] if len(fields) >= 4 else '')
+        return cls.from_columns(chroms, starts, ends, names, np.full(len(chroms), tag or ''))
+
+    @classmethod
+    def from_region_lines(cls, lines):
+        """
+        Build a table from region text lines: one or more `chrom:start-end` loci and an optional SV tag.
+        """
+        loci = []
+        sv_tags = []
+        for line in lines:
+            items = []
+            sv_tag = ''
+            for item in line.strip().split():  # split by either ' ' or '\t'
+                if item.count(':') == 1 and item.count('-') == 1:
+                    items.append(item)
+                else:
+                    sv_tag = item  # e.g. ins, del, translocation, ...
+            loci.append(' '.join(items))
+            sv_tags.append(sv_tag)
+        return cls.from_loci(loci, names=sv_tags)
+
+    @classmethod
+    def from_region_strings(cls, regions, tag=None):
+        """
+        Build a table from regions given as strings (a locus, several loci separated by spaces, or a gene).
+        """
+        regions = list(regions)
+        return cls.from_loci(regions, tags=[tag or ''] * len(regions))
+
+    @classmethod
+    def from_records(cls, records, tag=None):
+        """
+        Build a table from in-memory regions: a pandas DataFrame or NumPy structured array with
+        chrom/start/end(/name) columns, or a sequence of (chrom, start, end[, name]) tuples.
+
+        Columns are matched by name (e.g. `chrom`, `chr`, `#chrom`, `chromStart`); without all
+        three coordinate columns the first columns are used in BED order. Coordinates are used
+        as given, like BED rows.
+        """
+        if is_columnar(records):
+            columns = _record_columns(records)
+        else:
+            rows = [tuple(row) for row in records]
+            short = next((row for row in rows if len(row) < 3), None)
+            if short is not None:
+                raise ValueError(f"[ERROR:{time.ctime()}] Region record {short} needs chrom, start and end.")
+            columns = [np.array([row[j] for row in rows], dtype=object) for j in range(3)]
+            columns.append(np.array([row[3] if len(row) > 3 else '' for row in rows], dtype=object))
+        chroms, starts, ends, names = [_text_column(column) for column in columns]
+        return cls.from_columns(chroms, starts, ends, names, np.full(len(chroms), tag or '', dtype=object))
+
+    @classmethod
+    def from_loci(cls, loci, names=None, tags=None):
+        """
+        Build a table from `goto` loci; single `chrom:start-end` loci are stored as coordinates.
+        """
+        chroms, starts, ends, literals = [], [], [], []
+        for locus in loci:
+            match = _LOCUS.match(locus)
+            if match is None:
+                chroms.append('')
+                starts.append('0')
+                ends.append('0')
+                literals.append(locus)
+            else:
+                chrom, start, end = match.groups()
+                chroms.append(chrom)
+                starts.append(start)
+                ends.append(end)
+                literals.append(None)
+        return cls.from_columns(chroms, starts, ends, names, tags, literals)
+
+    def goto_loci(self):
+        """
+        `goto` argument of every region, as a NumPy string array.
+        """
+        return np.array(self.locus_strings(), dtype=str)
+
+    def filenames(self, ext):
+        """
+        Snapshot file name of every region: `<locus tag>[.<name or tag>].<ext>`.
+        """
+        if len(self) == 0:
+            return np.array([], dtype=str)
+        return np.array(self.filename_strings(ext), dtype=str)
+
+    def locus_strings(self):
+        """
+        `goto` argument of every region, as a list.
+
+        Formatted row by row from the columns: for strings this short that is about twice as
+        fast as chaining NumPy string operations, which also pad every string to the longest.
+        """
+        chroms = self.chroms.tolist()
+        return [f'{chroms[chrom_id]}:{start}-{end}' if chrom_id >= 0 else locus for chrom_id, start, end, locus in
+                zip(self.chrom_ids.tolist(), self.starts.tolist(), self.ends.tolist(), self.loci.tolist())]
+
+    def filename_strings(self, ext, loci=None):
+        """
+        Snapshot file name of every region, as a list; `loci` are the `locus_strings`, if already at hand.
+        """
+        loci = self.locus_strings() if loci is None else loci
+        suffixes = np.where(self.names != '', self.names, self.tags).tolist()
+        return [f"{locus.replace(':', '-').replace(' ', '.')}{'.' if suffix else ''}{suffix}.{ext}"
+                for locus, suffix in zip(loci, suffixes)]
+
+    def batch_blocks(self, output_dir, ext, commands=()):
+        """
+        IGV batch blocks of every region (`goto`, the given commands, `snapshot`), as a BatchBlocks.
+        """
+        return BatchBlocks(self, output_dir, ext, commands)
+
+    def locality_order(self):
+        """
+        Row indices sorted by chromosome (natural order: chr2 before chr10) and start position.
+
+        Loci that are not plain coordinates are placed by their first `chrom:start`, if any;
+        the rest keep their input order at the end.
+        """
+        n = len(self)
+        chrom_names = list(self.chroms)
+        starts = self.starts.copy()
+        literal_chroms = np.full(n, -1, dtype=np.int64)
+        literal = np.flatnonzero(self.chrom_ids < 0)
+        if len(literal):
+            # First `chrom:start` of each literal locus: its first word split at the last ':',
+            # with the start running up to the '-' (thousands separators allowed)
+            first_words = np.char.partition(self.loci[literal], ' ')[:, 0]
+            parts = np.char.rpartition(first_words, ':')
+            literal_starts = np.char.replace(np.char.partition(parts[:, 2], '-')[:, 0], ',', '')
+            placed = (parts[:, 0] != '') & np.char.isdigit(literal_starts)
+            names, name_ids = np.unique(parts[placed, 0], return_inverse=True)
+            literal_chroms[literal[placed]] = len(chrom_names) + name_ids
+            starts[literal[placed]] = literal_starts[placed].astype(np.int64)
+            chrom_names += names.tolist()
+        ranks = {}
+        for name in sorted(set(chrom_names), key=_chrom_sort_key):
+            ranks[name] = len(ranks)
+        name_ranks = np.array([ranks[name] for name in chrom_names] + [len(ranks)], dtype=np.int64)
+        chrom_ids = np.where(self.chrom_ids >= 0, self.chrom_ids, literal_chroms)
+        return np.lexsort((np.arange(n), starts, name_ranks[chrom_ids]))
+
+    def __getitem__(self, index):
+        """
+        Rows selected by a slice or an index array, as a new table sharing the chromosome names.
+        """
+        return RegionTable(self.chroms, self.chrom_ids[index], self.starts[index], self.ends[index],
+                           self.names[index], self.tags[index], self.loci[index])
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Stack tables row-wise, merging their chromosome names.
+        """
+        chroms = {}
+        chrom_ids = []
+        for table in tables:
+            remap = np.array([chroms.setdefault(chrom, len(chroms)) for chrom in table.chroms] + [-1],
+                             dtype=np.int32)
+            chrom_ids.append(remap[table.chrom_ids])
+        columns = [np.concatenate([getattr(table, name) for table in tables]) if tables else []
+                   for name in ('starts', 'ends', 'names', 'tags', 'loci')]
+        return cls(list(chroms), np.concatenate(chrom_ids) if tables else [], *columns)
+
+
+class BatchBlocks:
+    """
+    IGV batch blocks of the regions of a RegionTable, formatted from its arrays only when needed.
+
+    Block `i` is `goto <locus i>`, the per-locus `commands` shared by every block and
+    `snapshot <file name i>`, written to `output_dir`. The plan holds only the table's arrays:
+    loci, file names and batch lines are formatted from them a slice of `SLICE_SIZE` regions
+    at a time, when a batch script is written or paths are asked for.
+    """
+
+    __slots__ = ('table', 'output_dir', 'ext', 'commands')
+
+    # Number of regions formatted at a time
+    SLICE_SIZE = 65536
+
+    def __init__(self, table, output_dir, ext, commands=()):
+        self.table = table
+        self.output_dir = output_dir
+        self.ext = ext
+        self.commands = list(commands)
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        """
+        Batch lines of block `i`.
+        """
+        return next(self.lines([i]))
+
+    def __iter__(self):
+        return self.lines()
+
+    def lines(self, indices=None):
+        """
+        Yield the batch lines of the blocks `indices` (default: all), one list per block.
+        """
+        for table in self._slices(indices):
+            loci = table.locus_strings()
+            for locus, filename in zip(loci, table.filename_strings(self.ext, loci)):
+                yield [f'goto {locus}'] + self.commands + [f'snapshot {filename}']
+
+    def loci(self, indices=None):
+        """
+        `goto` locus of the blocks `indices` (default: all), in that order.
+        """
+        return [locus for table in self._slices(indices) for locus in table.locus_strings()]
+
+    def paths(self, indices=None):
+        """
+        Screenshot paths of the blocks `indices` (default: all), in that order.
+        """
+        prefix = os.path.join(self.output_dir, '')
+        return [prefix + filename for table in self._slices(indices) for filename in table.filename_strings(self.ext)]
+
+    def write(self, f, indices=None):
+        """
+        Write the blocks `indices` (default: all) to the open batch script `f`, in that order.
+
+        Returns:
+            list of str: Screenshot paths of the written blocks, in region order.
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.intp)
+        middle = ''.join(f'\n{command}' for command in self.commands) + '\nsnapshot '
+        prefix = os.path.join(self.output_dir, '')
+        # Rank of each written block in region order, where its path goes
+        ranks = np.searchsorted(np.sort(indices), indices)
+        paths = np.empty(len(indices), dtype=object)
+        for start in range(0, len(indices), self.SLICE_SIZE):
+            table = self.table[indices[start:start + self.SLICE_SIZE]]
+            loci = table.locus_strings()
+            filenames = table.filename_strings(self.ext, loci)
+            f.write(''.join([f'goto {locus}{middle}{filename}\n' for locus, filename in zip(loci, filenames)]))
+            paths[ranks[start:start + self.SLICE_SIZE]] = [prefix + filename for filename in filenames]
+        return paths.tolist()
+
+    def _slices(self, indices=None):
+        """
+        RegionTables of the rows `indices` (default: all), `SLICE_SIZE` rows at a time
+        """
+        n = len(self) if indices is None else len(indices)
+        for start in range(0, n, self.SLICE_SIZE):
+            rows = slice(start, start + self.SLICE_SIZE) if indices is None else \
+                np.asarray(indices[start:start + self.SLICE_SIZE], dtype=np.intp)
+            yield self.table[rows]
+
+
+def is_columnar(regions):
+    """
+    Whether `regions` is a pandas DataFrame or NumPy structured array
+    """
+    if isinstance(regions, np.ndarray):
+        return regions.dtype.names is not None
+    return hasattr(regions, 'columns') and hasattr(regions, 'iloc')
+
+
+def _record_columns(records):
+    """
+    chrom, start, end and name columns of a DataFrame or structured array (name may be None)
+    """
+    fields = list(records.dtype.names if isinstance(records, np.ndarray) else records.columns)
+    by_name = {str(field).lower(): field for field in fields}
+
+    def find(aliases):
+        field = next((by_name[alias] for alias in aliases if alias in by_name), None)
+        return None if field is None else np.asarray(records[field])
+
+    columns = [find(aliases) for aliases in _COLUMN_ALIASES]
+    if any(column is None for column in columns[:3]):
+        if len(fields) < 3:
+            raise ValueError(f"[ERROR:{time.ctime()}] Region table needs chrom, start and end columns, got {fields}.")
+        columns = [np.asarray(records[field]) for field in fields[:4]]
+    if len(columns) < 4 or columns[3] is None:
+        columns[3:] = [np.full(len(columns[0]), '', dtype=object)]
+    return columns
+
+
+def _text_column(column):
+    """
+    Column as a NumPy string array; missing values (None, NaN) become empty strings
+    """
+    column = np.asarray(column)
+    if column.dtype.kind == 'O':
+        column = np.array(['' if value is None or value != value else str(value) for value in column.tolist()],
+                          dtype=str)
+    elif column.dtype.kind == 'f':
+        # Integer coordinates that were upcast to float (e.g. by missing values in pandas)
+        integral = np.isfinite(column) & (column == np.round(column))
+        text = column.astype(str)
+        text[integral] = column[integral].astype(np.int64).astype(str)
+        column = text
+    return column.astype(str)
+
+
+def _chrom_sort_key(chrom):
+    """
+    Natural sort key of a chromosome name, ignoring a `chr` prefix
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', re.sub(r'^chr', '', chrom.lower()))]
+
+
+def _str_list(values, n):
+    """
+    Column of `n` strings as a list
+    """
+    if isinstance(values, np.ndarray):
+        return values.astype(str).reshape(n).tolist()
+    return [str(value) for value in values]
+
+
+def _is_plain_int(values):
+    """
+    Which strings (a list) are non-negative integers that round-trip through int() unchanged
+    """
+    n = len(values)
+    plain = np.fromiter(map(str.isdigit, values), dtype=bool, count=n)
+    zero_led = np.fromiter(map(_STARTS_WITH_ZERO, values), dtype=bool, count=n)
+    if zero_led.any():
+        plain &= ~zero_led | (np.fromiter(map(len, values), dtype=np.int64, count=n) == 1)
+    return plain
\ No newline at end of file
@@ -0,0 +1,235 @@
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+
+from PIL import Image
+
+from .results import Screenshot
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class PDFReport:
+    """
+    Multi-page PDF of screenshots, written one page at a time.
+
+    Each page holds one screenshot, sized like the figures of `load_screenshots` (pixels / dpi
+    inches). A page's image, content stream and page object are written to the file as soon
+    as it is added; only the byte offsets of the objects are kept until `close` writes the
+    page tree and cross-reference table, so a 10k-page report never sits in memory.
+
+    8-bit RGB PNGs (what IGV writes) are embedded without decoding: their compressed IDAT data
+    is a valid PDF Flate stream with PNG predictors. Other PNGs are decoded and recompressed,
+    and SVGs are rasterized at `dpi` with cairosvg.
+    """
+
+    # Object 1 is the catalog and object 2 the page tree, written last
+    _CATALOG, _PAGES = 1, 2
+
+    def __init__(self, path, dpi=300, debug=False):
+        """
+        Parameters:
+            path (str): Path of the PDF to write.
+            dpi (int, optional): Resolution that page sizes and SVG rasterization are based on (default: 300).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.path = path
+        self.dpi = dpi
+        self.debug = debug
+        self._file = open(path, 'wb')
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._offsets = {}
+        self._pages = []
+
+    def __len__(self):
+        return len(self._pages)
+
+    def add_page(self, screenshot_path):
+        """
+        Append a page showing the PNG or SVG screenshot `screenshot_path`.
+        """
+        width, height, image_dict, data = self._image_stream(screenshot_path)
+        page_width, page_height = width * 72 / self.dpi, height * 72 / self.dpi
+        image_id = self._write_stream(b'/Type /XObject /Subtype /Image ' + image_dict, data)
+        content_id = self._write_stream(b'', f'q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q'.encode())
+        page_id = self._write_object(
+            f'<< /Type /Page /Parent {self._PAGES} 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'.encode())
+        self._pages.append(page_id)
+
+    def close(self):
+        """
+        Write the page tree, catalog and cross-reference table, and close the file.
+        """
+        if self._file is None:
+            return
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._pages)
+        self._write_object(f'<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>'.encode(), self._PAGES)
+        self._write_object(f'<< /Type /Catalog /Pages {self._PAGES} 0 R >>'.encode(), self._CATALOG)
+        size = max(self._offsets) + 1
+        xref = self._file.tell()
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        lines += [f'{self._offsets[i]:010d} 00000 n \n' if i in self._offsets else '0000000000 65535 f \n'
+                  for i in range(1, size)]
+        lines.append(f'trailer\n<< /Size {size} /Root {self._CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n')
+        self._file.write(''.join(lines).encode())
+        self._file.close()
+        self._file = None
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Wrote {len(self._pages)} pages to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_object(self, body, object_id=None):
+        if object_id is None:
+            object_id = max(self._offsets, default=self._PAGES) + 1
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f'{object_id} 0 obj\n'.encode() + body + b'\nendobj\n')
+        return object_id
+
+    def _write_stream(self, stream_dict, data):
+        return self._write_object(b'<< ' + stream_dict + f' /Length {len(data)} >>\nstream\n'.encode()
+                                  + data + b'\nendstream')
+
+    def _image_stream(self, screenshot_path):
+        """
+        (width, height, image dictionary entries, Flate data) of a screenshot
+        """
+        if screenshot_path.endswith('.svg'):
+            import cairosvg
+            png = cairosvg.svg2png(url=screenshot_path, scale=self.dpi / 96)
+            image = Image.open(io.BytesIO(png))
+        else:
+            embedded = _png_flate_stream(screenshot_path)
+            if embedded is not None:
+                return embedded
+            image = Image.open(screenshot_path)
+        with image:
+            rgb = image.convert('RGB')
+        width, height = rgb.size
+        image_dict = f'/Width {width} /Height {height} /ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode'
+        return width, height, image_dict.encode(), zlib.compress(rgb.tobytes(), 6)
+
+
+def _png_flate_stream(png_path):
+    """
+    (width, height, image dictionary entries, IDAT data) of an 8-bit RGB, non-interlaced PNG, or None
+    """
+    with open(png_path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            return None
+        length, chunk_type = struct.unpack('>I4s', f.read(8))
+        if chunk_type != b'IHDR':
+            return None
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(length))
+        if (bit_depth, color_type, interlace) != (8, 2, 0):
+            return None
+        f.read(4)  # CRC
+        idat = []
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                idat.append(f.read(length))
+            else:
+                f.seek(length, os.SEEK_CUR)
+            f.read(4)  # CRC
+            if chunk_type == b'IEND':
+                break
+    image_dict = (f'/Width {width} /Height {height} /ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode '
+                  f'/DecodeParms << /Predictor 15 /Colors 3 /BitsPerComponent 8 /Columns {width} >>')
+    return width, height, image_dict.encode(), b''.join(idat)
+
+
+class ReportWriter:
+    """
+    Streams screenshots into one or more `PDFReport`s as they are rendered.
+
+    With `order`, pages follow that order (the caller's region order) even though IGV finishes
+    screenshots in batch order: a screenshot is paged once all screenshots before it are, so
+    only the paths of screenshots waiting for an earlier one are held. `finish` pages whatever
+    is left, skipping screenshots that were never rendered. Without `order`, pages follow
+    the order screenshots are added in. `add` is thread-safe, so it can be used as `on_snapshot`.
+    """
+
+    def __init__(self, report, order=None, loci=None, dpi=300, debug=False):
+        """
+        Parameters:
+            report (str or callable): Path of the report, or a function of an `igver.Screenshot`
+                returning the report path of that screenshot, e.g. one report per sample.
+            order (list of str, optional): Screenshot paths in page order (default: None, as added).
+            loci (list of str, optional): Region of each path in `order`, passed on in the
+                Screenshots given to `report` (default: None).
+            dpi (int, optional): Resolution of the pages (default: 300).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.report = report
+        self.order = order
+        self.dpi = dpi
+        self.debug = debug
+        self._regions = dict(zip(order, loci)) if order is not None and loci is not None else {}
+        self._next = 0
+        self._ready = set()
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    def add(self, path):
+        """
+        Page the screenshot `path`, or hold it until the screenshots before it are paged.
+        """
+        with self._lock:
+            if self.order is None:
+                self._write(path)
+                return
+            self._ready.add(path)
+            while self._next < len(self.order) and self.order[self._next] in self._ready:
+                self._ready.discard(self.order[self._next])
+                self._write(self.order[self._next])
+                self._next += 1
+
+    __call__ = add
+
+    def finish(self):
+        """
+        Page the remaining screenshots that exist and close the reports.
+
+        Returns:
+            list of str: Paths of the reports written.
+        """
+        with self._lock:
+            if self.order is not None:
+                for path in self.order[self._next:]:
+                    if path in self._ready or os.path.exists(path):
+                        self._write(path)
+                self._next = len(self.order)
+                self._ready.clear()
+            for pdf in self._reports.values():
+                pdf.close()
+            return list(self._reports)
+
+    def close(self):
+        """
+        Close the reports without paging the remaining screenshots.
+        """
+        with self._lock:
+            for pdf in self._reports.values():
+                pdf.close()
+
+    def _write(self, path):
+        if callable(self.report):
+            report_path = self.report(Screenshot(path, self._regions.get(path), self.dpi))
+        else:
+            report_path = self.report
+        pdf = self._reports.get(report_path)
+        if pdf is None:
+            pdf = self._reports[report_path] = PDFReport(report_path, self.dpi, self.debug)
+        pdf.add_page(path)
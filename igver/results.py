@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+from PIL import Image
+from matplotlib.figure import Figure
+
+
+class Screenshot:
+    """
+    Lazily loaded IGV screenshot: its path and region, with the image decoded only on access.
+
+    Nothing is cached on the object, so a list of Screenshots costs a few hundred bytes per
+    region however many there are; each decoded image or figure is freed once the caller
+    drops it. Screenshots are path-like (`open(screenshot, 'rb')`, `os.path.exists(screenshot)`)
+    and render inline in notebooks.
+    """
+
+    __slots__ = ('path', 'region', 'dpi')
+
+    def __init__(self, path, region=None, dpi=300):
+        """
+        Parameters:
+            path (str): Path of the screenshot file.
+            region (str, optional): Region rendered, as passed to IGV's `goto` (default: None).
+            dpi (int, optional): DPI used to size figures (default: 300).
+        """
+        self.path = path
+        self.region = region
+        self.dpi = dpi
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def image(self):
+        """
+        Decode the screenshot into a PIL image; the file is closed again before returning.
+        """
+        if not self.path.endswith('.png'):
+            raise ValueError(f"[ERROR] Only PNG screenshots can be decoded: {self.path}")
+        with Image.open(self.path) as image:
+            image.load()
+            return image
+
+    def array(self):
+        """
+        Decode the screenshot into an RGB uint8 array of shape (height, width, 3).
+        """
+        return np.asarray(self.image().convert('RGB'))
+
+    def figure(self):
+        """
+        Build a Matplotlib figure of the screenshot, sized as `load_screenshots` sizes its figures.
+
+        The figure is not registered with pyplot, so it is freed once the caller drops it
+        instead of being held until `plt.close`.
+        """
+        image = self.image()
+        width, height = image.size
+        fig = Figure(figsize=(width / self.dpi, height / self.dpi), dpi=self.dpi)
+        ax = fig.add_subplot()
+        ax.imshow(image)
+        ax.axis("off")
+        return fig
+
+    def _repr_png_(self):
+        if self.path.endswith('.png'):
+            with open(self.path, 'rb') as f:
+                return f.read()
+        return None
+
+    def __fspath__(self):
+        return self.path
+
+    def __eq__(self, other):
+        return isinstance(other, Screenshot) and (self.path, self.region) == (other.path, other.region)
+
+    def __hash__(self):
+        return hash((self.path, self.region))
+
+    def __repr__(self):
+        return f"Screenshot({self.path!r}, region={self.region!r})"
+
+
+def stack_screenshots(png_paths, memmap_path=None):
+    """
+    Decode PNG screenshots into one RGB uint8 array of shape (n, height, width, 3).
+
+    Screenshots smaller than the largest one are padded with white at the bottom and right.
+    With `memmap_path`, the array is a memory-mapped `.npy` file that is filled one screenshot
+    at a time, so only one decoded image is held in memory; reopen it later with
+    `numpy.load(memmap_path, mmap_mode='r')`.
+
+    Parameters:
+        png_paths (list of str): Paths of the PNG screenshots.
+        memmap_path (str, optional): `.npy` file to write the array to (default: None, in memory).
+
+    Returns:
+        numpy.ndarray or numpy.memmap: The stacked screenshots, in the order of `png_paths`.
+    """
+    sizes = []
+    for png_path in png_paths:
+        with Image.open(png_path) as image:  # reads the header only
+            sizes.append(image.size)
+    width = max((size[0] for size in sizes), default=0)
+    height = max((size[1] for size in sizes), default=0)
+    shape = (len(png_paths), height, width, 3)
+    if memmap_path is not None:
+        stack = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=np.uint8, shape=shape)
+    else:
+        stack = np.empty(shape, dtype=np.uint8)
+    for i, (png_path, (w, h)) in enumerate(zip(png_paths, sizes)):
+        with Image.open(png_path) as image:
+            stack[i, :h, :w] = np.asarray(image.convert('RGB'))
+        stack[i, h:] = 255
+        stack[i, :h, w:] = 255
+    if memmap_path is not None:
+        stack.flush()
+    return stack
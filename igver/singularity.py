@@ -0,0 +1,148 @@
+import atexit
+import os
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+
+
+class SingularityInstance:
+    """
+    A named `singularity instance` that IGV runs are executed in with `singularity exec instance://<name>`.
+
+    Starting the instance resolves the image and sets up the container namespaces once;
+    every later IGV run only pays for `exec`. Bind paths are fixed when the instance starts.
+    """
+
+    def __init__(self, image, singularity_args='', name=None, debug=False):
+        """
+        Parameters:
+            image (str): singularity image path (e.g. "docker://sahuno/igver:latest" or a .sif file).
+            singularity_args (str, optional): singularity arguments string, e.g. "-B /home -B /data".
+            name (str, optional): Instance name (default: generated from the PID).
+            debug (bool, optional): Whether to show logs for debugging (default: False).
+        """
+        self.image = image
+        self.singularity_args = singularity_args
+        self.name = name or f'igver_{os.getpid()}_{uuid.uuid4().hex[:8]}'
+        self.debug = debug
+        self.binds, self.options = _parse_singularity_args(singularity_args)
+        self.running = False
+
+    @property
+    def uri(self):
+        return f'instance://{self.name}'
+
+    def start(self):
+        """
+        Start the instance if it is not running yet.
+        """
+        if self.running:
+            return self
+        cmd = f'singularity instance start {self.singularity_args} {self.image} {self.name}'
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Starting singularity instance:\n{cmd}")
+        result = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"[ERROR:{time.ctime()}] Failed to start singularity instance {self.name}: "
+                               f"{result.stderr.decode().strip()}")
+        self.running = True
+        return self
+
+    def stop(self):
+        """
+        Stop the instance.
+        """
+        if not self.running:
+            return
+        subprocess.run(f'singularity instance stop {self.name}', shell=True,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.running = False
+        if self.debug:
+            print(f"[LOG:{time.ctime()}] Stopped singularity instance {self.name}")
+
+    def covers(self, image, singularity_args):
+        """
+        Whether this instance runs `image` with the same options and binds covering `singularity_args`.
+        """
+        binds, options = _parse_singularity_args(singularity_args)
+        return image == self.image and options == self.options and \
+            all(_bind_covered(bind, self.binds) for bind in binds)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def _parse_singularity_args(singularity_args):
+    """
+    Split a singularity arguments string into a set of bind specs and a tuple of other options
+    """
+    binds = set()
+    options = []
+    tokens = shlex.split(singularity_args or '')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('-B', '--bind') and i + 1 < len(tokens):
+            binds.update(filter(None, tokens[i + 1].split(',')))
+            i += 2
+            continue
+        if token.startswith('--bind='):
+            binds.update(filter(None, token.split('=', 1)[1].split(',')))
+        else:
+            options.append(token)
+        i += 1
+    return binds, tuple(options)
+
+
+def _bind_covered(bind, binds):
+    """
+    A bind is covered if it is present, or if it is a plain path below a plain bound directory
+    """
+    if bind in binds:
+        return True
+    if ':' in bind:
+        return False
+    path = os.path.normpath(bind)
+    for bound in binds:
+        if ':' in bound:
+            continue
+        bound = os.path.normpath(bound)
+        if path == bound or path.startswith(bound.rstrip('/') + '/'):
+            return True
+    return False
+
+
+_instances = []
+_instances_lock = threading.Lock()
+
+
+def get_singularity_instance(image, singularity_args='', debug=False):
+    """
+    Return a running session instance whose binds cover `singularity_args`, starting one if needed.
+
+    Instances started here are stopped when the interpreter exits.
+    """
+    with _instances_lock:
+        for instance in _instances:
+            if instance.running and instance.covers(image, singularity_args):
+                return instance
+        instance = SingularityInstance(image, singularity_args, debug=debug).start()
+        if not _instances:
+            atexit.register(stop_singularity_instances)
+        _instances.append(instance)
+        return instance
+
+
+def stop_singularity_instances():
+    """
+    Stop all instances started by `get_singularity_instance`.
+    """
+    with _instances_lock:
+        for instance in _instances:
+            instance.stop()
+        del _instances[:]
@@ -9,6 +9,7 @@ setup(
     },
     install_requires=[
         'matplotlib',
+        'numpy',
         'Pillow',
         'PyYAML',
         'subprocess32; python_version<"3.5"',  # Optional: subprocess fix for older Python versions
@@ -0,0 +1,112 @@
+import os
+import stat
+import sys
+import pytest
+
+# Stand-in for igv.sh: executes the snapshot commands of a batch script.
+# Loci listed in FAKE_IGV_FAIL (comma-separated) are skipped, as if IGV failed on them.
+# At a locus listed in FAKE_IGV_CRASH, IGV exits with an error, leaving the rest of the batch unrendered.
+# Every invocation appends its DISPLAY and batch script contents to FAKE_IGV_LOG.
+# FAKE_IGV_SLEEP delays startup by that many seconds.
+# With FAKE_IGV_MIN_HEAP_MB, IGV runs out of memory unless $HOME/.igv/java_arguments sets at least that -Xmx.
+# FAKE_IGV_PREFS_LOG gets the --igvDirectory of every invocation and the prefs.properties found there.
+FAKE_IGV = '''#!{python}
+import os
+import sys
+import time
+from PIL import Image
+
+time.sleep(float(os.environ.get('FAKE_IGV_SLEEP', '0')))
+min_heap = int(os.environ.get('FAKE_IGV_MIN_HEAP_MB', '0'))
+heap = 8192
+java_arguments = os.path.join(os.environ.get('HOME', ''), '.igv', 'java_arguments')
+if min_heap and os.path.exists(java_arguments):
+    with open(java_arguments) as f:
+        heap = int(f.read().strip()[len('-Xmx'):-1])
+args = sys.argv[1:]
+batch = args[args.index('-b') + 1]
+fail = set(filter(None, os.environ.get('FAKE_IGV_FAIL', '').split(',')))
+crash = set(filter(None, os.environ.get('FAKE_IGV_CRASH', '').split(',')))
+with open(batch) as f:
+    lines = [line.strip() for line in f if line.strip()]
+log = os.environ.get('FAKE_IGV_LOG')
+if log:
+    with open(log, 'a') as f:
+        f.write('display ' + os.environ.get('DISPLAY', '') + '\\n')
+        f.write('\\n'.join(lines) + '\\n---\\n')
+prefs_log = os.environ.get('FAKE_IGV_PREFS_LOG')
+if prefs_log:
+    igv_directory = args[args.index('--igvDirectory') + 1]
+    prefs = os.path.join(igv_directory, 'prefs.properties')
+    with open(prefs_log, 'a') as f:
+        f.write('igvDirectory ' + igv_directory + '\\n')
+        if os.path.exists(prefs):
+            with open(prefs) as p:
+                f.write(p.read())
+        f.write('---\\n')
+if heap < min_heap:
+    sys.stderr.write('java.lang.OutOfMemoryError: Java heap space\\n')
+    sys.exit(1)
+snapshot_dir = '.'
+locus = None
+for line in lines:
+    name, _, arg = line.partition(' ')
+    if name == 'snapshotDirectory':
+        snapshot_dir = arg
+    elif name == 'goto':
+        locus = arg
+        if locus in crash:
+            sys.stderr.write('java.lang.OutOfMemoryError at ' + locus + '\\n')
+            sys.exit(1)
+    elif name == 'snapshot' and locus not in fail:
+        path = os.path.join(snapshot_dir, arg)
+        if path.endswith('.svg'):
+            with open(path, 'w') as out:
+                out.write('<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20"></svg>')
+        else:
+            Image.new('RGB', (40, 20), 'white').save(path)
+'''
+
+# Stand-in for Xvfb: reports display 42 on the -displayfd descriptor and waits to be killed.
+FAKE_XVFB = '''#!{python}
+import os
+import sys
+import time
+
+args = sys.argv[1:]
+os.write(int(args[args.index('-displayfd') + 1]), b'42\\n')
+time.sleep(3600)
+'''
+
+# Stand-in for xvfb-run: drops its own --options and runs the wrapped command.
+FAKE_XVFB_RUN = '''#!/bin/sh
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --*) shift ;;
+        *) break ;;
+    esac
+done
+exec "$@"
+'''
+
+
+def _write_executable(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def fake_igv(tmp_path, monkeypatch):
+    """Install a fake IGV, Xvfb and xvfb-run; returns the fake IGV directory"""
+    bin_dir = tmp_path / "bin"
+    igv_dir = tmp_path / "IGV"
+    bin_dir.mkdir()
+    igv_dir.mkdir()
+    _write_executable(bin_dir / "xvfb-run", FAKE_XVFB_RUN)
+    _write_executable(bin_dir / "Xvfb", FAKE_XVFB.format(python=sys.executable))
+    _write_executable(igv_dir / "igv.sh", FAKE_IGV.format(python=sys.executable))
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_IGV_LOG", str(tmp_path / "igv.log"))
+    monkeypatch.setenv("IGVER_IN_CONTAINER", "1")
+    return igv_dir
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import zipfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.archive import HashedDirectories, ShardArchive
+
+
+class TestArchiveSinks:
+    """Test packing screenshots into shard archives or hashed directories as they are rendered"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def screenshots(self, temp_dir):
+        paths = []
+        for i in range(5):
+            path = os.path.join(temp_dir, f"chr1-{i}000-{i}500.png")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(100 + i))
+            paths.append(path)
+        return paths
+
+    def _content(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @pytest.mark.parametrize("archive_format", ["zip", "tar"])
+    def test_shards_and_index(self, temp_dir, screenshots, archive_format):
+        """Test that shards hold shard_size screenshots and the index reads any of them back"""
+        archive_dir = os.path.join(temp_dir, "archive")
+        archive = ShardArchive(archive_dir, archive_format, shard_size=2)
+        for path in screenshots:
+            archive(path)
+        # Readable through the index before the shard is finished
+        assert archive.read(os.path.basename(screenshots[4])) == self._content(screenshots[4])
+        archive.finish()
+
+        shards = sorted(name for name in os.listdir(archive_dir) if name != "igver_index.tsv")
+        assert shards == [f"igver-0000{i}.{archive_format}" for i in range(3)]
+        if archive_format == 'zip':
+            with zipfile.ZipFile(os.path.join(archive_dir, shards[0])) as shard:
+                assert shard.namelist() == [os.path.basename(path) for path in screenshots[:2]]
+        else:
+            with tarfile.open(os.path.join(archive_dir, shards[0])) as shard:
+                assert shard.getnames() == [os.path.basename(path) for path in screenshots[:2]]
+
+        reopened = ShardArchive(archive_dir, archive_format)
+        for path in screenshots:
+            assert reopened.read(os.path.basename(path)) == self._content(path)
+        reopened(screenshots[0])
+        reopened.finish()
+        assert os.path.exists(os.path.join(archive_dir, f"igver-00003.{archive_format}"))
+
+    def test_hashed_directories(self, temp_dir, screenshots):
+        """Test that screenshots are linked into two levels of hashed subdirectories"""
+        root = os.path.join(temp_dir, "hashed")
+        sink = HashedDirectories(root)
+        for path in screenshots:
+            sink(path)
+        target = sink.path_for(os.path.basename(screenshots[0]))
+        assert os.path.relpath(target, root).count(os.sep) == 2
+        assert os.path.samefile(target, screenshots[0])
+        assert sink.read(os.path.basename(screenshots[3])) == self._content(screenshots[3])
+
+    def test_load_screenshots_sink(self, fake_igv, temp_dir):
+        """Test that every screenshot of a parallel run reaches the sink"""
+        regions = ["chr2:1000-1500", "chr1:1000-1500", "chr1:5000-5500"]
+        archive = ShardArchive(os.path.join(temp_dir, "archive"))
+        paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                       workers=2, return_type='path', sink=archive)
+        archive.finish()
+        for path in paths:
+            assert archive.read(os.path.basename(path)) == self._content(path)
+
+    def test_cli_archive(self, fake_igv, temp_dir):
+        """Test that the CLI leaves shards and an index instead of one file per region"""
+        bam = os.path.join(temp_dir, "test.bam")
+        for path in (bam, bam + ".bai"):
+            with open(path, 'w'):
+                pass
+        output_dir = os.path.join(temp_dir, "out")
+        result = subprocess.run([sys.executable, "-m", "igver.cli", "-i", bam, "-r", "chr1:1000-1500", "chr1:5000-5500",
+                                 "-o", output_dir, "--igv-dir", str(fake_igv), "--no-singularity", "--archive", "zip"],
+                                capture_output=True, text=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        assert result.returncode == 0, result.stderr
+        assert sorted(name for name in os.listdir(output_dir) if not name.startswith('.')) == \
+            ["igver-00000.zip", "igver_index.tsv"]
+        with zipfile.ZipFile(os.path.join(output_dir, "igver-00000.zip")) as shard:
+            assert sorted(shard.namelist()) == ["chr1-1000-1500.png", "chr1-5000-5500.png"]
+
+        # A resumed run would not see the archived screenshots and archive them again
+        result = subprocess.run([sys.executable, "-m", "igver.cli", "-i", bam, "-r", "chr1:1000-1500",
+                                 "-o", output_dir, "--igv-dir", str(fake_igv), "--no-singularity", "--archive", "zip",
+                                 "--resume"],
+                                capture_output=True, text=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        assert result.returncode == 2
+        assert "--archive cannot be combined with --resume" in result.stderr
+        assert not os.path.exists(os.path.join(output_dir, "igver-00001.zip"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
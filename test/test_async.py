@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import igver
+from igver import aio
+
+
+class TestAsyncAPI:
+    """Test the asyncio entry points"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def test_concurrent_renders_on_one_loop(self, fake_igv, temp_dir, monkeypatch):
+        """Test that several renders overlap on a single event loop"""
+        monkeypatch.setenv('FAKE_IGV_SLEEP', '1')
+
+        async def render_all():
+            return await asyncio.gather(*(
+                igver.load_screenshots_async(["test.bam"], [f"chr{i}:1000-2000"], output_dir=temp_dir,
+                                             igv_dir=str(fake_igv), output_format='svg')
+                for i in range(1, 5)))
+
+        start = time.time()
+        results = asyncio.run(render_all())
+        assert time.time() - start < 3
+        assert [os.path.basename(paths[0]) for paths in results] == \
+            [f"chr{i}-1000-2000.svg" for i in range(1, 5)]
+
+    def test_timeout_kills_igv(self, fake_igv, temp_dir, monkeypatch):
+        """Test that a run exceeding the timeout is killed"""
+        monkeypatch.setenv('FAKE_IGV_SLEEP', '30')
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], ["chr1:1000-2000"], temp_dir)
+
+        start = time.time()
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(igver.run_igv_async(batch_script, output_paths, igv_dir=str(fake_igv), timeout=0.5))
+        assert time.time() - start < 5
+
+    def test_cancellation_kills_igv(self, fake_igv, temp_dir, monkeypatch):
+        """Test that cancelling the task stops the render"""
+        monkeypatch.setenv('FAKE_IGV_SLEEP', '30')
+
+        async def cancel_render():
+            task = asyncio.ensure_future(igver.load_screenshots_async(
+                ["test.bam"], ["chr1:1000-2000"], output_dir=temp_dir, igv_dir=str(fake_igv)))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.time()
+        asyncio.run(cancel_render())
+        assert time.time() - start < 5
+
+    def test_png_figures_decoded_off_loop(self, fake_igv, temp_dir, monkeypatch):
+        """Test that PNGs are decoded in the executor and only wrapped into figures on the loop"""
+        decode_threads = []
+        original = aio._decode_pngs
+
+        def decode_pngs(*args):
+            decode_threads.append(threading.current_thread())
+            return original(*args)
+
+        monkeypatch.setattr(aio, '_decode_pngs', decode_pngs)
+        figures = asyncio.run(igver.load_screenshots_async(["test.bam"], ["chr1:1000-2000"], output_dir=temp_dir,
+                                                           igv_dir=str(fake_igv), dpi=10))
+
+        assert decode_threads and decode_threads[0] is not threading.main_thread()
+        assert [tuple(fig.get_size_inches()) for fig in figures] == [(4.0, 2.0)]
+        assert not os.path.exists(os.path.join(temp_dir, "chr1-1000-2000.png"))
+
+    def test_unsupported_parameters(self, temp_dir):
+        """Test that parameters of load_screenshots the async path lacks are rejected by name"""
+        with pytest.raises(ValueError, match="does not support isolate_failures, sink"):
+            asyncio.run(igver.load_screenshots_async(["test.bam"], ["chr1:1000-2000"], output_dir=temp_dir,
+                                                     isolate_failures=True, sink=print))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
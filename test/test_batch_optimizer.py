@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+
+
+def _read_lines(batch_script):
+    with open(batch_script) as f:
+        return f.read().split('\n')
+
+
+class TestBatchOptimizer:
+    """Test hoisting invariant commands and ordering regions by genomic position"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return ["chr10:500-600", "chr2:900-1000", "chrX:100-200", "chr2:100-200", "chr1:1,000-2,000"]
+
+    def test_invariant_commands_sent_once(self, temp_dir, regions):
+        """Test that display mode, panel height and igv_config preferences are hoisted"""
+        igv_config = os.path.join(temp_dir, "prefs.batch")
+        with open(igv_config, 'w') as f:
+            f.write("colorBy TAG HP\nsort base\ngroup TAG HP")
+        batch_script, _ = igver.create_batch_script(["test.bam"], regions, temp_dir, max_panel_height=300,
+                                                    overlap_display='collapse', igv_config=igv_config)
+        lines = _read_lines(batch_script)
+
+        header = lines[:lines.index(next(line for line in lines if line.startswith('goto')))]
+        assert header[-4:] == ['collapse', 'maxPanelHeight 300', 'colorBy TAG HP', 'group TAG HP']
+        for command in ('collapse', 'maxPanelHeight 300', 'colorBy TAG HP', 'group TAG HP'):
+            assert lines.count(command) == 1
+        # `sort` depends on the locus, so it follows every goto
+        assert lines.count('sort base') == len(regions)
+        for i, line in enumerate(lines):
+            if line.startswith('goto'):
+                assert lines[i + 1:i + 3] == ['sort base', f"snapshot {line[5:].replace(':', '-')}.png"]
+
+    def test_regions_sorted_by_position(self, temp_dir, regions):
+        """Test that snapshots follow the genome while paths keep the caller's order"""
+        batch_script, png_paths = igver.create_batch_script(["test.bam"], regions + ["EGFR"], temp_dir)
+        gotos = [line for line in _read_lines(batch_script) if line.startswith('goto')]
+
+        assert gotos == ['goto chr1:1,000-2,000', 'goto chr2:100-200', 'goto chr2:900-1000',
+                         'goto chr10:500-600', 'goto chrX:100-200', 'goto EGFR']
+        assert [os.path.basename(path) for path in png_paths] == \
+            [region.replace(':', '-') + '.png' for region in regions + ["EGFR"]]
+
+    def test_optimize_off_keeps_layout(self, temp_dir, regions):
+        """Test that optimize=False writes one block per region in input order"""
+        batch_script, _ = igver.create_batch_script(["test.bam"], regions, temp_dir, optimize=False)
+        lines = _read_lines(batch_script)
+
+        assert [line for line in lines if line.startswith('goto')] == [f'goto {region}' for region in regions]
+        assert lines.count('maxPanelHeight 200') == len(regions)
+
+    def test_shards_follow_genomic_order(self, fake_igv, temp_dir, regions):
+        """Test that workers get genomic shards and outputs come back in caller order"""
+        output_paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir,
+                                              igv_dir=str(fake_igv), output_format='svg', workers=2)
+
+        assert [os.path.basename(path) for path in output_paths] == \
+            [region.replace(':', '-') + '.svg' for region in regions]
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            runs = [run.split('\n') for run in f.read().split('---')[:-1]]
+        gotos = {tuple(line for line in run if line.startswith('goto')) for run in runs}
+        assert gotos == {('goto chr1:1,000-2,000', 'goto chr2:100-200', 'goto chr2:900-1000'),
+                         ('goto chr10:500-600', 'goto chrX:100-200')}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.process import IGVProcess, _process_group_rss
+
+
+def _igv_runs():
+    with open(os.environ['FAKE_IGV_LOG']) as f:
+        return [run.strip().split('\n') for run in f.read().split('---')[:-1]]
+
+
+class TestChunkedBatches:
+    """Test bounding IGV memory with fixed-size chunks and memory-based restarts"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 6)]
+
+    def test_run_igv_in_chunks(self, fake_igv, temp_dir, regions):
+        """Test that each IGV process renders at most max_snapshots_per_batch screenshots"""
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir)
+        igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), max_snapshots_per_batch=2)
+
+        assert all(os.path.exists(path) for path in output_paths)
+        runs = _igv_runs()
+        assert [sum(line.startswith('goto') for line in run) for run in runs] == [2, 2, 1]
+        for run in runs:
+            assert 'load test.bam' in run
+        assert not os.path.exists(batch_script)
+
+    def test_load_screenshots_in_chunks(self, fake_igv, temp_dir, regions):
+        """Test that chunking is applied per worker batch"""
+        output_paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                              output_format='svg', workers=2, max_snapshots_per_batch=2)
+
+        assert len(output_paths) == len(regions)
+        assert sorted(sum(line.startswith('goto') for line in run) for run in _igv_runs()) == [1, 2, 2]
+
+    def test_process_group_rss(self):
+        """Test that the resident memory of this process group is measured"""
+        if not os.path.isdir('/proc'):
+            pytest.skip("/proc is not available")
+        assert _process_group_rss(os.getpgid(0)) > 0
+
+    def test_recycle_on_memory_limit(self, temp_dir):
+        """Test that IGV is stopped after a snapshot once over the memory limit"""
+        first = os.path.join(temp_dir, "first.svg")
+        second = os.path.join(temp_dir, "second.svg")
+        cmd = f"echo '<svg></svg>' > {first}; echo '<svg>' > {second}; sleep 30"
+        igv_process = IGVProcess(cmd, [first, second], poll_interval=0.05, max_rss_mb=1e-6)
+        start = time.time()
+        try:
+            assert list(igv_process.snapshots()) == [first]
+        finally:
+            igv_process.close()
+
+        assert igv_process.recycled
+        assert time.time() - start < 10
+        assert igv_process.returncode is not None
+        # The partially written snapshot is removed so it gets rendered again
+        assert not os.path.exists(second)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
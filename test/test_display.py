@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.display import XvfbDisplayManager
+
+
+class TestXvfbDisplayManager:
+    """Test the shared Xvfb display pool"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def test_display_reported_by_server(self, fake_igv):
+        """Test that the display number comes from -displayfd"""
+        with XvfbDisplayManager(n_displays=2) as manager:
+            assert manager.displays == [':42', ':42']
+            with manager.acquire() as display:
+                assert display == ':42'
+            processes = [server[0] for server in manager._servers]
+        assert all(process.poll() is not None for process in processes)
+
+    def test_dead_server_is_restarted(self, fake_igv):
+        """Test that acquire replaces an Xvfb server that exited"""
+        with XvfbDisplayManager() as manager:
+            first = manager._servers[0][0]
+            first.kill()
+            first.wait()
+            with manager.acquire():
+                assert manager._servers[0][0] is not first
+
+    def test_igv_runs_on_shared_display(self, fake_igv, temp_dir):
+        """Test that IGV runs reuse the managed display instead of xvfb-run"""
+        regions = ["chr1:1000-2000", "chr2:3000-4000"]
+        with XvfbDisplayManager() as manager:
+            igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                   output_format='svg', workers=2, display_manager=manager)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            displays = [line for line in f.read().splitlines() if line.startswith('display ')]
+        assert displays == ['display :42', 'display :42']
+
+    def test_command_without_display_uses_xvfb_run(self):
+        """Test the default command still wraps IGV with xvfb-run"""
+        cmd = igver._igv_command('-b run.batch', '/opt/IGV', 'image', '', False)
+        assert cmd.startswith('xvfb-run ')
+        cmd = igver._igv_command('-b run.batch', '/opt/IGV', 'image', '', False, display=':7')
+        assert cmd.startswith('env DISPLAY=:7 /opt/IGV/igv.sh -b run.batch')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import socketserver
+import tempfile
+import threading
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.engine import IGVEngine
+
+
+class FakeBatchPortHandler(socketserver.StreamRequestHandler):
+    """Replies like IGV's batch port and writes an empty file for each snapshot"""
+
+    def handle(self):
+        snapshot_dir = None
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            self.server.commands.append(command)
+            name, _, arg = command.partition(' ')
+            if name == 'snapshotDirectory':
+                snapshot_dir = arg
+            elif name == 'snapshot':
+                with open(os.path.join(snapshot_dir, arg), 'w') as f:
+                    f.write('fake')
+            elif name == 'goto' and arg.startswith('bad'):
+                self.wfile.write(b'Error: cannot find feature or locus\n')
+                continue
+            self.wfile.write(b'OK\n')
+
+
+class TestIGVEngine:
+    """Test the batch-port client against a fake IGV server"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def fake_server(self):
+        """Start a fake batch-port server on a free local port"""
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeBatchPortHandler)
+        server.daemon_threads = True
+        server.commands = []
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    def test_run_batch_creates_snapshots(self, fake_server, temp_dir):
+        """Test that goto/snapshot commands are streamed and outputs checked"""
+        batch_script, output_paths = igver.create_batch_script(
+            ["test.bam"], ["chr1:1000-2000", "chr2:3000-4000"], temp_dir)
+        engine = IGVEngine.attach(port=fake_server.server_address[1])
+        engine.run_batch(batch_script, output_paths)
+        engine.close()
+
+        assert all(os.path.exists(path) for path in output_paths)
+        assert 'exit' not in fake_server.commands
+        assert 'goto chr1:1000-2000' in fake_server.commands
+        assert not os.path.exists(batch_script)
+
+    def test_session_reused_for_same_tracks(self, fake_server, temp_dir):
+        """Test that genome and tracks are not reloaded for a repeated session"""
+        engine = IGVEngine.attach(port=fake_server.server_address[1])
+        for region in ["chr1:1000-2000", "chr2:3000-4000"]:
+            batch_script, output_paths = igver.create_batch_script(["test.bam"], [region], temp_dir)
+            engine.run_batch(batch_script, output_paths)
+        engine.close()
+
+        assert fake_server.commands.count('load test.bam') == 1
+        assert fake_server.commands.count('genome hg19') == 1
+        assert fake_server.commands.count('new') == 1
+
+    def test_error_reply_raises(self, fake_server, temp_dir):
+        """Test that an IGV error reply is surfaced"""
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], ["bad_locus"], temp_dir)
+        engine = IGVEngine.attach(port=fake_server.server_address[1])
+        with pytest.raises(RuntimeError, match="IGV command failed"):
+            engine.run_batch(batch_script, output_paths)
+        engine.close()
+
+    def test_load_screenshots_with_engine(self, fake_server, temp_dir):
+        """Test that load_screenshots routes through a running engine"""
+        engine = IGVEngine.attach(port=fake_server.server_address[1])
+        output_paths = igver.load_screenshots(["test.bam"], ["chr1:1000-2000"], output_dir=temp_dir,
+                                              output_format='svg', engine=engine)
+        engine.close()
+
+        assert len(output_paths) == 1
+        assert os.path.exists(output_paths[0])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os
+import stat
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import image
+from igver.image import parse_docker_reference, resolve_image
+
+DIGEST = 'sha256:' + 'ab' * 32
+
+# Stand-in for singularity: `pull --force <dest> <uri>` writes the URI to <dest>
+FAKE_SINGULARITY = '''#!/bin/sh
+echo "$@" >> "$FAKE_SINGULARITY_LOG"
+echo "$4" > "$3"
+'''
+
+
+class TestSIFCache:
+    """Test the digest-addressed SIF image cache"""
+
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        return str(tmp_path / "sif")
+
+    @pytest.fixture
+    def fake_singularity(self, tmp_path, monkeypatch):
+        """Install a fake singularity that records pulls"""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        path = bin_dir / "singularity"
+        path.write_text(FAKE_SINGULARITY)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        log = tmp_path / "singularity.log"
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        monkeypatch.setenv("FAKE_SINGULARITY_LOG", str(log))
+        return log
+
+    def test_parse_docker_reference(self):
+        """Test registry, repository and tag parsing"""
+        assert parse_docker_reference('docker://sahuno/igver:latest') == \
+            ('registry-1.docker.io', 'sahuno/igver', 'latest')
+        assert parse_docker_reference('docker://ubuntu') == ('registry-1.docker.io', 'library/ubuntu', 'latest')
+        assert parse_docker_reference('docker://ghcr.io/org/igver:1.1') == ('ghcr.io', 'org/igver', '1.1')
+        assert parse_docker_reference(f'docker://localhost:5000/igver@{DIGEST}') == \
+            ('localhost:5000', 'igver', DIGEST)
+
+    def test_non_docker_image_unchanged(self, cache_dir):
+        """Test that local SIF paths are passed through"""
+        assert resolve_image('/images/igver.sif', cache_dir=cache_dir) == '/images/igver.sif'
+
+    def test_pull_once_then_reuse(self, cache_dir, fake_singularity, monkeypatch):
+        """Test that a digest is pulled once and served from the cache afterwards"""
+        monkeypatch.setattr(image, '_registry_digest', lambda *args, **kwargs: DIGEST)
+        first = resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir)
+        second = resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir)
+
+        assert first == second == os.path.join(cache_dir, 'sha256-' + 'ab' * 32 + '.sif')
+        with open(fake_singularity) as f:
+            pulls = f.read().splitlines()
+        assert len(pulls) == 1
+        assert pulls[0].endswith(f'docker://sahuno/igver@{DIGEST}')
+
+    def test_offline_uses_recorded_digest(self, cache_dir, fake_singularity, monkeypatch):
+        """Test that a cached image resolves without the registry"""
+        monkeypatch.setattr(image, '_registry_digest', lambda *args, **kwargs: DIGEST)
+        sif_path = resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir)
+
+        def unreachable(*args, **kwargs):
+            raise OSError("network is unreachable")
+        monkeypatch.setattr(image, '_registry_digest', unreachable)
+        assert resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir) == sif_path
+        assert resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir, offline=True) == sif_path
+
+    def test_offline_without_cache_raises(self, cache_dir):
+        """Test a clear error when nothing is cached and the registry is unavailable"""
+        with pytest.raises(RuntimeError, match="igver image prefetch"):
+            resolve_image('docker://sahuno/igver:latest', cache_dir=cache_dir, offline=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.convert import PDFConverter
+
+
+class TestPDFConversion:
+    """Test converting SVG screenshots to PDF in a process pool while IGV renders"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return ["chr1:1000-1500", "chr1:5000-5500", "chr2:1000-1500"]
+
+    def test_missing_cairosvg_fails_before_igv_starts(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that PDF output without cairosvg is rejected before rendering"""
+        monkeypatch.setattr(igver, "HAS_CAIROSVG", False)
+        with pytest.raises(ImportError, match="cairosvg is required"):
+            igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                   output_format='pdf')
+        with pytest.raises(ImportError, match="cairosvg is required"):
+            next(igver.iter_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                        output_format='pdf'))
+        assert not os.path.exists(os.environ['FAKE_IGV_LOG'])
+
+    @pytest.mark.skipif(not igver.HAS_CAIROSVG, reason="cairosvg not installed")
+    def test_load_screenshots_pdf(self, fake_igv, temp_dir, regions):
+        """Test that every SVG is converted, in region order, and removed"""
+        pdf_paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                           output_format='pdf', workers=2, pdf_workers=2)
+        assert [os.path.basename(path) for path in pdf_paths] == \
+            [region.replace(':', '-') + '.pdf' for region in regions]
+        assert all(os.path.exists(path) for path in pdf_paths)
+        assert not any(name.endswith('.svg') for name in os.listdir(temp_dir))
+
+    @pytest.mark.skipif(not igver.HAS_CAIROSVG, reason="cairosvg not installed")
+    def test_iter_screenshots_pdf(self, fake_igv, temp_dir, regions):
+        """Test that streamed PDFs keep batch order"""
+        results = list(igver.iter_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                              output_format='pdf', pdf_workers=2))
+        assert sorted(region for region, _ in results) == sorted(regions)
+        assert all(path.endswith('.pdf') and os.path.exists(path) for _, path in results)
+
+    @pytest.mark.skipif(not igver.HAS_CAIROSVG, reason="cairosvg not installed")
+    def test_failures_are_reported_per_file(self, temp_dir):
+        """Test that a broken SVG is reported by name after the others are converted"""
+        good = os.path.join(temp_dir, "good.svg")
+        bad = os.path.join(temp_dir, "bad.svg")
+        with open(good, 'w') as f:
+            f.write('<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20"></svg>')
+        with open(bad, 'w') as f:
+            f.write('<svg')
+        with PDFConverter(workers=2) as converter:
+            converter.submit(good)
+            with pytest.raises(RuntimeError, match="1 of 2 SVG files") as error:
+                converter.convert([good, bad])
+        assert bad in str(error.value)
+        assert os.path.exists(os.path.join(temp_dir, "good.pdf"))
+
+    def test_close_cancels_pending(self, temp_dir):
+        """Test that closing the converter drops the conversions that have not started"""
+        converter = PDFConverter(workers=1)
+        futures = []
+        for i in range(20):
+            svg_path = os.path.join(temp_dir, f"{i}.svg")
+            with open(svg_path, 'w') as f:
+                f.write('<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20"></svg>')
+            futures.append(converter.submit(svg_path))
+        converter.close()
+        assert all(future.done() for future in futures)
+        assert any(future.cancelled() for future in futures)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.preflight import check_regions, check_tracks, load_chrom_sizes
+from igver.regions import RegionTable
+
+
+def _write_genome(genome_dir, genome="testGenome"):
+    """Genome JSON with its .fai and alias table cached in a subdirectory, as IGV leaves them"""
+    cache_dir = os.path.join(genome_dir, genome)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(genome_dir, f"{genome}.json"), 'w') as f:
+        json.dump({"id": genome, "fastaURL": f"https://example.org/{genome}.fa",
+                   "indexURL": f"https://example.org/{genome}.fa.fai",
+                   "aliasURL": f"https://example.org/{genome}_alias.tab"}, f)
+    with open(os.path.join(cache_dir, f"{genome}.fa.fai"), 'w') as f:
+        f.write("chr1\t10000\t6\t60\t61\nchr2\t5000\t10180\t60\t61\nchrM\t100\t15270\t60\t61\n")
+    with open(os.path.join(cache_dir, f"{genome}_alias.tab"), 'w') as f:
+        f.write("#sequence\talias\nchr1\tNC_000001\nchr2\tNC_000002\n")
+
+
+class TestPreflight:
+    """Test validating regions against chromosome sizes before IGV starts"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def genome_dir(self, temp_dir):
+        genome_dir = os.path.join(temp_dir, "genomes")
+        _write_genome(genome_dir)
+        return genome_dir
+
+    def test_load_chrom_sizes(self, genome_dir):
+        """Test that sizes are read with alias table and chr-prefix aliases"""
+        sizes = load_chrom_sizes("testGenome", [genome_dir])
+        assert sizes["chr1"] == 10000
+        assert sizes["NC_000002"] == 5000
+        assert sizes["2"] == 5000
+        assert sizes["MT"] == 100
+        assert load_chrom_sizes("otherGenome", [genome_dir]) is None
+
+    def test_check_regions(self, genome_dir):
+        """Test the reason reported for each kind of bad region"""
+        sizes = load_chrom_sizes("testGenome", [genome_dir])
+        table = RegionTable.from_region_strings(["chr1:100-200", "chrZ:1-2", "chr2:6000-7000", "chr1:300-200",
+                                                 "1:9000-12000", "chr1:1-2 chrZ:3-4", "EGFR"])
+        assert check_regions(table, sizes).tolist() == ['', 'unknown contig', 'start beyond contig end',
+                                                        'end before start', '', 'unknown contig', '']
+
+    def test_error_lists_bad_regions(self, temp_dir, genome_dir):
+        """Test that mode 'error' reports every bad region at once"""
+        with pytest.raises(ValueError) as error:
+            igver.create_batch_script(["test.bam"], ["chr1:100-200", "chrZ:1-2", "chr2:6000-7000"], temp_dir,
+                                      genome="testGenome", validate_regions='error', genome_dirs=[genome_dir])
+        assert "2 of 3 regions" in str(error.value)
+        assert "chrZ:1-2: unknown contig" in str(error.value)
+
+    def test_drop_bad_regions(self, temp_dir, genome_dir, capsys):
+        """Test that mode 'drop' leaves the bad regions out of the batch with a warning instead of a print"""
+        with pytest.warns(UserWarning, match="Dropping 1 of 2 regions"):
+            _, png_paths = igver.create_batch_script(["test.bam"], ["chr1:100-200", "chrZ:1-2"], temp_dir,
+                                                     genome="testGenome", validate_regions='drop',
+                                                     genome_dirs=[genome_dir])
+        assert [os.path.basename(path) for path in png_paths] == ["chr1-100-200.png"]
+        assert capsys.readouterr().out == ""
+
+    def test_drop_every_region(self, temp_dir, genome_dir):
+        """Test that mode 'drop' fails clearly when no region is valid, also across chunks"""
+        with pytest.raises(ValueError, match="No valid regions left after validation"):
+            igver.create_batch_script(["test.bam"], ["chrZ:1-2", "chr9:1-2"], temp_dir, genome="testGenome",
+                                      validate_regions='drop', genome_dirs=[genome_dir])
+        with pytest.raises(ValueError, match="No valid regions left after validation"):
+            list(igver._iter_batch_chunks(["test.bam"], ["chrZ:1-2", "chr9:1-2"], temp_dir, genome="testGenome",
+                                          chunk_size=1, validate_regions='drop', genome_dirs=[genome_dir]))
+        batches = list(igver._iter_batch_chunks(["test.bam"], ["chrZ:1-2", "chr9:1-2", "chr1:100-200"], temp_dir,
+                                                genome="testGenome", chunk_size=2, validate_regions='drop',
+                                                genome_dirs=[genome_dir]))
+        assert [[os.path.basename(path) for path in paths] for _, paths in batches] == [["chr1-100-200.png"]]
+
+    def test_unknown_genome_is_not_checked(self, temp_dir, genome_dir):
+        """Test that regions pass when no local size table exists"""
+        _, png_paths = igver.create_batch_script(["test.bam"], ["chrZ:1-2"], temp_dir, genome="hg19",
+                                                 validate_regions='error', genome_dirs=[genome_dir])
+        assert len(png_paths) == 1
+
+    def test_fails_before_igv_starts(self, fake_igv, temp_dir):
+        """Test that load_screenshots rejects bad regions without running IGV"""
+        _write_genome(os.path.join(str(fake_igv), "genomes"))
+        with pytest.raises(ValueError):
+            igver.load_screenshots(["test.bam"], ["chr1:100-200", "chr9:1-2"], output_dir=temp_dir,
+                                   genome="testGenome", igv_dir=str(fake_igv), output_format='svg')
+        assert not os.path.exists(os.environ['FAKE_IGV_LOG'])
+
+        output_paths = igver.load_screenshots(["test.bam"], ["chr1:100-200", "chr9:1-2"], output_dir=temp_dir,
+                                              genome="testGenome", igv_dir=str(fake_igv), output_format='svg',
+                                              validate_regions='drop')
+        assert [os.path.basename(path) for path in output_paths] == ["chr1-100-200.svg"]
+
+
+class TestTrackCheck:
+    """Test the concurrent check of tracks and their index files"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def _touch(self, path, mtime):
+        with open(path, 'w'):
+            pass
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_index_naming_conventions(self, temp_dir):
+        """Test that x.bam.bai, x.bai and x.cram.crai are all accepted"""
+        tracks = [self._touch(os.path.join(temp_dir, name), 1000) for name in ("a.bam", "b.bam", "c.cram", "d.bw")]
+        self._touch(os.path.join(temp_dir, "a.bam.bai"), 2000)
+        self._touch(os.path.join(temp_dir, "b.bai"), 2000)
+        self._touch(os.path.join(temp_dir, "c.cram.crai"), 2000)
+        assert check_tracks(tracks + ["https://example.org/remote.bam"]) == []
+
+    def test_aggregated_report(self, temp_dir):
+        """Test that missing tracks, missing indexes and stale indexes are all reported"""
+        unindexed = self._touch(os.path.join(temp_dir, "unindexed.bam"), 1000)
+        stale = self._touch(os.path.join(temp_dir, "stale.vcf.gz"), 2000)
+        self._touch(stale + ".tbi", 1000)
+        unindexed_vcf = self._touch(os.path.join(temp_dir, "small.vcf.gz"), 1000)
+        missing = os.path.join(temp_dir, "missing.bam")
+
+        problems = check_tracks([unindexed, stale, unindexed_vcf, missing], max_workers=4)
+        assert len(problems) == 3
+        assert problems[0].startswith(f"{unindexed}: index not found")
+        assert problems[1] == f"{stale}: index {stale}.tbi is older than the data file"
+        assert problems[2] == f"{missing} does not exist."
+        assert check_tracks([unindexed, stale, unindexed_vcf, missing], check_indexes=False) == \
+            [f"{missing} does not exist."]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
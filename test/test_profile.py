@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.aio import load_screenshots_async
+from igver.profile import IGVProfile
+
+
+def _igv_profiles(prefs_log):
+    """Return the --igvDirectory and preferences of every fake IGV run"""
+    with open(prefs_log) as f:
+        runs = [run.splitlines() for run in f.read().split('---\n') if run.strip()]
+    return [(run[0].split(maxsplit=1)[1], dict(line.split('=', 1) for line in run[1:])) for run in runs]
+
+
+class TestIGVProfile:
+    """Test the private headless IGV preferences directory of each IGV process"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def prefs_log(self, temp_dir, monkeypatch):
+        prefs_log = os.path.join(temp_dir, "prefs.log")
+        monkeypatch.setenv("FAKE_IGV_PREFS_LOG", prefs_log)
+        return prefs_log
+
+    def test_profile_contents(self, temp_dir):
+        """Test the preferences, genome list and genomes link of a profile"""
+        igv_dir = os.path.join(temp_dir, "IGV")
+        with IGVProfile(temp_dir, igv_dir, prefs={'SAM.MAX_VISIBLE_RANGE': '100'}) as profile_dir:
+            with open(os.path.join(profile_dir, "prefs.properties")) as f:
+                prefs = dict(line.rstrip('\n').split('=', 1) for line in f)
+            assert prefs['PORT_ENABLED'] == 'false'
+            assert prefs['GENOMES_SERVER_URL'] == os.path.join(profile_dir, "genomes_server.json")
+            assert prefs['SAM.MAX_VISIBLE_RANGE'] == '100'
+            assert os.readlink(os.path.join(profile_dir, "genomes")) == os.path.join(igv_dir, "genomes")
+            with open(os.path.join(profile_dir, "genomes_server.json")) as f:
+                assert f.read().strip() == '[]'
+        assert not os.path.exists(profile_dir)
+
+    def test_workers_get_separate_profiles(self, fake_igv, temp_dir, prefs_log):
+        """Test that parallel IGV processes run with their own profile, removed afterwards"""
+        output_dir = os.path.join(temp_dir, "out")
+        regions = [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 5)]
+        igver.load_screenshots(["test.bam"], regions, output_dir=output_dir, igv_dir=str(fake_igv),
+                               output_format='svg', workers=2)
+
+        profiles = _igv_profiles(prefs_log)
+        assert len(profiles) == 2
+        assert profiles[0][0] != profiles[1][0]
+        for igv_directory, prefs in profiles:
+            assert os.path.basename(igv_directory).startswith(".igver_profile-")
+            assert prefs['PORT_ENABLED'] == 'false'
+            assert not os.path.exists(igv_directory)
+
+    def test_shared_igv_directory(self, fake_igv, temp_dir, prefs_log):
+        """Test that igv_profile=False runs IGV with the installation directory"""
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], ["chr1:1000-1500"], temp_dir,
+                                                               output_format='svg')
+        igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), igv_profile=False)
+        assert _igv_profiles(prefs_log) == [(str(fake_igv), {})]
+
+    def test_async_profile(self, fake_igv, temp_dir, prefs_log):
+        """Test that the asyncio path runs IGV with its own profile and preference overrides"""
+        output_dir = os.path.join(temp_dir, "out")
+        asyncio.run(load_screenshots_async(["test.bam"], ["chr1:1000-1500"], output_dir=output_dir,
+                                           igv_dir=str(fake_igv), output_format='svg',
+                                           igv_profile={'SAM.MAX_VISIBLE_RANGE': '100'}))
+        [(igv_directory, prefs)] = _igv_profiles(prefs_log)
+        assert os.path.basename(igv_directory).startswith(".igver_profile-")
+        assert prefs['SAM.MAX_VISIBLE_RANGE'] == '100'
+        assert not os.path.exists(igv_directory)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.journal import Quarantine
+
+
+def _igv_runs():
+    """Return the batch scripts the fake IGV was run with, one list of lines per run"""
+    with open(os.environ['FAKE_IGV_LOG']) as f:
+        runs = f.read().split('---\n')
+    return [run.splitlines() for run in runs if run.strip()]
+
+
+class TestFailureIsolation:
+    """Test isolating the regions IGV crashes on by bisecting failing batches"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 9)]
+
+    def test_crashing_region_is_quarantined(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that one crashing locus is quarantined and every other region is rendered"""
+        monkeypatch.setenv("FAKE_IGV_CRASH", regions[2])
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir, output_format='svg')
+        rendered = igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), isolate_failures=True)
+
+        assert rendered == output_paths[:2] + output_paths[3:]
+        assert not os.path.exists(output_paths[2])
+        locus, returncode, stderr = Quarantine(temp_dir).entries()[os.path.basename(output_paths[2])]
+        assert locus == regions[2]
+        assert returncode == '1'
+        assert f'OutOfMemoryError at {regions[2]}' in stderr
+        # 2 regular runs, then [3 4 5] [3 4] [3] [4] [5] [6 7 8] while bisecting the 6 missing regions
+        assert len(_igv_runs()) == 2 + 6
+        assert not os.path.exists(batch_script)
+
+    def test_without_isolation_raises(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that a crash still fails the batch by default"""
+        monkeypatch.setenv("FAKE_IGV_CRASH", regions[2])
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir, output_format='svg')
+        with pytest.raises(RuntimeError, match="6 of 8 missing"):
+            igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv))
+        assert not os.path.exists(os.path.join(temp_dir, "igver_quarantine.tsv"))
+
+    def test_load_screenshots_skips_quarantined(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that load_screenshots returns the other screenshots in region order"""
+        monkeypatch.setenv("FAKE_IGV_CRASH", f"{regions[1]},{regions[6]}")
+        output_paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                              output_format='svg', workers=2, isolate_failures=True)
+
+        assert [os.path.basename(path) for path in output_paths] == \
+            [region.replace(':', '-') + '.svg' for i, region in enumerate(regions) if i not in (1, 6)]
+        assert sorted(locus for locus, _, _ in Quarantine(temp_dir).entries().values()) == [regions[1], regions[6]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
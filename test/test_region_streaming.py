@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+
+
+BED_ROWS = [f"chr1\t{i * 1000}\t{i * 1000 + 500}\n" for i in range(1, 6)]
+
+
+class TestRegionStreaming:
+    """Test streaming ingestion of plain and compressed region files"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def bed_file(self, temp_dir):
+        bed_path = os.path.join(temp_dir, "regions.bed")
+        with open(bed_path, 'w') as f:
+            f.write("track name=test\n" + ''.join(BED_ROWS))
+        return bed_path
+
+    def test_gzip_bed_matches_plain(self, temp_dir, bed_file):
+        """Test that .bed.gz is parsed like the plain file"""
+        gz_path = os.path.join(temp_dir, "regions.bed.gz")
+        with open(bed_file, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            dst.write(src.read())
+
+        assert igver._parse_bed_file(gz_path, temp_dir) == igver._parse_bed_file(bed_file, temp_dir)
+        png_paths, _ = igver._get_paths_and_regions([gz_path], output_dir=temp_dir)
+        assert len(png_paths) == len(BED_ROWS)
+
+    def test_bgzip_multi_member(self, temp_dir):
+        """Test that every member of a bgzip-style multi-member file is read"""
+        bgz_path = os.path.join(temp_dir, "regions.bed.bgz")
+        with open(bgz_path, 'wb') as f:
+            f.write(gzip.compress(''.join(BED_ROWS[:2]).encode()))
+            f.write(gzip.compress(''.join(BED_ROWS[2:]).encode()))
+
+        png_paths, _ = igver._parse_bed_file(bgz_path, temp_dir)
+        assert [os.path.basename(path) for path in png_paths] == \
+            [f"chr1-{i * 1000}-{i * 1000 + 500}.png" for i in range(1, 6)]
+
+    def test_chunks_read_regions_lazily(self, temp_dir):
+        """Test that regions are only consumed as chunks are requested"""
+        consumed = []
+
+        def regions():
+            for i in range(1, 8):
+                consumed.append(i)
+                yield f"chr1:{i * 1000}-{i * 1000 + 500}"
+
+        chunks = igver._iter_batch_chunks(["test.bam"], regions(), temp_dir, chunk_size=3)
+        batch_script, png_paths = next(chunks)
+        assert len(consumed) == 3
+        assert len(png_paths) == 3
+        with open(batch_script) as f:
+            content = f.read()
+        assert content.startswith('new\n')
+        assert content.count('snapshot ') == 3
+
+        assert [len(paths) for _, paths in chunks] == [3, 1]
+        assert len(consumed) == 7
+
+    def test_iter_screenshots_in_chunks(self, fake_igv, temp_dir, bed_file):
+        """Test that a compressed BED is rendered chunk by chunk"""
+        gz_path = os.path.join(temp_dir, "regions.bed.gz")
+        with open(bed_file, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            dst.write(src.read())
+        output_dir = os.path.join(temp_dir, "out")
+
+        results = list(igver.iter_screenshots(["test.bam"], [gz_path], output_dir=output_dir, igv_dir=str(fake_igv),
+                                              output_format='svg', chunk_size=2))
+
+        assert [region for region, _ in results] == [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 6)]
+        assert all(os.path.exists(path) for _, path in results)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            assert f.read().count('---') == 3
+
+    def test_cli_chunks_reject_unsupported_options(self, temp_dir, bed_file):
+        """Test that --chunk-size fails instead of silently ignoring -j and --resume"""
+        result = subprocess.run([sys.executable, "-m", "igver.cli", "-i", "test.bam", "-r", bed_file, "-o", temp_dir,
+                                 "--chunk-size", "2", "-j", "2", "--resume"],
+                                capture_output=True, text=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        assert result.returncode == 2
+        assert "--chunk-size cannot be combined with -j, --resume" in result.stderr
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
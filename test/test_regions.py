@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import pathlib
+import sys
+import tempfile
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.regions import RegionTable
+
+
+def _planned(*args, **kwargs):
+    """Header, batch lines per block and rendering order of a planned batch"""
+    header, blocks, order = igver._plan_batch(*args, **kwargs)
+    return header, list(blocks), blocks.paths(), order.tolist()
+
+
+class TestRegionTable:
+    """Test the array-backed region table shared by the parsers"""
+
+    def test_bed_lines(self):
+        """Test BED parsing into coordinate columns"""
+        table = RegionTable.from_bed_lines([
+            "track name=test\n",
+            "chr1\t100\t200\n",
+            "chr2\t300\t400\tdel1\n",
+            "chr1\t500\t600\n",
+            "chr1\t700\n",
+        ], tag="run")
+
+        assert len(table) == 3
+        assert list(table.chroms) == ["chr1", "chr2"]
+        assert table.chrom_ids.tolist() == [0, 1, 0]
+        assert table.starts.tolist() == [100, 300, 500]
+        assert table.goto_loci().tolist() == ["chr1:100-200", "chr2:300-400", "chr1:500-600"]
+        # A BED name takes precedence over the tag
+        assert table.filenames("png").tolist() == ["chr1-100-200.run.png", "chr2-300-400.del1.png",
+                                                   "chr1-500-600.run.png"]
+
+    def test_non_integer_coordinates_kept_verbatim(self):
+        """Test that coordinates which do not round-trip through int keep their text"""
+        table = RegionTable.from_bed_lines(["chr1\t0100\t200\n", "chr1\t1e3\t2e3\n"])
+
+        assert table.chrom_ids.tolist() == [-1, -1]
+        assert table.goto_loci().tolist() == ["chr1:0100-200", "chr1:1e3-2e3"]
+
+    def test_region_lines_and_strings(self):
+        """Test SV region lines and free-form region strings"""
+        table = RegionTable.from_region_lines(["chr1:100-200 chr2:300-400 translocation\n", "chr3:1-2\n"])
+        assert table.goto_loci().tolist() == ["chr1:100-200 chr2:300-400", "chr3:1-2"]
+        assert table.filenames("svg").tolist() == ["chr1-100-200.chr2-300-400.translocation.svg",
+                                                   "chr3-1-2.svg"]
+
+        table = RegionTable.from_region_strings(["chr1:100-200", "EGFR", "chr1:1,000-2,000"])
+        assert table.chrom_ids.tolist() == [0, -1, -1]
+        assert table.filenames("png").tolist() == ["chr1-100-200.png", "EGFR.png", "chr1-1,000-2,000.png"]
+
+    def test_batch_blocks(self):
+        """Test per-region batch lines with shared commands"""
+        table = RegionTable.from_region_strings(["chr1:100-200", "chr2:1-2"])
+        blocks = table.batch_blocks("/out", "png", ["squish", "maxPanelHeight 200"])
+
+        assert list(blocks) == [["goto chr1:100-200", "squish", "maxPanelHeight 200", "snapshot chr1-100-200.png"],
+                                ["goto chr2:1-2", "squish", "maxPanelHeight 200", "snapshot chr2-1-2.png"]]
+        assert blocks.paths([1, 0]) == ["/out/chr2-1-2.png", "/out/chr1-100-200.png"]
+        batch = io.StringIO()
+        assert blocks.write(batch, np.array([1])) == ["/out/chr2-1-2.png"]
+        assert batch.getvalue() == "goto chr2:1-2\nsquish\nmaxPanelHeight 200\nsnapshot chr2-1-2.png\n"
+
+    def test_empty_table(self, tmp_path):
+        """Test that tables without regions (e.g. a BED of only headers) give an empty plan"""
+        bed_path = tmp_path / "headers.bed"
+        bed_path.write_text("track name=test\n# comment\n")
+        table = RegionTable.from_bed_lines(["track name=test\n"])
+        assert table.filenames("png").tolist() == []
+        assert igver._parse_bed_file(str(bed_path), str(tmp_path)) == ([], [])
+        batch_script, png_paths = igver.create_batch_script(["a.bam"], [], str(tmp_path))
+        assert png_paths == []
+        with open(batch_script) as f:
+            assert f.read().splitlines()[-1] == "exit"
+
+    def test_locality_order(self):
+        """Test natural chromosome order, SV loci placed by their first locus and genes last"""
+        table = RegionTable.from_region_strings(["chr10:5-6", "EGFR", "chr2:9-10", "chrX:1-2",
+                                                 "chr2:1,000-2,000", "chr2:1-2", "chr1:7-8 chr2:1-2",
+                                                 "chr3:50-60 chrX:1-2"])
+        assert table.locality_order().tolist() == [6, 5, 2, 4, 7, 0, 3, 1]
+
+    def test_concat_and_slice(self):
+        """Test stacking tables with different chromosome sets and slicing rows"""
+        first = RegionTable.from_region_strings(["chr2:1-2", "chr1:3-4"])
+        second = RegionTable.from_region_strings(["chr1:5-6", "gene", "chr3:7-8"])
+        table = RegionTable.concat([first, second])
+
+        assert table.goto_loci().tolist() == ["chr2:1-2", "chr1:3-4", "chr1:5-6", "gene", "chr3:7-8"]
+        assert table[1:3].goto_loci().tolist() == ["chr1:3-4", "chr1:5-6"]
+        assert len(RegionTable.concat([])) == 0
+
+
+class TestInMemoryRegions:
+    """Test passing regions held in DataFrames, structured arrays and tuples"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def bed_file(self, temp_dir):
+        bed_path = os.path.join(temp_dir, "regions.bed")
+        with open(bed_path, 'w') as f:
+            f.write("chr2\t300\t400\tdup1\nchr1\t100\t200\n")
+        return bed_path
+
+    def test_tuples_match_bed(self, temp_dir, bed_file):
+        """Test that tuples give the same batch as the equivalent BED file"""
+        records = [("chr2", 300, 400, "dup1"), ("chr1", np.int64(100), 200)]
+        expected = _planned(["test.bam"], [bed_file], temp_dir, tag="run")
+        assert _planned(["test.bam"], records, temp_dir, tag="run") == expected
+
+    def test_structured_array(self, temp_dir, bed_file):
+        """Test a structured array with BED-style column names"""
+        records = np.array([("chr2", 300, 400, "dup1"), ("chr1", 100, 200, "")],
+                           dtype=[("#chrom", "U8"), ("chromStart", "i8"), ("chromEnd", "i8"), ("name", "U8")])
+        expected = _planned(["test.bam"], [bed_file], temp_dir)
+        assert _planned(["test.bam"], records, temp_dir) == expected
+
+    def test_dataframe(self, temp_dir):
+        """Test a DataFrame with missing names and float-upcast coordinates"""
+        pd = pytest.importorskip("pandas")
+        frame = pd.DataFrame({"start": [300.0, 100.0], "chr": ["chr2", "chr1"], "end": [400, 200],
+                              "name": ["dup1", None]})
+        _, png_paths = igver.create_batch_script(["test.bam"], frame, temp_dir)
+        assert [os.path.basename(path) for path in png_paths] == ["chr2-300-400.dup1.png", "chr1-100-200.png"]
+
+    def test_positional_columns(self):
+        """Test that unnamed columns are read in BED order"""
+        records = np.array([("chr1", 5, 6)], dtype=[("a", "U4"), ("b", "i4"), ("c", "i4")])
+        assert RegionTable.from_records(records).goto_loci().tolist() == ["chr1:5-6"]
+
+    def test_mixed_inputs_keep_order(self, temp_dir, bed_file):
+        """Test that tuples, region strings and files can be mixed in one list"""
+        _, png_paths = igver.create_batch_script(["test.bam"], [("chr3", 1, 2), "chr4:5-6", bed_file, ("chr5", 7, 8)],
+                                                 temp_dir)
+        assert [os.path.basename(path) for path in png_paths] == \
+            ["chr3-1-2.png", "chr4-5-6.png", "chr2-300-400.dup1.png", "chr1-100-200.png", "chr5-7-8.png"]
+
+    def test_single_region_file_or_string(self, temp_dir, bed_file):
+        """Test that a bare region file path, PathLike or region string is not read character by character"""
+        expected = _planned(["test.bam"], [bed_file], temp_dir)
+        assert _planned(["test.bam"], bed_file, temp_dir) == expected
+        assert _planned(["test.bam"], pathlib.Path(bed_file), temp_dir) == expected
+        _, png_paths = igver.create_batch_script(["test.bam"], "chr1:100-200", temp_dir)
+        assert [os.path.basename(path) for path in png_paths] == ["chr1-100-200.png"]
+
+    def test_short_record(self):
+        """Test that a record without an end coordinate is rejected"""
+        with pytest.raises(ValueError):
+            RegionTable.from_records([("chr1", 100)])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+from PIL import Image, PdfParser
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.report import PDFReport, ReportWriter
+
+
+def _page_sizes(pdf_path):
+    """Return the (width, height) in points of every page of a PDF"""
+    parser = PdfParser.PdfParser(pdf_path)
+    try:
+        return [tuple(parser.read_indirect(page)[b'MediaBox'][2:]) for page in parser.pages]
+    finally:
+        parser.close()
+
+
+class TestPDFReport:
+    """Test streaming screenshots into multi-page PDF reports"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def images(self, temp_dir):
+        """PNGs of different widths: RGB (embedded as is), RGBA and palette (re-encoded)"""
+        paths = []
+        for i, mode in enumerate(['RGB', 'RGBA', 'P', 'RGB']):
+            path = os.path.join(temp_dir, f"image{i}.png")
+            Image.new(mode, (10 * (i + 1), 20)).save(path)
+            paths.append(path)
+        return paths
+
+    def test_pages(self, temp_dir, images):
+        """Test that every screenshot becomes a page sized pixels / dpi inches"""
+        report_path = os.path.join(temp_dir, "report.pdf")
+        with PDFReport(report_path, dpi=144) as report:
+            for path in images:
+                report.add_page(path)
+        assert _page_sizes(report_path) == [(5, 10), (10, 10), (15, 10), (20, 10)]
+
+    def test_caller_order(self, temp_dir, images):
+        """Test that pages follow the given order, whatever order screenshots arrive in"""
+        report_path = os.path.join(temp_dir, "report.pdf")
+        writer = ReportWriter(report_path, order=images, dpi=72)
+        writer.add(images[2])
+        writer.add(images[0])
+        assert len(writer._reports[report_path]) == 1
+        writer.add(images[1])
+        assert len(writer._reports[report_path]) == 3
+        assert writer.finish() == [report_path]
+        assert _page_sizes(report_path) == [(10, 20), (20, 20), (30, 20), (40, 20)]
+
+    def test_load_screenshots_report(self, fake_igv, temp_dir):
+        """Test a report of a parallel run, split in two by a function of the screenshot"""
+        regions = ["chr2:1000-1500", "chr1:1000-1500", "chr1:5000-5500"]
+        split = lambda screenshot: os.path.join(temp_dir, screenshot.region.split(':')[0] + ".pdf")
+        igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                               workers=2, return_type='path', report=split, dpi=72)
+        assert len(_page_sizes(os.path.join(temp_dir, "chr1.pdf"))) == 2
+        assert _page_sizes(os.path.join(temp_dir, "chr2.pdf")) == [(40, 20)]
+
+    def test_iter_screenshots_report(self, fake_igv, temp_dir):
+        """Test that a streamed run pages each screenshot it yields"""
+        report_path = os.path.join(temp_dir, "report.pdf")
+        regions = ["chr1:1000-1500", "chr1:5000-5500"]
+        results = list(igver.iter_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                              report=report_path))
+        assert len(results) == 2
+        assert len(_page_sizes(report_path)) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
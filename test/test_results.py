@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+import numpy as np
+import matplotlib.pyplot as plt
+from PIL import Image
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.results import Screenshot, stack_screenshots
+
+
+class TestLazyScreenshots:
+    """Test the lazy screenshot objects returned with return_type='lazy'"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return ["chr2:1000-1500", "chr1:1000-1500", "chr1:5000-5500"]
+
+    def test_lazy_results(self, fake_igv, temp_dir, regions):
+        """Test that screenshots come back undecoded, in region order, with their files kept"""
+        screenshots = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                             return_type='lazy', workers=2)
+        assert all(isinstance(screenshot, Screenshot) for screenshot in screenshots)
+        assert [screenshot.region for screenshot in screenshots] == regions
+        assert [screenshot.name for screenshot in screenshots] == \
+            [region.replace(':', '-') + '.png' for region in regions]
+        assert all(os.path.exists(screenshot) for screenshot in screenshots)
+
+    def test_decode_on_access(self, fake_igv, temp_dir, regions):
+        """Test decoding a screenshot into an image, an array and an unregistered figure"""
+        screenshot = igver.load_screenshots(["test.bam"], regions[:1], output_dir=temp_dir, igv_dir=str(fake_igv),
+                                            return_type='lazy', dpi=10)[0]
+        assert screenshot.image().size == (40, 20)
+        array = screenshot.array()
+        assert array.shape == (20, 40, 3)
+        assert array.dtype.name == 'uint8'
+
+        figures = plt.get_fignums()
+        fig = screenshot.figure()
+        assert tuple(fig.get_size_inches()) == (4, 2)
+        assert plt.get_fignums() == figures
+
+    def test_svg_paths_are_not_decoded(self, fake_igv, temp_dir, regions):
+        """Test that SVG screenshots keep their region but cannot be decoded"""
+        screenshot = igver.load_screenshots(["test.bam"], regions[:1], output_dir=temp_dir, igv_dir=str(fake_igv),
+                                            output_format='svg', return_type='lazy')[0]
+        assert screenshot.region == regions[0]
+        with pytest.raises(ValueError):
+            screenshot.image()
+
+
+class TestReturnTypes:
+    """Test the path, PIL, array and memmap return types"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return ["chr1:1000-1500", "chr1:5000-5500"]
+
+    def test_path_and_pil(self, fake_igv, temp_dir, regions):
+        """Test that 'path' keeps the files and 'pil' decodes and removes them"""
+        paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                       return_type='path')
+        assert [os.path.basename(path) for path in paths] == ["chr1-1000-1500.png", "chr1-5000-5500.png"]
+        assert all(os.path.exists(path) for path in paths)
+
+        images = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                        return_type='pil')
+        assert [image.size for image in images] == [(40, 20), (40, 20)]
+        assert not any(os.path.exists(path) for path in paths)
+
+    def test_array(self, fake_igv, temp_dir, regions):
+        """Test that 'array' stacks the screenshots in region order"""
+        stack = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                       return_type='array')
+        assert stack.shape == (2, 20, 40, 3)
+        assert stack.dtype == np.uint8
+
+    def test_memmap(self, fake_igv, temp_dir, regions):
+        """Test that 'memmap' writes a new .npy file next to the screenshots on every call"""
+        stack = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                       return_type='memmap')
+        assert isinstance(stack, np.memmap)
+        assert os.path.dirname(stack.filename) == os.path.realpath(temp_dir)
+        reopened = np.load(stack.filename, mmap_mode='r')
+        assert reopened.shape == (2, 20, 40, 3)
+        assert (reopened == 255).all()
+
+        second = igver.load_screenshots(["test.bam"], regions[:1], output_dir=temp_dir, igv_dir=str(fake_igv),
+                                        return_type='memmap')
+        assert second.filename != stack.filename
+        assert np.load(stack.filename, mmap_mode='r').shape == (2, 20, 40, 3)
+
+        memmap_path = os.path.join(temp_dir, "stack.npy")
+        igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                               return_type='memmap', memmap_path=memmap_path)
+        assert np.load(memmap_path, mmap_mode='r').shape == (2, 20, 40, 3)
+
+    def test_padding(self, temp_dir):
+        """Test that smaller screenshots are padded with white"""
+        paths = [os.path.join(temp_dir, "wide.png"), os.path.join(temp_dir, "tall.png")]
+        Image.new('RGB', (30, 10), 'black').save(paths[0])
+        Image.new('RGB', (10, 20), 'black').save(paths[1])
+        stack = stack_screenshots(paths)
+        assert stack.shape == (2, 20, 30, 3)
+        assert (stack[0, :10] == 0).all() and (stack[0, 10:] == 255).all()
+        assert (stack[1, :, :10] == 0).all() and (stack[1, :, 10:] == 255).all()
+
+    def test_svg_cannot_be_decoded(self, fake_igv, temp_dir, regions):
+        """Test that decoded return types are rejected for SVG output before IGV starts"""
+        with pytest.raises(ValueError):
+            igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir, igv_dir=str(fake_igv),
+                                   output_format='svg', return_type='array')
+        assert not os.path.exists(os.environ['FAKE_IGV_LOG'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.journal import JOURNAL_NAME, ProgressJournal
+
+
+class TestResume:
+    """Test resuming interrupted runs from the progress journal"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 5)]
+
+    def test_journal_validates_files(self, temp_dir):
+        """Test that only unchanged, complete snapshots count as finished"""
+        journal = ProgressJournal(temp_dir)
+        paths = [os.path.join(temp_dir, f"{name}.svg") for name in ('a', 'b', 'c')]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write('<svg></svg>\n')
+            journal.record(path)
+        incomplete = os.path.join(temp_dir, "d.svg")
+        with open(incomplete, 'w') as f:
+            f.write('<svg>')
+        journal.record(incomplete)
+
+        # Truncated after it was recorded
+        with open(paths[1], 'w') as f:
+            f.write('<svg>')
+        os.remove(paths[2])
+
+        assert journal.finished(paths + [incomplete]) == {paths[0]}
+        assert ProgressJournal(os.path.join(temp_dir, "empty")).finished(paths) == set()
+
+    def test_resume_renders_unfinished_only(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that a resumed run plans batches for the unfinished regions only"""
+        kwargs = dict(output_dir=temp_dir, igv_dir=str(fake_igv), output_format='svg')
+        monkeypatch.setenv('FAKE_IGV_FAIL', regions[2])
+        with pytest.raises(RuntimeError):
+            igver.load_screenshots(["test.bam"], regions, max_retries=0, **kwargs)
+        finished = [os.path.join(temp_dir, region.replace(':', '-') + '.svg') for region in regions]
+        mtimes = {path: os.stat(path).st_mtime_ns for path in finished if os.path.exists(path)}
+        assert len(mtimes) == 3
+
+        monkeypatch.delenv('FAKE_IGV_FAIL')
+        os.remove(os.environ['FAKE_IGV_LOG'])
+        output_paths = igver.load_screenshots(["test.bam"], regions, resume=True, **kwargs)
+
+        assert output_paths == finished
+        assert all(os.path.exists(path) for path in output_paths)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            log = f.read()
+        assert log.count('---') == 1
+        assert log.count('goto ') == 1
+        assert f'goto {regions[2]}' in log
+        # Finished outputs were neither removed nor rendered again
+        assert all(os.stat(path).st_mtime_ns == mtime for path, mtime in mtimes.items())
+
+        igver.load_screenshots(["test.bam"], regions, resume=True, **kwargs)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            assert f.read().count('---') == 1
+
+    def test_journal_does_not_grow(self, fake_igv, temp_dir, regions):
+        """Test that ordinary runs restart the journal and resumed runs compact it"""
+        kwargs = dict(output_dir=temp_dir, igv_dir=str(fake_igv), output_format='svg')
+        journal_path = os.path.join(temp_dir, JOURNAL_NAME)
+        for _ in range(2):
+            igver.load_screenshots(["test.bam"], regions, **kwargs)
+            with open(journal_path) as f:
+                assert len(f.readlines()) == len(regions)
+
+        with open(journal_path) as f:
+            lines = f.readlines()
+        with open(journal_path, 'a') as f:
+            f.write(lines[0])
+        igver.load_screenshots(["test.bam"], regions, resume=True, **kwargs)
+        with open(journal_path) as f:
+            assert sorted(f.readlines()) == sorted(lines)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
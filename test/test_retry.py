@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+
+
+def _igv_runs():
+    """Return the batch scripts the fake IGV was run with, one list of lines per run"""
+    with open(os.environ['FAKE_IGV_LOG']) as f:
+        runs = f.read().split('---\n')
+    return [run.splitlines() for run in runs if run.strip()]
+
+
+class TestRetryMissing:
+    """Test that retries only re-render missing screenshots"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return ["chr1:1000-2000", "chr2:3000-4000", "chr3:5000-6000"]
+
+    def test_subset_batch_keeps_header(self, temp_dir, regions):
+        """Test that a subset batch has the full header and only the requested blocks"""
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir)
+        subset_script = igver._write_subset_batch_script(batch_script, [output_paths[1]])
+        header, blocks = igver._read_batch_script(subset_script)
+
+        assert header == ['new', f'snapshotDirectory {temp_dir}', 'genome hg19', 'load test.bam',
+                          'squish', 'maxPanelHeight 200']
+        assert len(blocks) == 1
+        assert blocks[0][0] == 'goto chr2:3000-4000'
+        assert blocks[0][-1] == 'snapshot chr2-3000-4000.png'
+
+    def test_retry_runs_only_failed_region(self, fake_igv, temp_dir, regions, monkeypatch):
+        """Test that retries contain only the block that failed"""
+        monkeypatch.setenv('FAKE_IGV_FAIL', 'chr2:3000-4000')
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir)
+
+        with pytest.raises(RuntimeError, match="after 3 iterations"):
+            igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), max_retries=2)
+
+        runs = _igv_runs()
+        assert len(runs) == 3
+        assert sum(line.startswith('snapshot ') for line in runs[0]) == 3
+        for run in runs[1:]:
+            assert 'load test.bam' in run
+            assert [line for line in run if line.startswith('goto')] == ['goto chr2:3000-4000']
+
+    def test_existing_outputs_are_not_rerendered(self, fake_igv, temp_dir, regions):
+        """Test that only missing outputs are rendered when overwrite is off"""
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir)
+        for png in output_paths[:2]:
+            with open(png, 'w') as f:
+                f.write('existing')
+
+        igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), overwrite=False)
+
+        runs = _igv_runs()
+        assert len(runs) == 1
+        assert [line for line in runs[0] if line.startswith('goto')] == ['goto chr3:5000-6000']
+        assert all(os.path.exists(png) for png in output_paths)
+        assert not [f for f in os.listdir(temp_dir) if f.endswith('.batch')]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
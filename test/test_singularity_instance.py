@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import stat
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver, singularity
+from igver.singularity import SingularityInstance, _parse_singularity_args
+
+# Stand-in for singularity: logs each call and runs `exec instance://... <cmd>` directly
+FAKE_SINGULARITY = '''#!/bin/sh
+echo "$@" >> "$FAKE_SINGULARITY_LOG"
+if [ "$1" = "exec" ]; then
+    shift 2
+    exec "$@"
+fi
+'''
+
+
+class TestSingularityInstance:
+    """Test reuse of a persistent singularity instance"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def fake_singularity(self, fake_igv, tmp_path, monkeypatch):
+        """Install a fake singularity next to the fake IGV"""
+        path = tmp_path / "bin" / "singularity"
+        path.write_text(FAKE_SINGULARITY)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        log = tmp_path / "singularity.log"
+        monkeypatch.setenv("FAKE_SINGULARITY_LOG", str(log))
+        yield log
+        singularity.stop_singularity_instances()
+
+    def test_parse_singularity_args(self):
+        """Test splitting binds from other options"""
+        binds, options = _parse_singularity_args('-B /home --bind /a,/b:/c --bind=/d --cleanenv')
+        assert binds == {'/home', '/a', '/b:/c', '/d'}
+        assert options == ('--cleanenv',)
+
+    def test_covers_subdirectories(self):
+        """Test that binds of parent directories cover nested paths"""
+        instance = SingularityInstance('image.sif', '-B /home -B /data/x:/mnt')
+        assert instance.covers('image.sif', '-B /home/user/bams')
+        assert instance.covers('image.sif', '-B /data/x:/mnt')
+        assert not instance.covers('image.sif', '-B /scratch')
+        assert not instance.covers('other.sif', '-B /home')
+        assert not instance.covers('image.sif', '-B /home --cleanenv')
+
+    def test_instance_command(self):
+        """Test that IGV is exec'd into the instance"""
+        instance = SingularityInstance('image.sif', name='igver_test')
+        cmd = igver._igv_command('-b run.batch', '/opt/IGV', 'image.sif', '-B /home', True,
+                                 singularity_instance=instance)
+        assert cmd.startswith('singularity exec instance://igver_test xvfb-run ')
+
+    def test_instance_reused_across_calls(self, fake_singularity, fake_igv, temp_dir):
+        """Test that one instance is started per session and reused"""
+        for region in ["chr1:1000-2000", "chr2:3000-4000"]:
+            igver.load_screenshots(["test.bam"], [region], output_dir=temp_dir, igv_dir=str(fake_igv),
+                                   output_format='svg', singularity_args='', singularity_image='image.sif',
+                                   use_singularity=True, singularity_instance=True)
+        with open(fake_singularity) as f:
+            calls = f.read().splitlines()
+
+        starts = [call for call in calls if call.startswith('instance start')]
+        assert len(starts) == 1
+        assert f'-B {os.path.realpath(temp_dir)}' in starts[0]
+        assert sum(call.startswith('exec instance://igver_') for call in calls) == 2
+        assert not any(call.startswith('run ') for call in calls)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.cache import SnapshotCache
+
+
+class TestSnapshotCache:
+    """Test the content-addressed snapshot cache"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def bam(self, temp_dir):
+        bam = os.path.join(temp_dir, "test.bam")
+        with open(bam, 'w') as f:
+            f.write("reads")
+        return bam
+
+    def _keys(self, cache, bam, output_dir, prefs=None, **kwargs):
+        header, blocks, _ = igver._plan_batch([bam], ["chr1:100-200", "chr2:100-200"], output_dir, **kwargs)
+        return cache.snapshot_keys(header, blocks, 'IGV_2.19.5', prefs)
+
+    def test_keys_track_inputs(self, temp_dir, bam):
+        """Test that keys change with the track, its index, display settings and format"""
+        cache = SnapshotCache(os.path.join(temp_dir, "cache"))
+        keys = self._keys(cache, bam, os.path.join(temp_dir, "a"))
+        assert len(set(keys)) == 2
+        # The output directory does not change the pixels
+        assert self._keys(cache, bam, os.path.join(temp_dir, "b")) == keys
+        assert self._keys(cache, bam, temp_dir, max_panel_height=400) != keys
+        assert self._keys(cache, bam, temp_dir, output_format='svg') != keys
+
+        with open(bam + '.bai', 'w') as f:
+            f.write("index")
+        indexed_keys = self._keys(cache, bam, temp_dir)
+        assert indexed_keys != keys
+
+        stat = os.stat(bam)
+        os.utime(bam, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert self._keys(cache, bam, temp_dir) != indexed_keys
+
+    def test_keys_track_profile_prefs(self, temp_dir, bam):
+        """Test that keys change with the window bounds and visibility range of the IGV profile"""
+        cache = SnapshotCache(os.path.join(temp_dir, "cache"))
+        headless = self._keys(cache, bam, temp_dir, prefs=igver._igv_profile_prefs(True))
+        assert headless != self._keys(cache, bam, temp_dir)
+        assert headless == self._keys(cache, bam, temp_dir, prefs=igver._igv_profile_prefs({}))
+        for override in ({'IGV.Bounds': '0,0,800,600'}, {'SAM.MAX_VISIBLE_RANGE': '100'}):
+            assert self._keys(cache, bam, temp_dir, prefs=igver._igv_profile_prefs(override)) != headless
+
+    def test_second_run_skips_igv(self, fake_igv, temp_dir, bam):
+        """Test that cached screenshots are served without starting IGV"""
+        cache_dir = os.path.join(temp_dir, "cache")
+        regions = ["chr1:100-200", "chr2:100-200"]
+        kwargs = dict(output_dir=os.path.join(temp_dir, "out"), igv_dir=str(fake_igv),
+                      output_format='svg', snapshot_cache=cache_dir)
+
+        first = igver.load_screenshots([bam], regions, **kwargs)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            assert f.read().count('---') == 1
+        for path in first:
+            os.remove(path)
+
+        second = igver.load_screenshots([bam], regions + ["chr3:100-200"], **kwargs)
+        assert second[:2] == first
+        assert all(os.path.exists(path) for path in second)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            runs = f.read().split('---')
+        # Only the new region was rendered
+        assert len(runs) == 3
+        assert 'goto chr3:100-200' in runs[1]
+        assert 'goto chr1:100-200' not in runs[1]
+
+        igver.load_screenshots([bam], regions, **kwargs)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            assert f.read().count('---') == 2
+        assert not [name for name in os.listdir(kwargs['output_dir']) if name.endswith('.batch')]
+
+    def test_evict_least_recently_used(self, temp_dir):
+        """Test that eviction keeps the cache under its size cap, oldest first"""
+        cache = SnapshotCache(os.path.join(temp_dir, "cache"), max_bytes=25)
+        for i, key in enumerate(['aa01', 'bb02', 'cc03']):
+            path = os.path.join(temp_dir, f"{key}.svg")
+            with open(path, 'w') as f:
+                f.write('x' * 10)
+            cache.store(key, path)
+            entry = cache._entry(key, path)
+            os.utime(entry, (time.time() - 100 + i, time.time() - 100 + i))
+        # A hit makes the oldest entry the most recently used
+        assert cache.fetch('aa01', os.path.join(temp_dir, "hit.svg"))
+        cache.evict()
+
+        out = os.path.join(temp_dir, "out.svg")
+        assert cache.fetch('aa01', out)
+        assert not cache.fetch('bb02', out)
+        assert cache.fetch('cc03', out)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
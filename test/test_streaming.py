@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+from PIL import Image
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import igver
+from igver.process import IGVProcess, is_complete_snapshot
+
+
+class TestStreamingScreenshots:
+    """Test yielding screenshots while IGV is still running"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def test_is_complete_snapshot(self, temp_dir):
+        """Test detection of partially written files"""
+        png = os.path.join(temp_dir, "a.png")
+        Image.new('RGB', (10, 10), 'white').save(png)
+        assert is_complete_snapshot(png)
+        with open(png, 'rb') as f:
+            data = f.read()
+        with open(png, 'wb') as f:
+            f.write(data[:-20])
+        assert not is_complete_snapshot(png)
+
+        svg = os.path.join(temp_dir, "a.svg")
+        with open(svg, 'w') as f:
+            f.write('<svg xmlns="http://www.w3.org/2000/svg">')
+        assert not is_complete_snapshot(svg)
+        with open(svg, 'a') as f:
+            f.write('</svg>\n')
+        assert is_complete_snapshot(svg)
+        assert not is_complete_snapshot(os.path.join(temp_dir, "missing.png"))
+
+    def test_snapshots_reported_while_running(self, temp_dir):
+        """Test that a snapshot is yielded before the process exits"""
+        first = os.path.join(temp_dir, "first.svg")
+        second = os.path.join(temp_dir, "second.svg")
+        cmd = (f"echo '<svg></svg>' > {first}; sleep 1; "
+               f"echo '<svg></svg>' > {second}; sleep 30")
+        igv_process = IGVProcess(cmd, [first, second], poll_interval=0.05)
+        snapshots = igv_process.snapshots()
+        assert next(snapshots) == first
+        assert not os.path.exists(second)
+        assert next(snapshots) == second
+        snapshots.close()
+        assert igv_process.returncode is not None
+        igv_process.close()
+
+    def test_skipped_snapshot_is_not_reported(self, temp_dir):
+        """Test that a snapshot IGV never wrote is skipped"""
+        paths = [os.path.join(temp_dir, f"{name}.svg") for name in ("a", "b", "c")]
+        cmd = f"echo '<svg></svg>' > {paths[0]}; echo '<svg></svg>' > {paths[2]}"
+        igv_process = IGVProcess(cmd, paths, poll_interval=0.05)
+        assert list(igv_process.snapshots()) == [paths[0], paths[2]]
+        igv_process.close()
+
+    def test_iter_screenshots_yields_regions(self, fake_igv, temp_dir):
+        """Test the public generator API"""
+        regions = ["chr1:1000-2000", "chr2:3000-4000"]
+        results = list(igver.iter_screenshots(["test.bam"], regions, output_dir=temp_dir,
+                                              igv_dir=str(fake_igv)))
+
+        assert [region for region, _ in results] == regions
+        assert [os.path.basename(path) for _, path in results] == \
+            ["chr1-1000-2000.png", "chr2-3000-4000.png"]
+        assert not [f for f in os.listdir(temp_dir) if f.endswith('.batch')]
+
+    def test_run_igv_on_snapshot_callback(self, fake_igv, temp_dir):
+        """Test that run_igv reports each screenshot to the callback"""
+        batch_script, output_paths = igver.create_batch_script(
+            ["test.bam"], ["chr1:1000-2000", "chr2:3000-4000"], temp_dir)
+        seen = []
+        igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), on_snapshot=seen.append)
+        assert seen == output_paths
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
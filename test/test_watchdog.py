@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+from igver.process import IGVProcess, classify_failure
+
+
+def _igv_runs():
+    with open(os.environ['FAKE_IGV_LOG']) as f:
+        return [run.strip().split('\n') for run in f.read().split('---')[:-1]]
+
+
+class TestWatchdog:
+    """Test IGV timeouts, process tree kills, failure classification and heap escalation"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def _run(self, igv_process):
+        try:
+            return list(igv_process.snapshots()), igv_process.failure()
+        finally:
+            igv_process.close()
+
+    def test_stall_timeout(self, temp_dir):
+        """Test that IGV is killed once no new snapshot appears for stall_timeout seconds"""
+        first = os.path.join(temp_dir, "first.svg")
+        second = os.path.join(temp_dir, "second.svg")
+        cmd = f"echo '<svg></svg>' > {first}; sleep 30; echo '<svg></svg>' > {second}"
+        start = time.time()
+        snapshots, failure = self._run(IGVProcess(cmd, [first, second], poll_interval=0.05, stall_timeout=0.5))
+
+        assert snapshots == [first]
+        assert failure == 'stall'
+        assert time.time() - start < 10
+
+    def test_wall_clock_timeout(self, temp_dir):
+        """Test that IGV is killed after timeout seconds even while it makes progress"""
+        paths = [os.path.join(temp_dir, f"{i}.svg") for i in range(100)]
+        cmd = '; '.join(f"echo '<svg></svg>' > {path}; sleep 0.1" for path in paths)
+        snapshots, failure = self._run(IGVProcess(cmd, paths, poll_interval=0.05, timeout=1, stall_timeout=5))
+
+        assert 0 < len(snapshots) < len(paths)
+        assert failure == 'timeout'
+
+    def test_kill_process_tree(self, temp_dir):
+        """Test that descendants in a session of their own are killed too"""
+        pid_file = os.path.join(temp_dir, "child.pid")
+        cmd = f"setsid sleep 60 & echo $! > {pid_file}; sleep 60"
+        igv_process = IGVProcess(cmd, [os.path.join(temp_dir, "never.svg")], poll_interval=0.05, timeout=0.5)
+        self._run(igv_process)
+
+        with open(pid_file) as f:
+            child = int(f.read())
+        for _ in range(50):
+            if not os.path.exists(f'/proc/{child}') or open(f'/proc/{child}/stat').read().split()[2] == 'Z':
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("setsid child survived the kill")
+
+    def test_classify_failure(self):
+        """Test failure classes from exit code and stderr"""
+        assert classify_failure(0, '') is None
+        assert classify_failure(1, 'java.lang.OutOfMemoryError: Java heap space') == 'oom'
+        assert classify_failure(137, '') == 'error'
+        assert classify_failure(-9, '') == 'error'
+        assert classify_failure(-9, 'Cannot allocate memory') == 'oom'
+        assert classify_failure(-9, '', timed_out='timeout') == 'timeout'
+        assert classify_failure(1, 'ERROR: An index file is required for test.bam') == 'missing_index'
+        assert classify_failure(1, "java.awt.AWTError: Can't connect to X11 window server") == 'display'
+        assert classify_failure(1, 'Exception in thread main') == 'error'
+        assert classify_failure(None, 'OutOfMemoryError', timed_out='stall') == 'stall'
+
+    def test_heap_escalation(self, fake_igv, temp_dir, monkeypatch):
+        """Test that an out-of-memory failure is rerun with a doubled heap without using a retry"""
+        monkeypatch.setenv("FAKE_IGV_MIN_HEAP_MB", "16384")
+        regions = ["chr1:1000-2000", "chr2:3000-4000"]
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], regions, temp_dir, output_format='svg')
+        igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), max_retries=0, max_java_heap_mb=32768)
+
+        assert all(os.path.exists(path) for path in output_paths)
+        assert len(_igv_runs()) == 2
+        # The heap options live in a per-run directory that is removed afterwards
+        assert not [name for name in os.listdir(temp_dir) if name.startswith(".igver_jvm")]
+
+    def test_failure_class_in_error(self, fake_igv, temp_dir, monkeypatch):
+        """Test that the final error names the failure class when the heap cannot grow further"""
+        monkeypatch.setenv("FAKE_IGV_MIN_HEAP_MB", "65536")
+        batch_script, output_paths = igver.create_batch_script(["test.bam"], ["chr1:1000-2000"], temp_dir,
+                                                               output_format='svg')
+        with pytest.raises(RuntimeError, match="last IGV failure: oom"):
+            igver.run_igv(batch_script, output_paths, igv_dir=str(fake_igv), max_retries=0,
+                          java_heap_mb=16384, max_java_heap_mb=32768)
+        assert len(_igv_runs()) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
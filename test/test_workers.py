@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from igver import igver
+
+
+class TestWorkerSharding:
+    """Test splitting regions across several batch scripts and IGV workers"""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for test outputs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def regions(self):
+        return [f"chr1:{i * 1000}-{i * 1000 + 500}" for i in range(1, 8)]
+
+    def test_shard_indices_are_contiguous(self):
+        """Test that shards cover every item once, in order"""
+        shards = igver._shard_indices(7, 3)
+        assert [list(shard) for shard in shards] == [[0, 1, 2], [3, 4], [5, 6]]
+        assert len(igver._shard_indices(2, 8)) == 2
+        assert [list(shard) for shard in igver._shard_indices(0, 4)] == [[]]
+
+    def test_batch_scripts_preserve_order(self, temp_dir, regions):
+        """Test that concatenated shard outputs match the single-script order"""
+        _, single_paths = igver.create_batch_script(["test.bam"], regions, temp_dir)
+        batches = igver.create_batch_scripts(["test.bam"], regions, temp_dir, n_scripts=3)
+
+        assert len(batches) == 3
+        assert [png for _, paths in batches for png in paths] == single_paths
+        for batch_script, paths in batches:
+            with open(batch_script) as f:
+                content = f.read()
+            assert content.startswith('new\n')
+            assert 'load test.bam' in content
+            assert content.endswith('exit')
+            assert content.count('snapshot ') == len(paths)
+
+    def test_load_screenshots_with_workers(self, fake_igv, temp_dir, regions):
+        """Test that parallel workers produce every output in the original order"""
+        output_paths = igver.load_screenshots(["test.bam"], regions, output_dir=temp_dir,
+                                              igv_dir=str(fake_igv), output_format='svg', workers=3)
+
+        assert [os.path.basename(path) for path in output_paths] == \
+            [region.replace(':', '-') + '.svg' for region in regions]
+        assert all(os.path.exists(path) for path in output_paths)
+        with open(os.environ['FAKE_IGV_LOG']) as f:
+            assert f.read().count('---') == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])